@@ -1,12 +1,122 @@
 # -*- encoding: utf-8 -*-
 
 from tkinter import Tk
+import click
+from piscis.config import Configuration, TARGET_FPS, ARENA_COUNT, MAX_ARENA_COUNT, RENDER_MODES, VECTOR
+from piscis.instrumentation import StartupTimer
+from piscis.layout import LayoutError, parse_layout
+from piscis.scheduler import FRAME_POLICIES, SKIP
+from piscis.snapshot import SnapshotError, check_snapshot
+from piscis.telemetry import TELEMETRY_CAPACITY
+from piscis.ui.form_cache import FormCache
+from piscis.ui.toolkit import TkToolkit
 from piscis.ui.window import MainWindow, SecondaryWindow
 
-if __name__ == '__main__':
-    main_root = Tk()
-    main_root.resizable(0, 0)
 
-    main_window = MainWindow(main_root)
+def validate_layout(context, parameter, value):
+    if value is None:
+        return None
+    try:
+        return parse_layout(value)
+    except LayoutError as error:
+        raise click.BadParameter(str(error))
+
+
+@click.command()
+@click.option("--fps", default=TARGET_FPS, type=click.IntRange(1, 240), help="Target frame rate of the stimuli.")
+@click.option("--frame-policy", default=SKIP, type=click.Choice(FRAME_POLICIES),
+              help="What to do with frames that missed their deadline.")
+@click.option("--statistics-dir", default=None, type=click.Path(exists=True, file_okay=False),
+              help="Export the frame statistics of the session into this directory on exit.")
+@click.option("--arenas", default=ARENA_COUNT, type=click.IntRange(1, MAX_ARENA_COUNT),
+              help="Number of arenas, e.g. 24, 48 or 96 for multi-well plates.")
+@click.option("--layout", default=None, callback=validate_layout,
+              help="Grid of the arenas on the displays as ROWSxCOLUMNS, e.g. 8x12.")
+@click.option("--render-mode", default=VECTOR, type=click.Choice(RENDER_MODES),
+              help="Draw the stimuli as canvas ovals, as cached pre-rasterized sprites or into one framebuffer image "
+                   "per display.")
+@click.option("--event-log", default=None, type=click.Path(dir_okay=False),
+              help="Append stimulus start, target-reached, pause and stop events to this CSV file.")
+@click.option("--telemetry", default=None, type=click.Path(dir_okay=False),
+              help="Record the state of every arena in each frame and export it to this .npz file on exit.")
+@click.option("--telemetry-frames", default=TELEMETRY_CAPACITY, type=click.IntRange(1),
+              help="Number of most recent frames the telemetry ring buffer keeps.")
+@click.option("--control-port", default=None, type=click.IntRange(0, 65535),
+              help="Accept JSON control commands over TCP on this local port.")
+@click.option("--control-udp-port", default=None, type=click.IntRange(0, 65535),
+              help="Accept JSON control commands as UDP datagrams on this local port.")
+@click.option("--form-cache-dir", default=None, type=click.Path(file_okay=False),
+              help="Keep pre-parsed user interface definitions in this directory to speed up later launches.")
+@click.option("--display-process", is_flag=True,
+              help="Render the full screen stimulus display in its own process, unaffected by the control window.")
+@click.option("--snapshot", default=None, type=click.Path(dir_okay=False),
+              help="Mirror the session state into this memory-mapped file to be able to resume after a crash.")
+@click.option("--resume", is_flag=True, help="Restore the session stored in the --snapshot file.")
+@click.option("--record-session", default=None, type=click.Path(dir_okay=False),
+              help="Record every operator action into this session trace for later replay.")
+@click.option("--tracker-udp-port", default=None, type=click.IntRange(0, 65535),
+              help="Receive fish positions from a tracker on this machine as UDP datagrams on this local port. "
+                   "Samples must carry their capture time from the tracker's time.monotonic().")
+@click.option("--tracker-ring", default=None,
+              help="Create a shared-memory ring with this name for a tracker on this machine to write positions into. "
+                   "Samples must carry their capture time from the tracker's time.monotonic().")
+@click.option("--follow", default=None, type=(float, click.FloatRange(min=0.)), metavar="ANGLE DISTANCE",
+              help="Place every stimulus this far from its fish at this angle in degrees from the fish heading.")
+@click.option("--display-lag", default=0., type=click.FloatRange(min=0.),
+              help="Seconds from a drawn frame to light on the screen, added to the tracker latency prediction.")
+@click.option("--profile-dir", default=None, type=click.Path(file_okay=False),
+              help="Write render profiles requested over the control API into this directory.")
+@click.option("--startup-report", is_flag=True, help="Print where the launch time went once the window is shown.")
+def main(fps, frame_policy, statistics_dir, arenas, layout, render_mode, event_log, telemetry, telemetry_frames,
+         control_port, control_udp_port, form_cache_dir, display_process, snapshot, resume, record_session,
+         tracker_udp_port, tracker_ring, follow, display_lag, profile_dir, startup_report):
+    startup_timer = StartupTimer()
+    configuration = Configuration()
+    configuration.target_fps = fps
+    configuration.frame_policy = frame_policy
+    configuration.statistics_directory = statistics_dir
+    configuration.arena_count = arenas
+    configuration.render_mode = render_mode
+    configuration.event_log_path = event_log
+    configuration.telemetry_path = telemetry
+    configuration.telemetry_frames = telemetry_frames
+    configuration.control_port = control_port
+    configuration.control_udp_port = control_udp_port
+    configuration.form_cache_directory = form_cache_dir
+    configuration.display_process = display_process
+    configuration.snapshot_path = snapshot
+    configuration.resume = resume
+    configuration.session_trace_path = record_session
+    configuration.tracker_udp_port = tracker_udp_port
+    configuration.tracker_ring = tracker_ring
+    configuration.follow = follow
+    configuration.display_lag = display_lag
+    configuration.profile_directory = profile_dir
+    if layout is not None:
+        configuration.layout_rows, configuration.layout_columns = layout
+    try:
+        configuration.create_layout()
+    except LayoutError as error:
+        raise click.BadParameter(str(error), param_hint="--layout")
+    if resume:
+        if snapshot is None:
+            raise click.BadParameter("Resuming needs the --snapshot file", param_hint="--resume")
+        try:
+            check_snapshot(snapshot, arenas)
+        except SnapshotError as error:
+            raise click.BadParameter(str(error), param_hint="--snapshot")
+
+    with startup_timer.phase("tk"):
+        main_root = Tk()
+        main_root.resizable(0, 0)
+
+    toolkit = TkToolkit(FormCache(configuration.form_cache_directory))
+    main_window = MainWindow(main_root, configuration, toolkit, startup_timer)
+    if startup_report:
+        main_root.after_idle(lambda: click.echo(main_window.get_startup_report(), err=True))
 
     main_root.mainloop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+from collections import OrderedDict
+from itertools import count
+import json
+import platform
+import subprocess
+import time
+import timeit
+import click
+from piscis.config import Configuration, VECTOR, FRAMEBUFFER
+from piscis.model import PredatorArray, PredatorFactory, LINEAR, CONSTANT_LV
+from piscis.raster import encode_ppm
+from piscis.scheduler import Frame
+from piscis.timeline import TimelineCompiler
+from piscis.ui.headless import create_headless_window
+
+BENCHMARK_ARENAS = (1, 4, 24, 96)
+BENCHMARK_NUMBER = 200
+BENCHMARK_REPEAT = 5
+BENCHMARK_FPS = 40
+FRAME_MS = 1000 // BENCHMARK_FPS
+RESULTS_FILE = "benchmark_results.jsonl"
+REGRESSION_THRESHOLD = 1.1
+
+
+def measure(function, number=BENCHMARK_NUMBER, repeat=BENCHMARK_REPEAT):
+    return min(timeit.Timer(function).repeat(repeat, number)) / number
+
+
+def create_predators(arena_count, profile=LINEAR, epoch=0):
+    predator_factory = PredatorFactory()
+    predators = list()
+    for i in range(arena_count):
+        predator_factory.starting_position = (i % 10) / 10. + .05, (i // 10 % 10) / 10. + .05
+        predator_factory.target_diameter = .2 + (i % 5) * .1
+        predator_factory.scaling_velocity = .05 + (i % 3) * .05
+        predator_factory.profile = profile
+        predator_factory.profile_parameter = .5 if profile == CONSTANT_LV else 0.
+        predator = predator_factory.create()
+        predator.start_scaling(epoch)
+        predators.append(predator)
+    return predators
+
+
+def create_epochs(start=0):
+    return count(start, FRAME_MS)
+
+
+def create_frame(index, epoch):
+    return Frame(index, index / float(BENCHMARK_FPS), epoch, index / float(BENCHMARK_FPS), 0)
+
+
+def benchmark_model(arena_count, profile=LINEAR, number=BENCHMARK_NUMBER, repeat=BENCHMARK_REPEAT):
+    predator_array = PredatorArray(arena_count, TimelineCompiler(BENCHMARK_FPS))
+    for i, predator in enumerate(create_predators(arena_count, profile)):
+        predator_array.assign(i, predator)
+    epochs = create_epochs()
+    return measure(lambda: predator_array.evaluate(next(epochs)), number, repeat)
+
+
+def create_benchmark_window(arena_count, render_mode=VECTOR):
+    configuration = Configuration()
+    configuration.arena_count = arena_count
+    configuration.render_mode = render_mode
+    return create_headless_window(configuration)
+
+
+def benchmark_render(arena_count, number=BENCHMARK_NUMBER, repeat=BENCHMARK_REPEAT, render_mode=VECTOR):
+    window = create_benchmark_window(arena_count, render_mode)
+    start = window.get_epoch()
+    for tab, predator in zip(window.tabs, create_predators(arena_count, epoch=start)):
+        tab.target_diameter = predator.get_target_diameter()
+        tab.scaling_velocity = predator.scaling_vector.velocity
+        tab.starting_position = predator.get_starting_position()
+        tab.on_generate()
+        tab.on_start()
+    frames = map(create_frame, count(), create_epochs(start))
+    return measure(lambda: window.render(next(frames)), number, repeat)
+
+
+def benchmark_upload(arena_count, number=BENCHMARK_NUMBER, repeat=BENCHMARK_REPEAT):
+    window = create_benchmark_window(arena_count, FRAMEBUFFER)
+    frames = [screen.arena_canvas.framebuffer.frame for screen in (window.all_tab, window.secondary_window)]
+    return measure(lambda: [encode_ppm(frame) for frame in frames], number, repeat)
+
+
+def benchmark_startup(arena_count, number=BENCHMARK_NUMBER, repeat=BENCHMARK_REPEAT):
+    return measure(lambda: create_benchmark_window(arena_count), max(1, number // 20), repeat)
+
+
+def run_benchmarks(arena_counts=BENCHMARK_ARENAS, number=BENCHMARK_NUMBER, repeat=BENCHMARK_REPEAT):
+    results = OrderedDict()
+    for arena_count in arena_counts:
+        results["model.evaluate[%d]" % arena_count] = benchmark_model(arena_count, LINEAR, number, repeat)
+        results["model.evaluate_profiles[%d]" % arena_count] = benchmark_model(arena_count, CONSTANT_LV, number,
+                                                                               repeat)
+        results["render.frame[%d]" % arena_count] = benchmark_render(arena_count, number, repeat)
+        results["render.framebuffer[%d]" % arena_count] = benchmark_render(arena_count, number, repeat, FRAMEBUFFER)
+        results["render.upload[%d]" % arena_count] = benchmark_upload(arena_count, number, repeat)
+        results["startup.headless[%d]" % arena_count] = benchmark_startup(arena_count, number, repeat)
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def create_record(results, commit=None):
+    return {"commit": get_commit() if commit is None else commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "results": results}
+
+
+def save_record(file_path, record):
+    with open(file_path, "a") as results_file:
+        results_file.write(json.dumps(record) + "\n")
+
+
+def load_record(file_path, commit):
+    record = None
+    try:
+        with open(file_path) as results_file:
+            for line in results_file:
+                candidate = json.loads(line)
+                if candidate["commit"].startswith(commit) or commit.startswith(candidate["commit"]):
+                    record = candidate
+    except OSError:
+        return None
+    return record
+
+
+def compare_results(before, after, threshold=REGRESSION_THRESHOLD):
+    rows = list()
+    for name, duration in after.items():
+        if name in before:
+            ratio = duration / before[name] if before[name] > 0 else float("inf")
+            rows.append((name, before[name], duration, ratio, ratio > threshold))
+    return rows
+
+
+def format_results(results):
+    return "\n".join("%-32s %10.1f us" % (name, duration * 1e6) for name, duration in results.items())
+
+
+def format_comparison(rows):
+    lines = list()
+    for name, before, after, ratio, regressed in rows:
+        lines.append("%-32s %10.1f us %10.1f us %7.2fx%s" % (name, before * 1e6, after * 1e6, ratio,
+                                                              "  REGRESSION" if regressed else ""))
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option("--arenas", "arena_counts", default=BENCHMARK_ARENAS, type=click.IntRange(1), multiple=True,
+              help="Arena counts to benchmark, may be repeated.")
+@click.option("--number", default=BENCHMARK_NUMBER, type=click.IntRange(1), help="Calls per measurement.")
+@click.option("--repeat", default=BENCHMARK_REPEAT, type=click.IntRange(1), help="Measurements per benchmark.")
+@click.option("--results", "results_path", default=RESULTS_FILE, type=click.Path(dir_okay=False),
+              help="JSON lines file the results are appended to, one record per run and commit.")
+@click.option("--compare", default=None, help="Compare against the last stored run of this commit.")
+@click.option("--save/--no-save", default=True, help="Store the results of this run.")
+def main(arena_counts, number, repeat, results_path, compare, save):
+    before = None
+    if compare is not None:
+        before = load_record(results_path, compare)
+        if before is None:
+            raise click.ClickException("No stored benchmark results of %s" % compare)
+    record = create_record(run_benchmarks(arena_counts, number, repeat))
+    click.echo("Benchmarks of %s" % record["commit"])
+    click.echo(format_results(record["results"]))
+    if save:
+        save_record(results_path, record)
+    if before is not None:
+        rows = compare_results(before["results"], record["results"])
+        click.echo("\nCompared with %s" % before["commit"])
+        click.echo(format_comparison(rows))
+        if any(regressed for _, _, _, _, regressed in rows):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,35 @@
+import time
+
+
+class SystemClock(object):
+    def monotonic(self):
+        return time.monotonic()
+
+    def monotonic_ns(self):
+        return time.monotonic_ns()
+
+    def time(self):
+        return time.time()
+
+
+class VirtualClock(object):
+    def __init__(self, wall_origin=None, start=0.):
+        self.now = float(start)
+        self.wall_origin = time.time() if wall_origin is None else float(wall_origin)
+
+    def monotonic(self):
+        return self.now
+
+    def monotonic_ns(self):
+        return int(round(self.now * 1e9))
+
+    def time(self):
+        return self.wall_origin + self.now
+
+    def advance(self, seconds):
+        if seconds < 0:
+            raise ValueError("A virtual clock cannot go back in time")
+        self.now += seconds
+
+    def advance_to(self, timestamp):
+        self.advance(max(0., timestamp - self.now))
@@ -0,0 +1,41 @@
+from piscis.layout import ArenaLayout
+from piscis.scheduler import SKIP
+from piscis.telemetry import TELEMETRY_CAPACITY
+
+TARGET_FPS = 40
+ARENA_COUNT = 4
+MAX_ARENA_COUNT = 96
+
+VECTOR = "vector"
+RASTER = "raster"
+FRAMEBUFFER = "framebuffer"
+RENDER_MODES = (VECTOR, RASTER, FRAMEBUFFER)
+
+
+class Configuration(object):
+    def __init__(self):
+        self.target_fps = TARGET_FPS
+        self.frame_policy = SKIP
+        self.statistics_directory = None
+        self.arena_count = ARENA_COUNT
+        self.layout_rows = None
+        self.layout_columns = None
+        self.render_mode = VECTOR
+        self.event_log_path = None
+        self.telemetry_path = None
+        self.telemetry_frames = TELEMETRY_CAPACITY
+        self.control_port = None
+        self.control_udp_port = None
+        self.form_cache_directory = None
+        self.display_process = False
+        self.snapshot_path = None
+        self.resume = False
+        self.session_trace_path = None
+        self.tracker_udp_port = None
+        self.tracker_ring = None
+        self.follow = None
+        self.display_lag = 0.
+        self.profile_directory = None
+
+    def create_layout(self):
+        return ArenaLayout(self.arena_count, self.layout_rows, self.layout_columns)
@@ -0,0 +1,325 @@
+import asyncio
+import json
+from math import isfinite
+import queue
+import threading
+import time
+from piscis.profiler import ProfilerError, PROFILE_SECONDS
+from piscis.protocol import STIMULUS_DEFAULTS, ProtocolError, check_stimulus
+
+CONTROL_HOST = "127.0.0.1"
+CONTROL_POLL_MS = 4
+CONTROL_IDLE_POLL_MS = 250
+COMMAND_TIMEOUT = 5.
+MAX_REQUEST_SIZE = 65536
+MAX_PROFILE_SECONDS = 600
+
+
+class ControlError(ValueError):
+    pass
+
+
+def decode_request(data):
+    try:
+        request = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        raise ControlError("Requests must be JSON objects")
+    if not isinstance(request, dict):
+        raise ControlError("Requests must be JSON objects")
+    return request
+
+
+def encode_response(response):
+    return (json.dumps(response, sort_keys=True) + "\n").encode("utf-8")
+
+
+def get_error_response(error):
+    return {"ok": False, "error": str(error)}
+
+
+class ControlServer(object):
+    def __init__(self, host=CONTROL_HOST, port=0, udp_port=None, clock=time.monotonic, timeout=COMMAND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.udp_port = udp_port
+        self.clock = clock
+        self.timeout = timeout
+        self.commands = queue.Queue()
+        self.loop = None
+        self.server = None
+        self.datagram_transport = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.error = None
+        self.connections = 0
+        self.in_flight = 0
+
+    def start(self):
+        self.ready.clear()
+        self.thread = threading.Thread(target=self.run, name="control-server", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            self.thread.join()
+            self.thread = None
+            raise self.error
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.open())
+        except OSError as error:
+            self.error = error
+            self.ready.set()
+            self.loop.close()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.close())
+        self.loop.close()
+
+    async def open(self):
+        self.server = await asyncio.start_server(self.on_connection, self.host, self.port, limit=MAX_REQUEST_SIZE)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.udp_port is not None:
+            self.datagram_transport, _ = await self.loop.create_datagram_endpoint(
+                lambda: DatagramControlProtocol(self), local_addr=(self.host, self.udp_port))
+            self.udp_port = self.datagram_transport.get_extra_info("sockname")[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        if self.datagram_transport is not None:
+            self.datagram_transport.close()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+    def is_running(self):
+        return self.thread is not None
+
+    def is_busy(self):
+        return self.connections > 0 or self.in_flight > 0 or not self.commands.empty()
+
+    def get_poll_interval(self):
+        return CONTROL_POLL_MS if self.is_busy() else CONTROL_IDLE_POLL_MS
+
+    async def on_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(encode_response(get_error_response(ControlError("Request too long"))))
+                    break
+                if not line:
+                    break
+                writer.write(encode_response(await self.submit(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def submit(self, data):
+        received = self.clock()
+        try:
+            request = decode_request(data)
+        except ControlError as error:
+            return get_error_response(error)
+        future = self.loop.create_future()
+        self.in_flight += 1
+        self.commands.put((request, received, future))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            return get_error_response(ControlError("The application did not answer in time"))
+        finally:
+            self.in_flight -= 1
+
+    def process_pending(self, handler):
+        processed = 0
+        while True:
+            try:
+                request, received, future = self.commands.get_nowait()
+            except queue.Empty:
+                return processed
+            response = handler(request, received)
+            self.loop.call_soon_threadsafe(set_future_result, future, response)
+            processed += 1
+
+
+def set_future_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+class DatagramControlProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        self.server.loop.create_task(self.reply(data, address))
+
+    async def reply(self, data, address):
+        response = await self.server.submit(data)
+        self.transport.sendto(encode_response(response), address)
+
+
+class ControlDispatcher(object):
+    def __init__(self, application):
+        self.application = application
+        self.commands = {
+            "generate": self.generate,
+            "start": self.start,
+            "stop": self.stop,
+            "set-diameter": self.set_diameter,
+            "set-speed": self.set_speed,
+            "set-color": self.set_color,
+            "follow": self.follow,
+            "unfollow": self.unfollow,
+            "profile": self.profile,
+            "query": self.query,
+        }
+
+    def __call__(self, request, received=None):
+        try:
+            command = self.commands.get(request.get("command"))
+            if command is None:
+                raise ControlError("Unknown command: %s" % request.get("command"))
+            result = command(request, received)
+        except ControlError as error:
+            return get_error_response(error)
+        except Exception as error:
+            return get_error_response("Internal error while running %s: %r" % (request.get("command"), error))
+        response = {"ok": True}
+        if result is not None:
+            response.update(result)
+        return response
+
+    def get_arena(self, request):
+        arena = request.get("arena")
+        arena_count = len(self.application.tabs)
+        if isinstance(arena, bool) or not isinstance(arena, int) or not 1 <= arena <= arena_count:
+            raise ControlError("arena must be a number between 1 and %d" % arena_count)
+        return arena - 1
+
+    def get_tab(self, request):
+        return self.application.tabs[self.get_arena(request)]
+
+    def check_stimulus(self, request, stimulus):
+        try:
+            check_stimulus("arena %d" % request["arena"], stimulus)
+        except ProtocolError as error:
+            raise ControlError(str(error))
+        return stimulus
+
+    def get_value(self, request, tab, key):
+        return self.check_stimulus(request, get_tab_stimulus(tab, **{key: request.get("value")}))[key]
+
+    def generate(self, request, received):
+        tab = self.get_tab(request)
+        stimulus = dict(STIMULUS_DEFAULTS)
+        stimulus.update((key, request[key]) for key in STIMULUS_DEFAULTS if key in request)
+        tab.apply_stimulus(self.check_stimulus(request, stimulus))
+        return self.query(request, received)
+
+    def start(self, request, received):
+        index = self.get_arena(request)
+        tab = self.application.tabs[index]
+        if tab.predator is None:
+            raise ControlError("Arena %d has no stimulus, generate one first" % (index + 1))
+        tab.on_start()
+        if received is not None:
+            self.application.frame_statistics.expect_frame(index, received)
+        return self.query(request, received)
+
+    def stop(self, request, received):
+        if request.get("arena") is None:
+            self.application.stop_all_simulations()
+            return None
+        self.get_tab(request).on_stop()
+        return self.query(request, received)
+
+    def set_diameter(self, request, received):
+        tab = self.get_tab(request)
+        tab.set_target_diameter(self.get_value(request, tab, "diameter"))
+        return self.query(request, received)
+
+    def set_speed(self, request, received):
+        tab = self.get_tab(request)
+        tab.set_scaling_velocity(self.get_value(request, tab, "velocity"))
+        return self.query(request, received)
+
+    def set_color(self, request, received):
+        tab = self.get_tab(request)
+        tab.set_stimulus_color(self.get_value(request, tab, "color"))
+        return self.query(request, received)
+
+    def get_closed_loop(self):
+        closed_loop = self.application.closed_loop
+        if closed_loop is None:
+            raise ControlError("No tracker feed is connected")
+        return closed_loop
+
+    def follow(self, request, received):
+        closed_loop = self.get_closed_loop()
+        index = self.get_arena(request)
+        angle, distance = request.get("angle", 0), request.get("distance")
+        if not is_number(angle):
+            raise ControlError("angle must be a number of degrees")
+        if not is_number(distance) or distance < 0:
+            raise ControlError("distance must be a non-negative number")
+        closed_loop.follow(index, angle, distance)
+        self.application.render_loop.wake()
+        return self.query(request, received)
+
+    def unfollow(self, request, received):
+        self.get_closed_loop().unfollow(self.get_arena(request))
+        return self.query(request, received)
+
+    def profile(self, request, received):
+        seconds = request.get("seconds", PROFILE_SECONDS)
+        if not is_number(seconds) or not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise ControlError("seconds must be a number between 0 and %d" % MAX_PROFILE_SECONDS)
+        try:
+            return self.application.start_profiling(seconds)
+        except ProfilerError as error:
+            raise ControlError(str(error))
+
+    def query(self, request, received):
+        index = self.get_arena(request)
+        tab = self.application.tabs[index]
+        phase = self.application.interval_engine.get_phase(index)
+        closed_loop = self.application.closed_loop
+        return {"arena": index + 1,
+                "generated": tab.predator is not None,
+                "running": self.application.is_running(index),
+                "phase": None if phase is None else phase.name,
+                "diameter": tab.target_diameter,
+                "velocity": tab.scaling_velocity,
+                "color": tab.color,
+                "profile": tab.profile,
+                "profile_parameter": tab.profile_parameter,
+                "following": closed_loop is not None and closed_loop.is_following(index)}
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and isfinite(value)
+
+
+def get_tab_stimulus(tab, **values):
+    stimulus = dict(STIMULUS_DEFAULTS, diameter=tab.target_diameter, velocity=tab.scaling_velocity, color=tab.color,
+                    profile=tab.profile, profile_parameter=tab.profile_parameter)
+    stimulus.update(values)
+    return stimulus
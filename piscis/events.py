@@ -0,0 +1,111 @@
+import threading
+import time
+import numpy as np
+
+START = "start"
+TARGET_REACHED = "target-reached"
+PAUSE = "pause"
+STOP = "stop"
+EVENT_KINDS = (START, TARGET_REACHED, PAUSE, STOP)
+
+EVENT_CAPACITY = 8192
+FLUSH_INTERVAL = .25
+EVENT_LOG_HEADER = "timestamp_ns,arena,event,epoch_ms,value\n"
+
+
+class EventRing(object):
+    def __init__(self, capacity=EVENT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("Event ring capacity must be positive")
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.arenas = np.zeros(capacity, dtype=np.int32)
+        self.kinds = np.zeros(capacity, dtype=np.int8)
+        self.epochs = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.written = 0
+        self.read = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.written - self.read
+
+    def push(self, timestamp, arena, kind, epoch, value):
+        if self.written - self.read >= self.capacity:
+            self.dropped += 1
+            return False
+        slot = self.written % self.capacity
+        self.timestamps[slot] = timestamp
+        self.arenas[slot] = arena
+        self.kinds[slot] = kind
+        self.epochs[slot] = epoch
+        self.values[slot] = value
+        self.written += 1
+        return True
+
+    def pop_all(self):
+        begin, end = self.read, self.written
+        slots = np.arange(begin, end) % self.capacity
+        events = self.timestamps[slots], self.arenas[slots], self.kinds[slots], self.epochs[slots], self.values[slots]
+        self.read = end
+        return events
+
+
+class EventLog(object):
+    def __init__(self, capacity=EVENT_CAPACITY, clock=time.monotonic_ns):
+        self.ring = EventRing(capacity)
+        self.clock = clock
+
+    def record(self, kind, arena, epoch=0, value=0.):
+        return self.ring.push(self.clock(), arena, EVENT_KINDS.index(kind), epoch, value)
+
+    def drain(self):
+        timestamps, arenas, kinds, epochs, values = self.ring.pop_all()
+        return [(int(timestamp), int(arena), EVENT_KINDS[kind], int(epoch), float(value))
+                for timestamp, arena, kind, epoch, value in zip(timestamps, arenas, kinds, epochs, values)]
+
+    def get_dropped(self):
+        return self.ring.dropped
+
+
+class EventWriter(object):
+    def __init__(self, event_log, file_path, flush_interval=FLUSH_INTERVAL):
+        self.event_log = event_log
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with open(self.file_path, "a") as log_file:
+            if log_file.tell() == 0:
+                log_file.write(EVENT_LOG_HEADER)
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="event-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def is_running(self):
+        return self.thread is not None
+
+    def run(self):
+        while not self.stopping.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        events = self.event_log.drain()
+        if events:
+            with open(self.file_path, "a") as log_file:
+                log_file.writelines(format_event(*event) for event in events)
+        return len(events)
+
+
+def format_event(timestamp, arena, kind, epoch, value):
+    return "%d,%d,%s,%d,%g\n" % (timestamp, arena + 1, kind, epoch, value)
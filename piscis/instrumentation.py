@@ -0,0 +1,142 @@
+from contextlib import contextmanager
+import csv
+import time
+import numpy as np
+
+HISTOGRAM_BIN_WIDTH = 0.001
+HISTOGRAM_BIN_COUNT = 100
+LATE_FRACTION = 0.25
+
+
+class Histogram(object):
+    def __init__(self, bin_width=HISTOGRAM_BIN_WIDTH, bin_count=HISTOGRAM_BIN_COUNT):
+        self.bin_width = bin_width
+        self.counts = np.zeros(bin_count + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, value):
+        self.counts[min(int(value / self.bin_width), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def get_mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def get_percentile(self, percentile):
+        if not self.count:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), self.count * percentile / 100.))
+        return min((index + 1) * self.bin_width, self.maximum)
+
+    def get_bins(self):
+        for i, count in enumerate(self.counts):
+            upper = (i + 1) * self.bin_width if i < len(self.counts) - 1 else float("inf")
+            yield i * self.bin_width, upper, int(count)
+
+
+class FrameStatistics(object):
+    def __init__(self, target_fps, arena_count):
+        self.period = 1.0 / float(target_fps)
+        self.render_durations = Histogram()
+        self.frame_intervals = Histogram()
+        self.draw_durations = [Histogram() for _ in range(arena_count)]
+        self.command_latencies = Histogram()
+        self.input_latencies = Histogram()
+        self.pending_commands = dict()
+
+        self.frames = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+        self.last_timestamp = None
+
+    def record_frame(self, frame, duration):
+        self.frames += 1
+        self.dropped_frames += frame.dropped
+        if frame.get_lateness() > self.period * LATE_FRACTION:
+            self.late_frames += 1
+        if self.last_timestamp is not None and frame.index > 1:
+            self.frame_intervals.add(frame.timestamp - self.last_timestamp)
+        self.last_timestamp = frame.timestamp
+        self.render_durations.add(duration)
+
+    def record_draw(self, index, duration):
+        self.draw_durations[index].add(duration)
+
+    def expect_frame(self, index, received):
+        self.pending_commands[index] = received
+
+    def record_first_frame(self, index, timestamp):
+        received = self.pending_commands.pop(index, None)
+        if received is not None:
+            self.command_latencies.add(timestamp - received)
+
+    def record_input_latencies(self, latencies):
+        for latency in latencies:
+            self.input_latencies.add(latency)
+
+    def get_histograms(self):
+        yield "render_duration", self.render_durations
+        yield "frame_interval", self.frame_intervals
+        yield "command_latency", self.command_latencies
+        yield "input_latency", self.input_latencies
+        for i, histogram in enumerate(self.draw_durations):
+            yield "draw_duration_arena_%d" % (i + 1), histogram
+
+    def get_summary(self):
+        lines = ["Frames: %d" % self.frames,
+                 "Late frames: %d" % self.late_frames,
+                 "Dropped frames: %d" % self.dropped_frames]
+        for name, histogram in self.get_histograms():
+            lines.append("%s: mean %.2f ms, p99 %.2f ms, max %.2f ms" % (
+                name, histogram.get_mean() * 1000, histogram.get_percentile(99) * 1000, histogram.maximum * 1000))
+        return "\n".join(lines)
+
+    def export_csv(self, file_path):
+        with open(file_path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["metric", "lower_ms", "upper_ms", "count"])
+            writer.writerow(["frames", "", "", self.frames])
+            writer.writerow(["late_frames", "", "", self.late_frames])
+            writer.writerow(["dropped_frames", "", "", self.dropped_frames])
+            for name, histogram in self.get_histograms():
+                for lower, upper, count in histogram.get_bins():
+                    writer.writerow([name, "%g" % (lower * 1000), "%g" % (upper * 1000), count])
+
+
+class StartupTimer(object):
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.end = None
+        self.phases = list()
+
+    @contextmanager
+    def phase(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases.append((name, self.clock() - start))
+
+    def finish(self):
+        if self.end is None:
+            self.end = self.clock()
+        return self.end - self.start
+
+    def get_report(self):
+        total = self.finish()
+        lines = ["Startup: %.1f ms" % (total * 1000)]
+        accounted = 0.
+        for name, duration in self.phases:
+            accounted += duration
+            lines.append("  %-24s %8.1f ms %5.1f %%" % (name, duration * 1000, get_share(duration, total)))
+        other = max(total - accounted, 0.)
+        lines.append("  %-24s %8.1f ms %5.1f %%" % ("other", other * 1000, get_share(other, total)))
+        return "\n".join(lines)
+
+
+def get_share(duration, total):
+    return duration / total * 100 if total > 0 else 0.
@@ -0,0 +1,87 @@
+from math import ceil
+from sched import scheduler
+import time
+
+RUN = "run"
+PAUSE = "pause"
+
+
+class Phase(object):
+    def __init__(self, name, start, duration, on_tick, on_end):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.end = start + duration
+        self.on_tick = on_tick
+        self.on_end = on_end
+        self.event = None
+
+    def get_remaining(self, timestamp):
+        return max(0., self.end - timestamp)
+
+
+class IntervalEngine(object):
+    def __init__(self, clock=time.monotonic, master=None):
+        self.clock = clock
+        self.scheduler = scheduler(clock, lambda delay: None)
+        self.phases = dict()
+        self.master = master
+        self.after_id = None
+
+    def start_phase(self, key, name, duration, on_tick, on_end, start=None):
+        self.cancel(key)
+        if start is None:
+            start = self.clock()
+        phase = Phase(name, start, duration, on_tick, on_end)
+        self.phases[key] = phase
+        self.schedule_tick(key, phase, 1)
+        self.arm()
+        return phase
+
+    def schedule_tick(self, key, phase, tick):
+        if tick < phase.duration:
+            phase.event = self.scheduler.enterabs(phase.start + tick, 0, self.tick, (key, phase, tick))
+        else:
+            phase.event = self.scheduler.enterabs(phase.end, 0, self.end, (key, phase))
+
+    def tick(self, key, phase, tick):
+        self.schedule_tick(key, phase, tick + 1)
+        phase.on_tick(phase.duration - tick, phase.start + tick)
+
+    def end(self, key, phase):
+        phase.event = None
+        del self.phases[key]
+        phase.on_end(phase.end)
+
+    def cancel(self, key):
+        phase = self.phases.pop(key, None)
+        if phase is not None and phase.event is not None:
+            self.scheduler.cancel(phase.event)
+            phase.event = None
+        self.arm()
+
+    def get_phase(self, key):
+        return self.phases.get(key)
+
+    def run_pending(self):
+        return self.scheduler.run(blocking=False)
+
+    def get_delay(self):
+        if self.scheduler.empty():
+            return None
+        return max(0., self.scheduler.queue[0].time - self.clock())
+
+    def arm(self):
+        if self.master is None:
+            return
+        if self.after_id is not None:
+            self.master.after_cancel(self.after_id)
+            self.after_id = None
+        delay = self.get_delay()
+        if delay is not None:
+            self.after_id = self.master.after(int(ceil(delay * 1000)), self.on_timer)
+
+    def on_timer(self):
+        self.after_id = None
+        self.run_pending()
+        self.arm()
@@ -0,0 +1,49 @@
+from math import ceil, sqrt
+import numpy as np
+
+CELL_SPACING = 8
+
+
+class LayoutError(ValueError):
+    pass
+
+
+class ArenaLayout(object):
+    def __init__(self, arena_count, rows=None, columns=None, spacing=CELL_SPACING):
+        if arena_count < 1:
+            raise LayoutError("There must be at least one arena")
+        if columns is None:
+            columns = int(ceil(sqrt(arena_count))) if rows is None else int(ceil(arena_count / float(rows)))
+        if rows is None:
+            rows = int(ceil(arena_count / float(columns)))
+        if rows * columns < arena_count:
+            raise LayoutError("A %dx%d layout has no room for %d arenas" % (rows, columns, arena_count))
+        self.arena_count = arena_count
+        self.rows = rows
+        self.columns = columns
+        self.spacing = spacing
+
+    def get_position(self, index):
+        return divmod(index, self.columns)
+
+    def get_cells(self, width, height):
+        cell_width = (width - self.spacing * (self.columns + 1)) / float(self.columns)
+        cell_height = (height - self.spacing * (self.rows + 1)) / float(self.rows)
+        rows, columns = np.divmod(np.arange(self.arena_count), self.columns)
+
+        cells = np.empty((self.arena_count, 4))
+        cells[:, 0] = self.spacing + columns * (cell_width + self.spacing)
+        cells[:, 1] = self.spacing + rows * (cell_height + self.spacing)
+        cells[:, 2] = max(cell_width, 0.)
+        cells[:, 3] = max(cell_height, 0.)
+        return cells
+
+
+def parse_layout(text):
+    try:
+        rows, columns = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise LayoutError("A layout looks like ROWSxCOLUMNS, e.g. 8x12")
+    if rows < 1 or columns < 1:
+        raise LayoutError("A layout needs at least one row and one column")
+    return rows, columns
@@ -1,8 +1,14 @@
 from math import pi, cos, sin
-import time
+import numpy as np
+from piscis.events import TARGET_REACHED
+from piscis.trajectory import TrajectoryCompiler
 
 DEGREES_45 = pi/4.0
 
+LINEAR = "linear"
+CONSTANT_LV = "constant-lv"
+EXPONENTIAL = "exponential"
+
 
 class TimeTracker(object):
     def __init__(self):
@@ -17,14 +23,17 @@ class TimeTracker(object):
 
 class MovementVector(TimeTracker):
 
-    def __init__(self, starting_position, velocity):
+    def __init__(self, starting_position, velocity, trajectory=None):
         TimeTracker.__init__(self)
         self.starting_position = starting_position
         self.angle = float(velocity[0])
         self.magnitude = float(velocity[1])
+        self.trajectory = trajectory
 
     def get_current_position(self, epoch):
         delta = self.get_delta(float(epoch))
+        if self.trajectory is not None:
+            return tuple(self.trajectory.get_positions(delta).tolist())
         change_x = self.get_change_for_axis(cos, delta)
         change_y = self.get_change_for_axis(sin, delta)
         start_x, start_y = self.starting_position
@@ -34,16 +43,31 @@ class MovementVector(TimeTracker):
         delta_x = trigonometric_function(self.angle) * self.magnitude
         return delta_x * delta
 
+    def get_positions(self, elapsed):
+        elapsed = np.asarray(elapsed, dtype=float)
+        if self.trajectory is not None:
+            return self.trajectory.get_positions(elapsed)
+        positions = np.empty(elapsed.shape + (2,))
+        positions[..., 0] = self.starting_position[0] + self.get_change_for_axis(cos, elapsed)
+        positions[..., 1] = self.starting_position[1] + self.get_change_for_axis(sin, elapsed)
+        return positions
+
 
 class ScalingVector(TimeTracker):
-    def __init__(self, target_diameter, velocity):
+    def __init__(self, target_diameter, velocity, profile=LINEAR, profile_parameter=0.):
         TimeTracker.__init__(self)
         self.target_diameter = target_diameter
         self.old_diameter = 0
         self.velocity = velocity
+        self.profile = profile
+        self.profile_parameter = profile_parameter
+        check_profile(profile, profile_parameter)
 
     def get_current_diameter(self, epoch):
-        return min(self.target_diameter, self.get_delta(float(epoch)) * self.velocity)
+        if self.profile == LINEAR:
+            return min(self.target_diameter, self.get_delta(float(epoch)) * self.velocity)
+        return float(get_profile_diameter(self.profile, self.get_delta(float(epoch)), self.target_diameter,
+                                          self.velocity, self.profile_parameter))
 
     def is_target_diameter_reached(self, epoch):
         return self.get_current_diameter(epoch) >= self.target_diameter
@@ -56,10 +80,17 @@ class PredatorFactory(object):
         self.scaling_velocity = 0
         self.target_diameter = 0
         self.color = "#FFFFFF"
+        self.profile = LINEAR
+        self.profile_parameter = 0.
+        self.path = None
+        self.trajectory_compiler = TrajectoryCompiler()
 
     def create(self):
-        mv = MovementVector(self.starting_position, self.movement_velocity)
-        sv = ScalingVector(self.target_diameter, self.scaling_velocity)
+        trajectory = None
+        if self.path is not None:
+            trajectory = self.trajectory_compiler.compile(self.path, self.starting_position)
+        mv = MovementVector(self.starting_position, self.movement_velocity, trajectory)
+        sv = ScalingVector(self.target_diameter, self.scaling_velocity, self.profile, self.profile_parameter)
         return Predator(self.color, mv, sv)
 
 
@@ -87,7 +118,7 @@ class Predator(object):
 
     def get_current_diameter(self, epoch):
         if self.scaling_vector.is_target_diameter_reached(epoch):
-            self.scaling_vector.start(int(time.time()*1000))
+            self.scaling_vector.start(epoch)
         return self.scaling_vector.get_current_diameter(epoch)
 
     def get_starting_position(self):
@@ -106,4 +137,210 @@ class Predator(object):
         self.scaling_vector.old_diameter = value
 
     def get_old_diameter(self):
-        return self.scaling_vector.old_diameter
\ No newline at end of file
+        return self.scaling_vector.old_diameter
+
+    def set_profile(self, profile, profile_parameter):
+        check_profile(profile, profile_parameter)
+        self.scaling_vector.profile = profile
+        self.scaling_vector.profile_parameter = profile_parameter
+
+
+def check_profile(profile, profile_parameter):
+    if profile not in PROFILES:
+        raise ValueError("Unknown looming profile: %s" % profile)
+    if profile != LINEAR and profile_parameter <= 0:
+        raise ValueError("The %s profile needs a positive parameter" % profile)
+
+
+def get_loom_duration(target_diameter, velocity):
+    if velocity <= 0:
+        return float("inf")
+    return target_diameter / float(velocity)
+
+
+def linear_diameter(elapsed, target_diameter, velocity, parameter):
+    return np.minimum(target_diameter, elapsed * velocity)
+
+
+def constant_lv_diameter(elapsed, target_diameter, velocity, l_over_v):
+    time_to_collision = np.maximum(get_loom_duration(target_diameter, velocity) - elapsed, 0.)
+    return target_diameter * l_over_v / (l_over_v + time_to_collision)
+
+
+def exponential_diameter(elapsed, target_diameter, velocity, rate):
+    duration = get_loom_duration(target_diameter, velocity)
+    return target_diameter * np.exp(rate * (np.minimum(elapsed, duration) - duration))
+
+
+PROFILES = {
+    LINEAR: linear_diameter,
+    CONSTANT_LV: constant_lv_diameter,
+    EXPONENTIAL: exponential_diameter,
+}
+
+
+def get_profile_diameter(profile, elapsed, target_diameter, velocity, profile_parameter):
+    return PROFILES[profile](np.asarray(elapsed, dtype=float), target_diameter, velocity, profile_parameter)
+
+
+class PredatorArray(object):
+    def __init__(self, capacity, timeline_compiler=None, event_log=None):
+        self.predators = [None] * capacity
+        self.timeline_compiler = timeline_compiler
+        self.event_log = event_log
+        self.timelines = [None] * capacity
+        self.profile_indices = list()
+        self.trajectories = [None] * capacity
+        self.trajectory_indices = list()
+        self.active = np.zeros(capacity, dtype=bool)
+
+        self.scaling_epochs = np.zeros(capacity)
+        self.scaling_velocities = np.zeros(capacity)
+        self.target_diameters = np.zeros(capacity)
+
+        self.movement_epochs = np.zeros(capacity)
+        self.starting_positions = np.zeros((capacity, 2))
+        self.movement_velocities = np.zeros((capacity, 2))
+
+        self.diameters = np.zeros(capacity)
+        self.positions = np.zeros((capacity, 2))
+        self.following = np.zeros(capacity, dtype=bool)
+        self.tracked = np.zeros(capacity, dtype=bool)
+        self.tracked_positions = np.zeros((capacity, 2))
+
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.changed = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return len(self.predators)
+
+    def assign(self, index, predator):
+        self.predators[index] = predator
+        self.sync(index)
+
+    def release(self, index):
+        self.predators[index] = None
+        self.active[index] = False
+        self.diameters[index] = 0
+        self.dirty[index] = True
+        self.timelines[index] = None
+        self.trajectories[index] = None
+        self.tracked[index] = False
+        self.update_profile_indices()
+
+    def sync(self, index):
+        predator = self.predators[index]
+        if predator is None:
+            return
+        mv, sv = predator.movement_vector, predator.scaling_vector
+        self.active[index] = True
+        self.dirty[index] = True
+        self.scaling_epochs[index] = sv.starting_epoch
+        self.scaling_velocities[index] = sv.velocity
+        self.target_diameters[index] = sv.target_diameter
+        self.movement_epochs[index] = mv.starting_epoch
+        self.starting_positions[index] = mv.starting_position
+        self.movement_velocities[index] = cos(mv.angle) * mv.magnitude, sin(mv.angle) * mv.magnitude
+        self.timelines[index] = self.compile_timeline(predator)
+        self.trajectories[index] = mv.trajectory
+        self.update_profile_indices()
+
+    def compile_timeline(self, predator):
+        if self.timeline_compiler is None or predator.scaling_vector.profile == LINEAR:
+            return None
+        return self.timeline_compiler.compile(predator)
+
+    def update_profile_indices(self):
+        self.profile_indices = [i for i, predator in enumerate(self.predators)
+                                if predator is not None and predator.scaling_vector.profile != LINEAR]
+        self.trajectory_indices = [i for i, trajectory in enumerate(self.trajectories) if trajectory is not None]
+
+    def mark_dirty(self, index):
+        self.dirty[index] = True
+
+    def mark_all_dirty(self):
+        self.dirty[:] = True
+
+    def sync_all(self):
+        for i in range(len(self.predators)):
+            self.sync(i)
+
+    def evaluate(self, epoch):
+        epoch = float(epoch)
+        diameters = self.get_current_diameters(epoch)
+        reached = self.active & (self.target_diameters > 0) & (diameters >= self.target_diameters)
+        if reached.any():
+            self.reset_scaling(np.flatnonzero(reached), epoch)
+            diameters = self.get_current_diameters(epoch)
+
+        diameters = np.where(self.active, diameters, 0.)
+        positions = self.get_current_positions(epoch)
+        self.changed[:] = self.dirty | (diameters != self.diameters) | (positions != self.positions).any(axis=1)
+        self.dirty[:] = False
+
+        self.diameters[:] = diameters
+        self.positions[:] = positions
+        return self.diameters, self.positions
+
+    def get_changed_indices(self):
+        return np.flatnonzero(self.changed)
+
+    def is_animating(self):
+        scaling = (self.scaling_velocities > 0) & (self.target_diameters > 0)
+        moving = ((self.movement_velocities != 0).any(axis=1) | self.following) & (self.target_diameters > 0)
+        return bool((self.active & (scaling | moving)).any())
+
+    def get_current_diameters(self, epoch):
+        delta = epoch / 1000. - self.scaling_epochs / 1000.
+        diameters = np.minimum(self.target_diameters, delta * self.scaling_velocities)
+        for i in self.profile_indices:
+            diameters[i] = self.get_profile_diameter(i, delta[i])
+        return diameters
+
+    def get_profile_diameter(self, index, delta):
+        if self.timelines[index] is not None:
+            return self.timelines[index].get_diameter(delta)
+        sv = self.predators[index].scaling_vector
+        return get_profile_diameter(sv.profile, delta, self.target_diameters[index], self.scaling_velocities[index],
+                                    sv.profile_parameter)
+
+    def get_current_positions(self, epoch):
+        delta = epoch / 1000. - self.movement_epochs / 1000.
+        positions = self.starting_positions + self.movement_velocities * delta[:, np.newaxis]
+        self.following[:] = False
+        for i in self.trajectory_indices:
+            positions[i] = self.trajectories[i].get_positions(delta[i])
+            self.following[i] = self.trajectories[i].is_moving(delta[i])
+        positions[self.tracked] = self.tracked_positions[self.tracked]
+        self.following |= self.tracked
+        return positions
+
+    def track(self, tracked, positions):
+        self.tracked[:] = tracked
+        self.tracked_positions[tracked] = positions[tracked]
+
+    def reset_scaling(self, indices, epoch):
+        self.scaling_epochs[indices] = epoch
+        for i in indices:
+            self.predators[i].reset_scaling(epoch)
+            if self.event_log is not None:
+                self.event_log.record(TARGET_REACHED, i, int(epoch), self.target_diameters[i])
+
+    def bounding_boxes(self, width, height):
+        return calculate_bounding_boxes(width, height, self.positions, self.diameters)
+
+
+def calculate_bounding_boxes(width, height, positions, diameters):
+    width, height = np.asarray(width, dtype=float), np.asarray(height, dtype=float)
+    begin_x, begin_y = width * positions[:, 0], height * positions[:, 1]
+    end_x, end_y = begin_x + diameters * width, begin_y + diameters * width
+
+    pred_width, pred_height = end_x - begin_x, end_y - begin_y
+
+    begin_x = begin_x - pred_width // 2
+    begin_y = begin_y - pred_height // 2
+
+    end_x = end_x - pred_width // 2
+    end_y = end_y - pred_height // 2
+
+    return np.stack((begin_x, begin_y, end_x, end_y), axis=-1)
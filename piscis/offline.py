@@ -0,0 +1,108 @@
+from multiprocessing import Pool
+import numpy as np
+from piscis.model import calculate_bounding_boxes
+from piscis.raster import BACKGROUND_COLOR, create_frame, draw_disc
+from piscis.timeline import compile_timeline
+
+ARENA_WIDTH = 700
+ARENA_HEIGHT = 450
+CHUNK_FRAMES = 200
+
+
+class Schedule(object):
+    def __init__(self, run_seconds=0, pause_seconds=0):
+        self.run_seconds = run_seconds
+        self.pause_seconds = pause_seconds
+
+    def get_run_frame(self, frame_index, fps):
+        run_frames = int(round(self.run_seconds * fps))
+        if run_frames <= 0:
+            return frame_index
+        cycle_frame = frame_index % (run_frames + int(round(self.pause_seconds * fps)))
+        return cycle_frame if cycle_frame < run_frames else None
+
+
+class OfflineStimulus(object):
+    def __init__(self, predator, schedule=None, background=BACKGROUND_COLOR):
+        self.predator = predator
+        self.schedule = schedule if schedule is not None else Schedule()
+        self.background = background
+        self.timeline = None
+
+    def compile(self, fps):
+        self.timeline = compile_timeline(self.predator, fps)
+
+    def get_state(self, frame_index, fps):
+        run_frame = self.schedule.get_run_frame(frame_index, fps)
+        if run_frame is None:
+            return None
+        return self.timeline.frames[run_frame % len(self.timeline)]
+
+
+class OfflineRenderer(object):
+    def __init__(self, stimuli, fps, width=ARENA_WIDTH, height=ARENA_HEIGHT, processes=None,
+                 chunk_frames=CHUNK_FRAMES):
+        self.stimuli = stimuli
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.processes = processes
+        self.chunk_frames = chunk_frames
+        for stimulus in self.stimuli:
+            stimulus.compile(fps)
+
+    def get_shape(self, frame_count):
+        return frame_count, len(self.stimuli), self.height, self.width, 3
+
+    def render_frame(self, frame_index):
+        frames = np.empty(self.get_shape(1)[1:], dtype=np.uint8)
+        for i, stimulus in enumerate(self.stimuli):
+            frames[i] = create_frame(self.width, self.height, stimulus.background)
+            state = stimulus.get_state(frame_index, self.fps)
+            if state is not None:
+                box = calculate_bounding_boxes(self.width, self.height, state[np.newaxis, :2], state[np.newaxis, 2])
+                draw_disc(frames[i], box[0], stimulus.predator.color)
+        return frames
+
+    def render_range(self, start, stop):
+        frames = np.empty(self.get_shape(stop - start), dtype=np.uint8)
+        for i, frame_index in enumerate(range(start, stop)):
+            frames[i] = self.render_frame(frame_index)
+        return frames
+
+    def get_ranges(self, frame_count):
+        return [(start, min(start + self.chunk_frames, frame_count))
+                for start in range(0, frame_count, self.chunk_frames)]
+
+    def render(self, frame_count):
+        tasks = [(self, start, stop) for start, stop in self.get_ranges(frame_count)]
+        if self.processes == 1:
+            for task in tasks:
+                yield task[1], render_chunk(task)
+            return
+        with Pool(self.processes) as pool:
+            for (_, start, _), frames in zip(tasks, pool.imap(render_chunk, tasks)):
+                yield start, frames
+
+    def save_npy(self, file_path, frame_count):
+        output = np.lib.format.open_memmap(file_path, mode="w+", dtype=np.uint8, shape=self.get_shape(frame_count))
+        for start, frames in self.render(frame_count):
+            output[start:start + len(frames)] = frames
+        output.flush()
+        del output
+
+    def save_npz(self, file_path, frame_count):
+        output = np.empty(self.get_shape(frame_count), dtype=np.uint8)
+        for start, frames in self.render(frame_count):
+            output[start:start + len(frames)] = frames
+        np.savez_compressed(file_path, frames=output, fps=self.fps)
+
+    def save_raw_video(self, file_path, frame_count):
+        with open(file_path, "wb") as video:
+            for _, frames in self.render(frame_count):
+                video.write(frames.tobytes())
+
+
+def render_chunk(task):
+    renderer, start, stop = task
+    return renderer.render_range(start, stop)
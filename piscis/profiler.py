@@ -0,0 +1,166 @@
+from collections import Counter
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+SAMPLE_INTERVAL = .005
+PROFILE_SECONDS = 10.
+TOP_FUNCTIONS = 40
+
+
+class ProfilerError(ValueError):
+    pass
+
+
+def get_function_key(function):
+    code = function.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def match_functions(*functions):
+    keys = set(get_function_key(function) for function in functions)
+    return lambda key: key in keys
+
+
+def match_class(cls):
+    return match_functions(*(value for value in vars(cls).values() if hasattr(value, "__code__")))
+
+
+def match_module(module):
+    return lambda key: key[0] == module.__file__
+
+
+def match_name(file_path, name):
+    return lambda key: key[0] == file_path and key[2] == name
+
+
+def get_frame_label(frame):
+    code = frame.f_code
+    return "%s:%s" % (os.path.basename(code.co_filename), getattr(code, "co_qualname", code.co_name))
+
+
+def get_stack(frame):
+    labels = list()
+    while frame is not None:
+        labels.append(get_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler(object):
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name="profiler-sampler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            self.stacks[get_stack(frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+
+class RuntimeProfiler(object):
+    def __init__(self, hot_paths=(), interval=SAMPLE_INTERVAL, clock=time.perf_counter):
+        self.hot_paths = list(hot_paths)
+        self.interval = interval
+        self.clock = clock
+        self.profile = None
+        self.sampler = None
+        self.start_time = None
+
+    def is_running(self):
+        return self.profile is not None
+
+    def start(self):
+        if self.is_running():
+            raise ProfilerError("A profile is already being recorded")
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), self.interval)
+        self.start_time = self.clock()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        if not self.is_running():
+            raise ProfilerError("No profile is being recorded")
+        self.profile.disable()
+        self.sampler.stop()
+        result = ProfileResult(self.profile, self.sampler, self.clock() - self.start_time, self.hot_paths)
+        self.profile = None
+        self.sampler = None
+        return result
+
+
+class ProfileResult(object):
+    def __init__(self, profile, sampler, duration, hot_paths=()):
+        self.profile = profile
+        self.stats = pstats.Stats(profile)
+        self.stacks = sampler.stacks
+        self.samples = sampler.samples
+        self.duration = duration
+        self.hot_paths = hot_paths
+
+    def get_hot_path(self, match):
+        calls, seconds = 0, 0.
+        for key, (_, call_count, _, cumulative, callers) in self.stats.stats.items():
+            if not match(key):
+                continue
+            for caller, (_, caller_calls, _, caller_cumulative) in callers.items():
+                if match(caller):
+                    call_count -= caller_calls
+                    cumulative -= caller_cumulative
+            calls += call_count
+            seconds += max(cumulative, 0.)
+        return calls, seconds
+
+    def get_hot_paths(self):
+        return [(name,) + self.get_hot_path(match) for name, match in self.hot_paths]
+
+    def get_report(self, limit=TOP_FUNCTIONS):
+        lines = ["Profile of %.2f s, %d stack samples" % (self.duration, self.samples),
+                 "%-20s %8s %12s %7s" % ("hot path", "calls", "total ms", "share")]
+        for name, calls, seconds in self.get_hot_paths():
+            share = seconds / self.duration * 100 if self.duration > 0 else 0.
+            lines.append("%-20s %8d %12.1f %6.1f %%" % (name, calls, seconds * 1000, share))
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return "\n".join(lines) + "\n" + stream.getvalue()
+
+    def write_stacks(self, file_path):
+        with open(file_path, "w") as stack_file:
+            for stack, count in sorted(self.stacks.items()):
+                stack_file.write("%s %d\n" % (stack, count))
+
+    def write(self, prefix):
+        paths = get_profile_paths(prefix)
+        with open(paths["report"], "w") as report_file:
+            report_file.write(self.get_report())
+        self.write_stacks(paths["stacks"])
+        self.stats.dump_stats(paths["profile"])
+        return paths
+
+
+def get_profile_paths(prefix):
+    return {"report": prefix + ".txt", "stacks": prefix + ".folded", "profile": prefix + ".prof"}
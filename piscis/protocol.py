@@ -0,0 +1,243 @@
+from itertools import islice
+import json
+from os import path
+import random
+from piscis.model import PredatorFactory, LINEAR, check_profile
+from piscis.raster import parse_color
+from piscis.trajectory import compile_trajectory, TrajectoryError
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+STIMULUS_DEFAULTS = {
+    "diameter": 0.5,
+    "velocity": 0.1,
+    "color": "#000000",
+    "profile": LINEAR,
+    "profile_parameter": 0.,
+    "position": (.5, .5),
+    "path": None,
+}
+SWEEP_KEYS = ("diameter", "velocity", "color", "path")
+ARENA_KEYS = ("arena", "stimulus", "sweep", "run_seconds", "pause_seconds", "repetitions", "randomize")
+PROTOCOL_KEYS = ("seed", "randomize", "arenas")
+SEED_LIMIT = 2 ** 31
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+class Trial(object):
+    def __init__(self, arena, number, repetition, stimulus, run_seconds, pause_seconds):
+        self.arena = arena
+        self.number = number
+        self.repetition = repetition
+        self.stimulus = stimulus
+        self.run_seconds = run_seconds
+        self.pause_seconds = pause_seconds
+
+    def create_predator(self):
+        predator_factory = PredatorFactory()
+        predator_factory.starting_position = tuple(self.stimulus["position"])
+        predator_factory.target_diameter = self.stimulus["diameter"]
+        predator_factory.scaling_velocity = self.stimulus["velocity"]
+        predator_factory.color = self.stimulus["color"]
+        predator_factory.profile = self.stimulus["profile"]
+        predator_factory.profile_parameter = self.stimulus["profile_parameter"]
+        predator_factory.path = self.stimulus["path"]
+        return predator_factory.create()
+
+
+class ArenaProtocol(object):
+    def __init__(self, arena, stimulus, sweep, run_seconds, pause_seconds, repetitions, randomize):
+        self.arena = arena
+        self.stimulus = stimulus
+        self.sweep = sweep
+        self.run_seconds = run_seconds
+        self.pause_seconds = pause_seconds
+        self.repetitions = repetitions
+        self.randomize = randomize
+
+    def get_combination_count(self):
+        count = 1
+        for _, values in self.sweep:
+            count *= len(values)
+        return count
+
+    def get_trial_count(self):
+        return self.get_combination_count() * self.repetitions
+
+    def get_stimulus(self, combination):
+        stimulus = dict(self.stimulus)
+        for key, values in reversed(self.sweep):
+            combination, index = divmod(combination, len(values))
+            stimulus[key] = values[index]
+        return stimulus
+
+    def get_combinations(self):
+        for combination in range(self.get_combination_count()):
+            yield self.get_stimulus(combination)
+
+    def expand(self, seed=None):
+        generator = random.Random(seed)
+        combination_count = self.get_combination_count()
+        number = 0
+        for repetition in range(self.repetitions):
+            order = get_permutation(combination_count, generator if self.randomize else None)
+            for position in range(combination_count):
+                yield Trial(self.arena, number, repetition, self.get_stimulus(order(position)),
+                            self.run_seconds, self.pause_seconds)
+                number += 1
+
+
+class Protocol(object):
+    def __init__(self, arenas, seed=None):
+        self.arenas = arenas
+        self.seed = seed
+
+    def get_arena(self, arena):
+        for arena_protocol in self.arenas:
+            if arena_protocol.arena == arena:
+                return arena_protocol
+        return None
+
+    def expand(self, arena):
+        seed = None if self.seed is None else "%s-%d" % (self.seed, arena)
+        return self.get_arena(arena).expand(seed)
+
+    def compile(self, timeline_compiler):
+        stimuli = (stimulus for arena_protocol in self.arenas for stimulus in arena_protocol.get_combinations()
+                   if stimulus["profile"] != LINEAR)
+        count = 0
+        for stimulus in islice(stimuli, timeline_compiler.cache.capacity):
+            timeline_compiler.compile(Trial(0, 0, 0, stimulus, 0, 0).create_predator())
+            count += 1
+        return count
+
+
+def create_seed():
+    return random.randrange(SEED_LIMIT)
+
+
+def get_permutation(count, generator=None):
+    if generator is None or count < 2:
+        return lambda position: position
+    return generator.sample(range(count), count).__getitem__
+
+
+def load_protocol(file_path, arena_count):
+    extension = path.splitext(file_path)[1].lower()
+    if extension == ".toml":
+        if tomllib is None:  # pragma: no cover
+            raise ProtocolError("TOML protocols need Python 3.11 or the tomli package")
+        with open(file_path, "rb") as protocol_file:
+            return parse_protocol(tomllib.load(protocol_file), arena_count)
+    with open(file_path) as protocol_file:
+        return parse_protocol(json.load(protocol_file), arena_count)
+
+
+def parse_protocol(data, arena_count):
+    check_keys("protocol", data, PROTOCOL_KEYS)
+    randomize = get_bool("protocol", data, "randomize", False)
+    arenas = [parse_arena(item, arena_count, randomize) for item in get_list("protocol", data, "arenas")]
+    if not arenas:
+        raise ProtocolError("The protocol does not contain any arena")
+    numbers = [arena_protocol.arena for arena_protocol in arenas]
+    if len(set(numbers)) != len(numbers):
+        raise ProtocolError("Every arena may only appear once")
+    return Protocol(arenas, data.get("seed"))
+
+
+def parse_arena(data, arena_count, randomize):
+    if not isinstance(data, dict):
+        raise ProtocolError("Arenas must be tables")
+    check_keys("arena", data, ARENA_KEYS)
+    arena = get_number("arena", data, "arena", None, int)
+    if not 1 <= arena <= arena_count:
+        raise ProtocolError("Arena %d does not exist, there are %d arenas" % (arena, arena_count))
+    name = "arena %d" % arena
+
+    stimulus = dict(STIMULUS_DEFAULTS)
+    stimulus_data = data.get("stimulus", dict())
+    check_keys(name + " stimulus", stimulus_data, STIMULUS_DEFAULTS.keys())
+    stimulus.update(stimulus_data)
+    check_stimulus(name, stimulus)
+
+    sweep_data = data.get("sweep", dict())
+    check_keys(name + " sweep", sweep_data, SWEEP_KEYS)
+    sweep = list()
+    for key in SWEEP_KEYS:
+        if key in sweep_data:
+            values = get_list(name + " sweep", sweep_data, key)
+            if not values:
+                raise ProtocolError("The %s sweep over %s is empty" % (name, key))
+            for value in values:
+                check_stimulus(name, dict(stimulus, **{key: value}))
+            sweep.append((key, values))
+
+    run_seconds = get_number(name, data, "run_seconds", None, int)
+    if run_seconds <= 0:
+        raise ProtocolError("Every trial of %s needs a positive run_seconds" % name)
+    pause_seconds = get_number(name, data, "pause_seconds", 0, int)
+    repetitions = get_number(name, data, "repetitions", 1, int)
+    if pause_seconds < 0 or repetitions < 1:
+        raise ProtocolError("%s needs a non-negative pause and at least one repetition" % name)
+    return ArenaProtocol(arena - 1, stimulus, sweep, run_seconds, pause_seconds, repetitions,
+                         get_bool(name, data, "randomize", randomize))
+
+
+def check_stimulus(name, stimulus):
+    if not 0 <= get_number(name, stimulus, "diameter", None, float) <= 1:
+        raise ProtocolError("The diameter of %s must be between 0 and 1" % name)
+    if get_number(name, stimulus, "velocity", None, float) < 0:
+        raise ProtocolError("The velocity of %s must not be negative" % name)
+    try:
+        parse_color(stimulus["color"])
+        check_profile(stimulus["profile"], get_number(name, stimulus, "profile_parameter", None, float))
+    except (ValueError, AttributeError) as error:
+        raise ProtocolError("Invalid stimulus of %s: %s" % (name, error))
+    position = stimulus["position"]
+    if not isinstance(position, (list, tuple)) or len(position) != 2 or \
+            not all(isinstance(value, (int, float)) and 0 <= value <= 1 for value in position):
+        raise ProtocolError("The position of %s must be two values between 0 and 1" % name)
+    if stimulus["path"] is not None:
+        try:
+            compile_trajectory(stimulus["path"], position)
+        except TrajectoryError as error:
+            raise ProtocolError("Invalid path of %s: %s" % (name, error))
+
+
+def check_keys(name, data, allowed):
+    unknown = sorted(set(data) - set(allowed))
+    if unknown:
+        raise ProtocolError("Unknown %s settings: %s" % (name, ", ".join(unknown)))
+
+
+def get_number(name, data, key, default, number_type):
+    value = data.get(key, default)
+    if value is None:
+        raise ProtocolError("%s is missing %s" % (name, key))
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or \
+            (number_type is int and value != int(value)):
+        raise ProtocolError("%s of %s must be a number" % (key, name))
+    return number_type(value)
+
+
+def get_bool(name, data, key, default):
+    value = data.get(key, default)
+    if not isinstance(value, bool):
+        raise ProtocolError("%s of %s must be true or false" % (key, name))
+    return value
+
+
+def get_list(name, data, key):
+    value = data.get(key, list())
+    if not isinstance(value, list):
+        raise ProtocolError("%s of %s must be a list" % (key, name))
+    return value
@@ -0,0 +1,72 @@
+import struct
+import zlib
+import numpy as np
+
+BACKGROUND_COLOR = "#FFFFFF"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def parse_color(color):
+    digits = color.lstrip("#")
+    if len(digits) not in (3, 6, 12):
+        raise ValueError("Unsupported color: %s" % color)
+    size = len(digits) // 3
+    channels = [int(digits[i * size:(i + 1) * size], 16) for i in range(3)]
+    return tuple(channel * 255 // (16 ** size - 1) for channel in channels)
+
+
+def create_frame(width, height, color=BACKGROUND_COLOR):
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = parse_color(color)
+    return frame
+
+
+def get_disc_mask(box, width, height):
+    begin_x, begin_y, end_x, end_y = box
+    radius_x, radius_y = (end_x - begin_x) / 2., (end_y - begin_y) / 2.
+    if radius_x <= 0 or radius_y <= 0:
+        return None
+
+    left, top = max(0, int(np.floor(begin_x))), max(0, int(np.floor(begin_y)))
+    right, bottom = min(width, int(np.ceil(end_x))), min(height, int(np.ceil(end_y)))
+    if left >= right or top >= bottom:
+        return None
+
+    y, x = np.ogrid[top:bottom, left:right]
+    mask = ((x + .5 - begin_x - radius_x) / radius_x) ** 2 + ((y + .5 - begin_y - radius_y) / radius_y) ** 2 <= 1.
+    return (slice(top, bottom), slice(left, right)), mask
+
+
+def draw_disc(frame, box, color):
+    disc = get_disc_mask(box, frame.shape[1], frame.shape[0])
+    if disc is not None:
+        region, mask = disc
+        frame[region][mask] = parse_color(color)
+    return frame
+
+
+def create_disc_sprite(diameter, color):
+    sprite = np.zeros((diameter, diameter, 4), dtype=np.uint8)
+    disc = get_disc_mask((0, 0, diameter, diameter), diameter, diameter)
+    if disc is not None:
+        _, mask = disc
+        sprite[mask] = parse_color(color) + (255,)
+    return sprite
+
+
+def encode_ppm(rgb):
+    height, width = rgb.shape[:2]
+    return b"".join((b"P6 %d %d 255\n" % (width, height), np.ascontiguousarray(rgb)))
+
+
+def encode_png(rgba, level=1):
+    height, width = rgba.shape[:2]
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = rgba.reshape(height, width * 4)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return PNG_SIGNATURE + get_png_chunk(b"IHDR", header) + \
+        get_png_chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + get_png_chunk(b"IEND", b"")
+
+
+def get_png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
@@ -0,0 +1,138 @@
+import time
+import click
+from piscis.clock import VirtualClock
+from piscis.config import Configuration
+from piscis.scheduler import Frame
+from piscis.session_trace import TraceError, load_trace, POSITION, SCALE, SPEED, GENERATE, START, STOP, BACKGROUND, \
+    COLOR, PROFILE, RUN_INTERVAL, PAUSE_INTERVAL, SELECT_TAB
+from piscis.ui.headless import FakeWidget, create_headless_window
+
+
+def create_configuration(header):
+    configuration = Configuration()
+    configuration.arena_count = header["arenas"]
+    configuration.layout_rows = header.get("rows")
+    configuration.layout_columns = header.get("columns")
+    configuration.target_fps = header.get("fps", configuration.target_fps)
+    configuration.render_mode = header.get("render_mode", configuration.render_mode)
+    return configuration
+
+
+class SessionReplay(object):
+    def __init__(self, window, actions, clock=None):
+        self.window = window
+        self.actions = actions
+        self.clock = clock
+        self.applied = 0
+        self.skipped = 0
+        self.frames = 0
+        self.handlers = {
+            POSITION: lambda tab, x, y: tab.place_stimulus(x, y),
+            SCALE: lambda tab, value: tab.on_scale_slider(value),
+            SPEED: lambda tab, value: tab.on_speed_slider(value),
+            GENERATE: lambda tab: tab.generate(),
+            START: self.start,
+            STOP: lambda tab: tab.stop(),
+            BACKGROUND: lambda tab, color: tab.change_background_color(color),
+            COLOR: lambda tab, color: tab.set_stimulus_color(color),
+            PROFILE: lambda tab, profile, profile_parameter: tab.apply_profile(profile, profile_parameter),
+            RUN_INTERVAL: lambda tab, seconds: tab.set_run_interval(seconds),
+            PAUSE_INTERVAL: lambda tab, seconds: tab.set_pause_interval(seconds),
+        }
+
+    def start(self, tab):
+        if tab.predator is None:
+            return False
+        tab.start_run()
+        return True
+
+    def apply(self, action):
+        if action.action == SELECT_TAB:
+            self.window.show_tab(action.arena)
+        elif action.arena is None or self.handlers[action.action](self.window.tabs[action.arena],
+                                                                    *action.arguments) is False:
+            self.skipped += 1
+            return
+        self.applied += 1
+
+    def run_fast(self):
+        period = 1. / self.window.configuration.target_fps
+        start = self.clock.monotonic()
+        epoch = self.window.get_epoch()
+        for action in self.actions:
+            while (self.frames + 1) * period <= action.timestamp:
+                self.render(period, start, epoch)
+            self.advance_to(start + action.timestamp)
+            self.apply(action)
+        return self.frames
+
+    def advance_to(self, timestamp):
+        master = self.window.master
+        while True:
+            self.window.render_loop.suspend()
+            due = master.get_next_due()
+            if due is None or due > timestamp:
+                break
+            self.clock.advance_to(due)
+            master.run_due()
+        self.clock.advance_to(timestamp)
+
+    def render(self, period, start, epoch):
+        self.frames += 1
+        timestamp = self.frames * period
+        self.advance_to(start + timestamp)
+        self.window.render(Frame(self.frames, timestamp, epoch + int(timestamp * 1000), timestamp, 0))
+
+    def start_realtime(self, speed=1.):
+        for action in self.actions:
+            self.window.master.after(int(action.timestamp * 1000 / speed), self.apply, action)
+
+
+def create_fast_replay(header, actions):
+    clock = VirtualClock()
+    window = create_headless_window(create_configuration(header), master=FakeWidget(clock.monotonic), clock=clock)
+    return SessionReplay(window, actions, clock)
+
+
+def run_replay(file_path):
+    header, actions = load_trace(file_path)
+    replay = create_fast_replay(header, actions)
+    start = time.perf_counter()
+    replay.run_fast()
+    return replay, time.perf_counter() - start
+
+
+def run_realtime_replay(file_path, speed):  # pragma: no cover
+    from tkinter import Tk
+    from piscis.ui.window import MainWindow
+
+    header, actions = load_trace(file_path)
+    root = Tk()
+    window = MainWindow(root, create_configuration(header))
+    replay = SessionReplay(window, actions)
+    replay.start_realtime(speed)
+    root.mainloop()
+    return replay
+
+
+@click.command()
+@click.argument("trace", type=click.Path(exists=True, dir_okay=False))
+@click.option("--realtime", is_flag=True, help="Replay into the real user interface with the recorded timing.")
+@click.option("--speed", default=1., type=click.FloatRange(min=0., min_open=True),
+              help="Time lapse factor of real time replays.")
+def main(trace, realtime, speed):
+    try:
+        if realtime:  # pragma: no cover
+            replay = run_realtime_replay(trace, speed)
+            click.echo("Replayed %d actions, skipped %d" % (replay.applied, replay.skipped))
+            return
+        replay, duration = run_replay(trace)
+    except TraceError as error:
+        raise click.ClickException(str(error))
+    click.echo("Replayed %d actions, skipped %d, rendered %d frames in %.1f ms" % (
+        replay.applied, replay.skipped, replay.frames, duration * 1000))
+    click.echo(replay.window.frame_statistics.get_summary())
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
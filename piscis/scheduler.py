@@ -0,0 +1,66 @@
+from math import floor
+import time
+
+CATCH_UP = "catch-up"
+SKIP = "skip"
+FRAME_POLICIES = (CATCH_UP, SKIP)
+
+MAX_CATCH_UP_FRAMES = 4
+
+
+class Frame(object):
+    def __init__(self, index, timestamp, epoch, deadline, dropped):
+        self.index = index
+        self.timestamp = timestamp
+        self.epoch = epoch
+        self.deadline = deadline
+        self.dropped = dropped
+
+    def get_lateness(self):
+        return self.timestamp - self.deadline
+
+
+class FrameScheduler(object):
+    def __init__(self, target_fps, policy=SKIP, clock=time.monotonic, wall_clock=time.time):
+        if policy not in FRAME_POLICIES:
+            raise ValueError("Unknown frame policy: %s" % policy)
+        self.period = 1.0 / float(target_fps)
+        self.policy = policy
+        self.clock = clock
+        self.wall_clock = wall_clock
+
+        self.origin = 0.0
+        self.frame_index = 0
+        self.dropped_frames = 0
+        self.is_running = False
+
+    def get_target_fps(self):
+        return 1.0 / self.period
+
+    def start(self):
+        self.origin = self.clock()
+        self.frame_index = 0
+        self.dropped_frames = 0
+        self.is_running = True
+
+    def stop(self):
+        self.is_running = False
+
+    def get_deadline(self, frame_index=None):
+        if frame_index is None:
+            frame_index = self.frame_index
+        return self.origin + frame_index * self.period
+
+    def get_delay(self):
+        delay = self.get_deadline(self.frame_index + 1) - self.clock()
+        return max(0, int(round(delay * 1000)))
+
+    def next_frame(self):
+        now = self.clock()
+        missed = max(0, int(floor((now - self.get_deadline(self.frame_index + 1)) / self.period)))
+        if self.policy == CATCH_UP and missed <= MAX_CATCH_UP_FRAMES:
+            missed = 0
+
+        self.frame_index += missed + 1
+        self.dropped_frames += missed
+        return Frame(self.frame_index, now, int(self.wall_clock() * 1000), self.get_deadline(), missed)
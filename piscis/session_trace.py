@@ -0,0 +1,86 @@
+import json
+import time
+
+TRACE_VERSION = 1
+
+POSITION = "position"
+SCALE = "scale"
+SPEED = "speed"
+GENERATE = "generate"
+START = "start"
+STOP = "stop"
+BACKGROUND = "background"
+COLOR = "color"
+PROFILE = "profile"
+RUN_INTERVAL = "run-interval"
+PAUSE_INTERVAL = "pause-interval"
+SELECT_TAB = "tab"
+ACTIONS = (POSITION, SCALE, SPEED, GENERATE, START, STOP, BACKGROUND, COLOR, PROFILE, RUN_INTERVAL, PAUSE_INTERVAL,
+           SELECT_TAB)
+
+
+class TraceError(ValueError):
+    pass
+
+
+class TraceAction(object):
+    def __init__(self, timestamp, arena, action, arguments):
+        self.timestamp = timestamp
+        self.arena = arena
+        self.action = action
+        self.arguments = arguments
+
+
+def create_header(configuration, layout):
+    return {"version": TRACE_VERSION, "arenas": layout.arena_count, "rows": layout.rows, "columns": layout.columns,
+            "fps": configuration.target_fps, "render_mode": configuration.render_mode}
+
+
+class SessionRecorder(object):
+    def __init__(self, file_path, header, clock=time.monotonic):
+        self.clock = clock
+        self.start = clock()
+        self.count = 0
+        self.trace_file = open(file_path, "w")
+        self.trace_file.write(json.dumps(header, sort_keys=True) + "\n")
+        self.trace_file.flush()
+
+    def record(self, arena, action, *arguments):
+        line = [round(self.clock() - self.start, 6), arena, action]
+        line.extend(arguments)
+        self.trace_file.write(json.dumps(line, separators=(",", ":")) + "\n")
+        self.trace_file.flush()
+        self.count += 1
+
+    def close(self):
+        self.trace_file.close()
+
+
+def parse_action(line, arena_count):
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise TraceError("Trace lines must be JSON")
+    if not isinstance(data, list) or len(data) < 3:
+        raise TraceError("Trace actions are lists of timestamp, arena, action and arguments")
+    timestamp, arena, action = data[:3]
+    if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)) or timestamp < 0:
+        raise TraceError("Invalid trace timestamp: %r" % timestamp)
+    if action not in ACTIONS:
+        raise TraceError("Unknown trace action: %r" % action)
+    if arena is not None and (isinstance(arena, bool) or not isinstance(arena, int) or
+                              not 0 <= arena < arena_count):
+        raise TraceError("Invalid trace arena: %r" % arena)
+    return TraceAction(float(timestamp), arena, action, data[3:])
+
+
+def load_trace(file_path):
+    with open(file_path) as trace_file:
+        try:
+            header = json.loads(trace_file.readline())
+        except ValueError:
+            raise TraceError("%s does not start with a trace header" % file_path)
+        if not isinstance(header, dict) or header.get("version") != TRACE_VERSION:
+            raise TraceError("%s is not a session trace of this piscis version" % file_path)
+        actions = [parse_action(line, header["arenas"]) for line in trace_file if line.strip()]
+    return header, actions
@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+from piscis.model import PredatorArray, LINEAR, CONSTANT_LV, EXPONENTIAL, get_profile_diameter
+from piscis.telemetry import pack_color, UNKNOWN_COLOR
+from piscis.trajectory import Trajectory, REPEAT_MODES, TRAJECTORY_SAMPLES
+
+PROFILE_CODES = (LINEAR, CONSTANT_LV, EXPONENTIAL)
+DEFAULT_COLOR = "#000000"
+DEFAULT_BACKGROUND = "#FFFFFF"
+NO_PATH = -1
+
+
+def get_arena_dtype():
+    return np.dtype([("active", np.bool_), ("scaling_epoch", np.float64), ("scaling_velocity", np.float64),
+                     ("target_diameter", np.float64), ("profile", np.int8), ("profile_parameter", np.float64),
+                     ("movement_epoch", np.float64), ("starting_position", np.float64, (2,)),
+                     ("movement_velocity", np.float64, (2,)), ("path_repeat", np.int8), ("path_speed", np.float64),
+                     ("path_length", np.float64), ("path_table", np.float64, (TRAJECTORY_SAMPLES, 2)),
+                     ("tracked", np.bool_), ("tracked_position", np.float64, (2,)), ("color", np.int32),
+                     ("background", np.int32)])
+
+
+def get_shared_state_dtype(arena_count):
+    return np.dtype([("sequence", np.uint64), ("background", np.int32), ("fullscreen", np.bool_),
+                     ("closed", np.bool_), ("arenas", get_arena_dtype(), (arena_count,))])
+
+
+def unpack_color(value, default=DEFAULT_COLOR):
+    if value == UNKNOWN_COLOR:
+        return default
+    return "#%06X" % value
+
+
+class SharedArenaState(object):
+    def __init__(self, arena_count, name=None):
+        self.arena_count = arena_count
+        self.dtype = get_shared_state_dtype(arena_count)
+        self.is_owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.is_owner, size=self.dtype.itemsize)
+        self.record = np.ndarray((), dtype=self.dtype, buffer=self.memory.buf)
+        if self.is_owner:
+            self.record[()] = np.zeros((), dtype=self.dtype)
+            self.record["background"] = pack_color(DEFAULT_BACKGROUND)
+            self.record["arenas"]["background"] = pack_color(DEFAULT_BACKGROUND)
+            self.record["arenas"]["color"] = pack_color(DEFAULT_COLOR)
+            self.record["arenas"]["path_repeat"] = NO_PATH
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def get_sequence(self):
+        return int(self.record["sequence"])
+
+    @contextmanager
+    def writing(self):
+        self.record["sequence"] = self.get_sequence() + 1
+        try:
+            yield self.record
+        finally:
+            self.record["sequence"] = self.get_sequence() + 1
+
+    def read(self):
+        while True:
+            sequence = self.get_sequence()
+            if sequence % 2 == 0:
+                snapshot = self.record.copy()
+                if self.get_sequence() == sequence:
+                    return sequence, snapshot
+
+    def publish(self, predator_array, backgrounds):
+        with self.writing() as record:
+            arenas = record["arenas"]
+            arenas["active"] = predator_array.active
+            arenas["scaling_epoch"] = predator_array.scaling_epochs
+            arenas["scaling_velocity"] = predator_array.scaling_velocities
+            arenas["target_diameter"] = predator_array.target_diameters
+            arenas["movement_epoch"] = predator_array.movement_epochs
+            arenas["starting_position"] = predator_array.starting_positions
+            arenas["movement_velocity"] = predator_array.movement_velocities
+            arenas["tracked"] = predator_array.tracked
+            arenas["tracked_position"] = predator_array.tracked_positions
+            for i, predator in enumerate(predator_array.predators):
+                if predator is not None:
+                    arenas["profile"][i] = PROFILE_CODES.index(predator.scaling_vector.profile)
+                    arenas["profile_parameter"][i] = predator.scaling_vector.profile_parameter
+                    arenas["color"][i] = pack_color(predator.color)
+                self.publish_trajectory(arenas[i], predator_array.trajectories[i])
+            arenas["background"] = [pack_color(color) for color in backgrounds]
+
+    def publish_tracking(self, predator_array):
+        with self.writing() as record:
+            record["arenas"]["tracked"] = predator_array.tracked
+            record["arenas"]["tracked_position"] = predator_array.tracked_positions
+
+    def publish_trajectory(self, arena, trajectory):
+        if trajectory is None or len(trajectory.table) != TRAJECTORY_SAMPLES:
+            arena["path_repeat"] = NO_PATH
+            return
+        arena["path_repeat"] = REPEAT_MODES.index(trajectory.repeat)
+        arena["path_speed"] = trajectory.speed
+        arena["path_length"] = trajectory.length
+        arena["path_table"] = trajectory.table
+
+    def set_background(self, color):
+        with self.writing() as record:
+            record["background"] = pack_color(color)
+
+    def set_fullscreen(self):
+        with self.writing() as record:
+            record["fullscreen"] = True
+
+    def close_display(self):
+        with self.writing() as record:
+            record["closed"] = True
+
+    def close(self):
+        self.record = None
+        self.memory.close()
+        if self.is_owner:
+            self.memory.unlink()
+
+
+class DisplayPredatorArray(PredatorArray):
+    def __init__(self, capacity):
+        PredatorArray.__init__(self, capacity)
+        self.profiles = [LINEAR] * capacity
+        self.profile_parameters = np.zeros(capacity)
+        self.colors = [DEFAULT_COLOR] * capacity
+
+    def load(self, arenas):
+        self.active[:] = arenas["active"]
+        self.scaling_epochs[:] = arenas["scaling_epoch"]
+        self.scaling_velocities[:] = arenas["scaling_velocity"]
+        self.target_diameters[:] = arenas["target_diameter"]
+        self.movement_epochs[:] = arenas["movement_epoch"]
+        self.starting_positions[:] = arenas["starting_position"]
+        self.movement_velocities[:] = arenas["movement_velocity"]
+        self.tracked[:] = arenas["tracked"]
+        self.tracked_positions[:] = arenas["tracked_position"]
+        self.profile_parameters[:] = arenas["profile_parameter"]
+        self.profiles = [PROFILE_CODES[code] for code in arenas["profile"]]
+        self.colors = [unpack_color(value) for value in arenas["color"]]
+        self.profile_indices = [i for i in np.flatnonzero(arenas["profile"]) if self.active[i]]
+        self.trajectories = [load_trajectory(arena) for arena in arenas]
+        self.trajectory_indices = [i for i, trajectory in enumerate(self.trajectories) if trajectory is not None]
+        self.dirty[:] = True
+
+    def get_profile_diameter(self, index, delta):
+        return float(get_profile_diameter(self.profiles[index], delta, self.target_diameters[index],
+                                          self.scaling_velocities[index], self.profile_parameters[index]))
+
+    def reset_scaling(self, indices, epoch):
+        self.scaling_epochs[indices] = epoch
+
+
+def load_trajectory(arena):
+    if arena["path_repeat"] == NO_PATH:
+        return None
+    return Trajectory(arena["path_table"].copy(), arena["path_length"], arena["path_speed"],
+                      REPEAT_MODES[arena["path_repeat"]])
@@ -0,0 +1,125 @@
+from collections import Counter
+import time
+import click
+import numpy as np
+from piscis.clock import VirtualClock
+from piscis.config import Configuration, ARENA_COUNT, TARGET_FPS, MAX_ARENA_COUNT
+from piscis.events import EventLog, TARGET_REACHED
+from piscis.protocol import load_protocol, ProtocolError
+from piscis.ui.headless import FakeWidget, create_headless_window
+
+INFINITY = float("inf")
+
+
+class SimulatedEvent(object):
+    def __init__(self, seconds, arena, kind, value):
+        self.seconds = seconds
+        self.arena = arena
+        self.kind = kind
+        self.value = value
+
+
+class ProtocolSimulator(object):
+    def __init__(self, protocol, arena_count, fps=TARGET_FPS, render=False, clock=None):
+        self.protocol = protocol
+        self.clock = VirtualClock() if clock is None else clock
+        self.master = FakeWidget(self.clock.monotonic)
+        configuration = Configuration()
+        configuration.arena_count = arena_count
+        configuration.target_fps = fps
+        self.window = create_headless_window(configuration, master=self.master, clock=self.clock)
+        self.event_log = EventLog(clock=self.clock.monotonic_ns)
+        self.window.attach_event_log(self.event_log)
+        if not render:
+            self.window.render_loop.render = self.evaluate
+        self.start_epoch = None
+        self.events = list()
+        self.steps = 0
+
+    def evaluate(self, frame):
+        self.window.predator_array.evaluate(frame.epoch)
+        return self.window.predator_array.is_animating()
+
+    def run(self, duration=None):
+        self.start_epoch = self.window.get_epoch()
+        end = None if duration is None else self.clock.monotonic() + duration
+        self.window.run_protocol(self.protocol)
+        self.collect_events()
+        while self.step(end):
+            pass
+        return self.events
+
+    def step(self, end=None):
+        due = self.master.get_next_due()
+        if due is None:
+            return False
+        render_id = self.window.render_loop.after_id
+        if render_id is not None:
+            other = self.master.get_next_due(render_id)
+            limit = min(self.get_next_reach(), INFINITY if other is None else other)
+            if end is not None:
+                limit = min(limit, end)
+            if limit != INFINITY:
+                due = max(due, limit)
+        if end is not None and due > end:
+            self.clock.advance_to(end)
+            return False
+        self.clock.advance_to(due)
+        self.master.run_due()
+        self.collect_events()
+        self.steps += 1
+        return True
+
+    def get_next_reach(self):
+        predator_array = self.window.predator_array
+        scaling = predator_array.active & (predator_array.scaling_velocities > 0) & \
+            (predator_array.target_diameters > 0)
+        if not scaling.any():
+            return INFINITY
+        reached = predator_array.scaling_epochs[scaling] / 1000. + \
+            predator_array.target_diameters[scaling] / predator_array.scaling_velocities[scaling]
+        return self.clock.monotonic() + float(np.min(reached)) - self.clock.time()
+
+    def collect_events(self):
+        for _, arena, kind, epoch, value in self.event_log.drain():
+            self.events.append(SimulatedEvent((epoch - self.start_epoch) / 1000., arena, kind, value))
+
+    def get_simulated_seconds(self):
+        return (self.window.get_epoch() - self.start_epoch) / 1000.
+
+
+def format_event(event):
+    return "%12.3f s  arena %2d  %-14s %g" % (event.seconds, event.arena + 1, event.kind, event.value)
+
+
+def format_summary(simulator, duration):
+    counts = Counter(event.kind for event in simulator.events)
+    lines = ["Simulated %.1f s in %.2f s (%d steps)" % (simulator.get_simulated_seconds(), duration, simulator.steps)]
+    lines.extend("%s: %d" % (kind, count) for kind, count in sorted(counts.items()))
+    return "\n".join(lines)
+
+
+@click.command()
+@click.argument("protocol_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--arenas", default=ARENA_COUNT, type=click.IntRange(1, MAX_ARENA_COUNT), help="Number of arenas.")
+@click.option("--fps", default=TARGET_FPS, type=click.IntRange(1, 240), help="Frame rate of the simulated display.")
+@click.option("--duration", default=None, type=click.FloatRange(min=0.), help="Stop after this many seconds.")
+@click.option("--render", is_flag=True, help="Draw every frame onto headless canvases instead of only evaluating.")
+@click.option("--target-reached", is_flag=True, help="Also list every time a stimulus reaches its target diameter.")
+def main(protocol_path, arenas, fps, duration, render, target_reached):
+    try:
+        protocol = load_protocol(protocol_path, arenas)
+    except (ProtocolError, OSError, ValueError) as error:
+        raise click.ClickException(str(error))
+    simulator = ProtocolSimulator(protocol, arenas, fps, render)
+    start = time.perf_counter()
+    simulator.run(duration)
+    elapsed = time.perf_counter() - start
+    for event in simulator.events:
+        if target_reached or event.kind != TARGET_REACHED:
+            click.echo(format_event(event))
+    click.echo(format_summary(simulator, elapsed))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
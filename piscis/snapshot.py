@@ -0,0 +1,150 @@
+from os import path
+import numpy as np
+from piscis.shared_state import PROFILE_CODES, unpack_color, DEFAULT_COLOR, DEFAULT_BACKGROUND
+from piscis.telemetry import PHASES, pack_color
+
+SNAPSHOT_MAGIC = b"PISCIS"
+SNAPSHOT_VERSION = 2
+PROTOCOL_PATH_SIZE = 1024
+NO_TRIAL = -1
+NO_SEED = -1
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def get_arena_dtype():
+    return np.dtype([("sequence", np.uint32), ("generated", np.bool_), ("phase", np.int8),
+                     ("starting_position", np.float64, (2,)), ("target_diameter", np.float64),
+                     ("scaling_velocity", np.float64), ("profile", np.int8), ("profile_parameter", np.float64),
+                     ("color", np.int32), ("background", np.int32), ("run_seconds", np.int32),
+                     ("pause_seconds", np.int32), ("remaining_run", np.int32), ("remaining_pause", np.int32),
+                     ("trial", np.int32)])
+
+
+def get_snapshot_dtype(arena_count):
+    return np.dtype([("magic", "S8"), ("version", np.int32), ("arena_count", np.int32),
+                     ("protocol_path", "S%d" % PROTOCOL_PATH_SIZE), ("protocol_seed", np.int64),
+                     ("arenas", get_arena_dtype(), (arena_count,))])
+
+
+class ArenaState(object):
+    def __init__(self, record):
+        self.generated = bool(record["generated"])
+        self.phase = PHASES[record["phase"]]
+        self.stimulus = {"diameter": float(record["target_diameter"]),
+                         "velocity": float(record["scaling_velocity"]),
+                         "color": unpack_color(int(record["color"]), DEFAULT_COLOR),
+                         "profile": PROFILE_CODES[record["profile"]],
+                         "profile_parameter": float(record["profile_parameter"]),
+                         "position": tuple(record["starting_position"].tolist())}
+        self.background = unpack_color(int(record["background"]), DEFAULT_BACKGROUND)
+        self.run_seconds = int(record["run_seconds"])
+        self.pause_seconds = int(record["pause_seconds"])
+        self.remaining_run = int(record["remaining_run"])
+        self.remaining_pause = int(record["remaining_pause"])
+        self.trial = int(record["trial"])
+        self.is_torn = bool(record["sequence"] % 2)
+
+
+class SessionSnapshot(object):
+    def __init__(self, file_path, arena_count, resume=False):
+        self.file_path = file_path
+        self.dtype = get_snapshot_dtype(arena_count)
+        if resume:
+            self.record = open_snapshot(file_path, self.dtype)
+        else:
+            self.record = np.memmap(file_path, dtype=self.dtype, mode="w+", shape=())
+            self.record["magic"] = SNAPSHOT_MAGIC
+            self.record["version"] = SNAPSHOT_VERSION
+            self.record["arena_count"] = arena_count
+            self.record["protocol_seed"] = NO_SEED
+            self.record["arenas"]["trial"] = NO_TRIAL
+            self.flush()
+        self.arenas = self.record["arenas"]
+
+    def get_protocol_path(self):
+        return self.record["protocol_path"].item().decode("utf-8") or None
+
+    def get_protocol_seed(self):
+        seed = int(self.record["protocol_seed"])
+        return None if seed == NO_SEED else seed
+
+    def get_arena_states(self):
+        return [ArenaState(record) for record in self.arenas.copy()]
+
+    def set_protocol_path(self, file_path):
+        encoded = b"" if file_path is None else path.abspath(file_path).encode("utf-8")
+        if len(encoded) > PROTOCOL_PATH_SIZE:
+            encoded = b""
+        self.record["protocol_path"] = encoded
+        self.flush()
+
+    def set_protocol_seed(self, seed):
+        self.record["protocol_seed"] = NO_SEED if seed is None else seed
+        self.flush()
+
+    def begin(self, index):
+        self.arenas["sequence"][index] += 1
+        return self.arenas[index]
+
+    def end(self, index):
+        self.arenas["sequence"][index] += 1
+
+    def save_arena(self, index, tab):
+        arena = self.begin(index)
+        predator = tab.predator
+        arena["generated"] = predator is not None
+        if predator is not None:
+            sv = predator.scaling_vector
+            arena["starting_position"] = predator.get_starting_position()
+            arena["target_diameter"] = tab.target_diameter
+            arena["scaling_velocity"] = sv.velocity
+            arena["profile"] = PROFILE_CODES.index(sv.profile)
+            arena["profile_parameter"] = sv.profile_parameter
+            arena["color"] = pack_color(predator.color)
+        arena["background"] = pack_color(tab.current_background_color)
+        arena["run_seconds"] = tab.run_seconds
+        arena["pause_seconds"] = tab.pause_seconds
+        arena["remaining_run"] = tab.remaining_secs_run
+        arena["remaining_pause"] = tab.remaining_secs_pause
+        arena["trial"] = NO_TRIAL if tab.trial is None else tab.trial.number
+        self.end(index)
+
+    def save_remaining_seconds(self, index, remaining_run, remaining_pause):
+        arena = self.begin(index)
+        arena["remaining_run"] = remaining_run
+        arena["remaining_pause"] = remaining_pause
+        self.end(index)
+
+    def set_phase(self, index, phase):
+        arena = self.begin(index)
+        arena["phase"] = PHASES.index(phase)
+        self.end(index)
+        self.flush()
+
+    def flush(self):
+        self.record.flush()
+
+    def close(self):
+        self.flush()
+        self.record = None
+        self.arenas = None
+
+
+def open_snapshot(file_path, dtype):
+    try:
+        record = np.memmap(file_path, dtype=dtype, mode="r+", shape=())
+    except (OSError, ValueError) as error:
+        raise SnapshotError("Cannot open the session snapshot %s: %s" % (file_path, error))
+    if record["magic"] != SNAPSHOT_MAGIC or record["version"] != SNAPSHOT_VERSION:
+        raise SnapshotError("%s is not a session snapshot of this piscis version" % file_path)
+    if record["arena_count"] != dtype["arenas"].shape[0]:
+        raise SnapshotError("The session snapshot has %d arenas, not %d" % (record["arena_count"],
+                                                                           dtype["arenas"].shape[0]))
+    return record
+
+
+def check_snapshot(file_path, arena_count):
+    open_snapshot(file_path, get_snapshot_dtype(arena_count))
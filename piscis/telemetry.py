@@ -0,0 +1,92 @@
+import tempfile
+import numpy as np
+from piscis.intervals import RUN, PAUSE
+from piscis.raster import parse_color
+
+IDLE = "idle"
+PHASES = (IDLE, RUN, PAUSE)
+UNKNOWN_COLOR = -1
+
+TELEMETRY_CAPACITY = 40 * 60 * 60
+
+
+def get_telemetry_dtype(arena_count):
+    return np.dtype([("frame", np.int64), ("timestamp", np.float64), ("epoch", np.int64),
+                     ("position", np.float32, (arena_count, 2)), ("diameter", np.float32, (arena_count,)),
+                     ("color", np.int32, (arena_count,)), ("phase", np.int8, (arena_count,))])
+
+
+def pack_color(color):
+    try:
+        red, green, blue = parse_color(color)
+    except (ValueError, AttributeError):
+        return UNKNOWN_COLOR
+    return red << 16 | green << 8 | blue
+
+
+def create_memmap(file_path, dtype, capacity):
+    if file_path is not None:
+        return np.memmap(file_path, dtype=dtype, mode="w+", shape=(capacity,))
+    with tempfile.TemporaryFile() as backing_file:
+        return np.memmap(backing_file, dtype=dtype, mode="w+", shape=(capacity,))
+
+
+class TelemetryRing(object):
+    def __init__(self, arena_count, capacity=TELEMETRY_CAPACITY, file_path=None):
+        if capacity < 1:
+            raise ValueError("Telemetry capacity must be positive")
+        self.arena_count = arena_count
+        self.capacity = capacity
+        self.records = create_memmap(file_path, get_telemetry_dtype(arena_count), capacity)
+        self.frames = self.records["frame"]
+        self.timestamps = self.records["timestamp"]
+        self.epochs = self.records["epoch"]
+        self.positions = self.records["position"]
+        self.diameters = self.records["diameter"]
+        self.colors = self.records["color"]
+        self.phases = self.records["phase"]
+
+        self.current_colors = np.zeros(arena_count, dtype=np.int32)
+        self.current_phases = np.zeros(arena_count, dtype=np.int8)
+        self.color_codes = dict()
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def set_color(self, arena, color):
+        if color not in self.color_codes:
+            self.color_codes[color] = pack_color(color)
+        self.current_colors[arena] = self.color_codes[color]
+
+    def set_phase(self, arena, phase):
+        self.current_phases[arena] = PHASES.index(phase)
+
+    def record(self, frame, diameters, positions):
+        slot = self.count % self.capacity
+        self.frames[slot] = frame.index
+        self.timestamps[slot] = frame.timestamp
+        self.epochs[slot] = frame.epoch
+        self.positions[slot] = positions
+        self.diameters[slot] = diameters
+        self.colors[slot] = self.current_colors
+        self.phases[slot] = self.current_phases
+        self.count += 1
+
+    def get_ordered_slots(self):
+        if self.count <= self.capacity:
+            return np.arange(self.count)
+        return np.arange(self.count - self.capacity, self.count) % self.capacity
+
+    def get_columns(self):
+        records = self.records[self.get_ordered_slots()]
+        return {"frame": records["frame"], "timestamp": records["timestamp"], "epoch": records["epoch"],
+                "x": records["position"][:, :, 0], "y": records["position"][:, :, 1],
+                "diameter": records["diameter"], "color": records["color"], "phase": records["phase"],
+                "phase_names": np.array(PHASES)}
+
+    def export_npz(self, file_path):
+        np.savez(file_path, **self.get_columns())
+
+    def flush(self):
+        self.records.flush()
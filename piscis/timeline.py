@@ -0,0 +1,62 @@
+from math import ceil, floor, isinf
+import numpy as np
+from piscis.cache import LRUCache
+from piscis.model import get_loom_duration, get_profile_diameter
+
+TIMELINE_CACHE_SIZE = 64
+
+
+class Timeline(object):
+    def __init__(self, frames, fps, target_diameter, duration=float("inf")):
+        self.frames = frames
+        self.fps = fps
+        self.target_diameter = target_diameter
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_frame_index(self, elapsed):
+        if elapsed <= 0:
+            return 0
+        return min(int(floor(elapsed * self.fps)), len(self.frames) - 1)
+
+    def get_diameter(self, elapsed):
+        if elapsed >= self.duration:
+            return self.target_diameter
+        return self.frames[self.get_frame_index(elapsed), 2]
+
+
+def get_frame_count(duration, fps):
+    if isinf(duration):
+        return 1
+    return max(1, int(ceil(duration * fps)))
+
+
+def compile_timeline(predator, fps):
+    sv, mv = predator.scaling_vector, predator.movement_vector
+    duration = get_loom_duration(sv.target_diameter, sv.velocity)
+    frame_count = get_frame_count(duration, fps)
+    elapsed = np.arange(frame_count) / float(fps)
+
+    frames = np.empty((frame_count, 3))
+    frames[:, :2] = mv.get_positions(elapsed)
+    frames[:, 2] = get_profile_diameter(sv.profile, elapsed, sv.target_diameter, sv.velocity, sv.profile_parameter)
+    return Timeline(frames, fps, sv.target_diameter, duration)
+
+
+def get_timeline_key(predator, fps):
+    sv, mv = predator.scaling_vector, predator.movement_vector
+    return (sv.profile, float(sv.profile_parameter), float(sv.target_diameter), float(sv.velocity),
+            tuple(float(value) for value in mv.starting_position), mv.angle, mv.magnitude,
+            None if mv.trajectory is None else mv.trajectory.key, float(fps))
+
+
+class TimelineCompiler(object):
+    def __init__(self, fps, capacity=TIMELINE_CACHE_SIZE):
+        self.fps = fps
+        self.cache = LRUCache(capacity)
+
+    def compile(self, predator):
+        return self.cache.get_or_create(get_timeline_key(predator, self.fps),
+                                        lambda: compile_timeline(predator, self.fps))
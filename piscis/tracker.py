@@ -0,0 +1,381 @@
+from math import pi
+from multiprocessing import shared_memory
+import socket
+import time
+import click
+import numpy as np
+from piscis.config import ARENA_COUNT, MAX_ARENA_COUNT
+
+TRACKER_HOST = "127.0.0.1"
+TRACKER_CAPACITY = 4096
+MAX_DATAGRAM_SIZE = 65507
+MAX_DATAGRAMS = 1024
+SAMPLES_PER_DATAGRAM = 32
+
+MAX_SAMPLE_AGE = .1
+MAX_PREDICTION = .05
+VELOCITY_SMOOTHING = .5
+DELAY_SMOOTHING = .1
+MIN_HEADING_SPEED = .01
+
+SYNTHETIC_RATE = 120.
+SYNTHETIC_RADIUS = .25
+SYNTHETIC_ANGULAR_SPEED = 1.
+
+SAMPLE_DTYPE = np.dtype([("capture_time", "<f8"), ("arena", "<u4"), ("x", "<f8"), ("y", "<f8"),
+                         ("heading", "<f8")])
+
+
+class TrackerError(ValueError):
+    pass
+
+
+def create_samples(capture_times, arenas, positions, headings):
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    samples = np.empty(len(positions), dtype=SAMPLE_DTYPE)
+    samples["capture_time"] = capture_times
+    samples["arena"] = arenas
+    samples["x"] = positions[:, 0]
+    samples["y"] = positions[:, 1]
+    samples["heading"] = headings
+    return samples
+
+
+def encode_samples(samples):
+    return np.ascontiguousarray(samples, dtype=SAMPLE_DTYPE).tobytes()
+
+
+def decode_samples(data):
+    if len(data) % SAMPLE_DTYPE.itemsize:
+        raise TrackerError("Tracker datagrams must hold whole samples of %d bytes" % SAMPLE_DTYPE.itemsize)
+    return np.frombuffer(data, dtype=SAMPLE_DTYPE)
+
+
+def concatenate_samples(batches):
+    if not batches:
+        return np.empty(0, dtype=SAMPLE_DTYPE)
+    return np.concatenate(batches)
+
+
+class UdpTrackerSource(object):
+    def __init__(self, host=TRACKER_HOST, port=0):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.socket.bind((host, port))
+        except OSError:
+            self.socket.close()
+            raise
+        self.socket.setblocking(False)
+        self.port = self.socket.getsockname()[1]
+        self.malformed = 0
+
+    def receive(self, limit=MAX_DATAGRAMS):
+        batches = list()
+        for _ in range(limit):
+            try:
+                data = self.socket.recv(MAX_DATAGRAM_SIZE)
+            except BlockingIOError:
+                break
+            try:
+                batches.append(decode_samples(data))
+            except TrackerError:
+                self.malformed += 1
+        return concatenate_samples(batches)
+
+    def close(self):
+        self.socket.close()
+
+
+class UdpTrackerSink(object):
+    def __init__(self, port, host=TRACKER_HOST):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((host, port))
+
+    def push(self, samples):
+        try:
+            for begin in range(0, len(samples), SAMPLES_PER_DATAGRAM):
+                self.socket.send(encode_samples(samples[begin:begin + SAMPLES_PER_DATAGRAM]))
+        except ConnectionRefusedError:
+            return 0
+        return len(samples)
+
+    def close(self):
+        self.socket.close()
+
+
+def get_ring_dtype(capacity):
+    return np.dtype([("capacity", np.uint64), ("written", np.uint64), ("read", np.uint64), ("rejected", np.uint64),
+                     ("samples", SAMPLE_DTYPE, (capacity,))])
+
+
+class SharedTrackerRing(object):
+    def __init__(self, name=None, capacity=TRACKER_CAPACITY, create=True):
+        if create:
+            if capacity < 1:
+                raise ValueError("Tracker ring capacity must be positive")
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=get_ring_dtype(capacity).itemsize)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            capacity = int(np.ndarray((), dtype=np.uint64, buffer=self.memory.buf))
+        self.is_owner = create
+        self.capacity = capacity
+        self.record = np.ndarray((), dtype=get_ring_dtype(capacity), buffer=self.memory.buf)
+        if create:
+            self.record[()] = np.zeros((), dtype=self.record.dtype)
+            self.record["capacity"] = capacity
+        self.samples = self.record["samples"]
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def __len__(self):
+        return int(self.record["written"]) - int(self.record["read"])
+
+    def get_rejected(self):
+        return int(self.record["rejected"])
+
+    def push(self, samples):
+        written = int(self.record["written"])
+        accepted = min(len(samples), self.capacity - len(self))
+        self.samples[np.arange(written, written + accepted) % self.capacity] = samples[:accepted]
+        self.record["written"] = written + accepted
+        self.record["rejected"] = self.get_rejected() + len(samples) - accepted
+        return accepted
+
+    def receive(self, limit=TRACKER_CAPACITY):
+        read = int(self.record["read"])
+        end = min(int(self.record["written"]), read + limit)
+        samples = self.samples[np.arange(read, end) % self.capacity]
+        self.record["read"] = end
+        return samples
+
+    def close(self):
+        self.record = None
+        self.samples = None
+        self.memory.close()
+        if self.is_owner:
+            self.memory.unlink()
+
+
+def open_tracker_ring(name, capacity=TRACKER_CAPACITY):
+    try:
+        return SharedTrackerRing(name, capacity)
+    except FileExistsError:
+        click.echo("The tracker ring %s was left behind by an earlier session, reattaching to it" % name, err=True)
+    ring = SharedTrackerRing(name, create=False)
+    ring.is_owner = True
+    ring.record["read"] = ring.record["written"]
+    return ring
+
+
+class TrackerFeed(object):
+    def __init__(self, arena_count, max_age=MAX_SAMPLE_AGE, smoothing=VELOCITY_SMOOTHING):
+        self.max_age = max_age
+        self.smoothing = smoothing
+        self.capture_times = np.full(arena_count, -np.inf)
+        self.positions = np.zeros((arena_count, 2))
+        self.velocities = np.zeros((arena_count, 2))
+        self.headings = np.zeros(arena_count)
+        self.received = 0
+        self.invalid = 0
+        self.stale = 0
+        self.superseded = 0
+
+    def update(self, samples, now):
+        self.received += len(samples)
+        arenas = samples["arena"].astype(np.int64) - 1
+        valid = (arenas >= 0) & (arenas < len(self.capture_times)) & np.isfinite(samples["capture_time"]) & \
+            np.isfinite(samples["x"]) & np.isfinite(samples["y"])
+        self.invalid += int(np.count_nonzero(~valid))
+        samples, arenas = samples[valid], arenas[valid]
+        fresh = now - samples["capture_time"] <= self.max_age
+        self.stale += int(np.count_nonzero(~fresh))
+        samples, arenas = samples[fresh], arenas[fresh]
+        newer = samples["capture_time"] > self.capture_times[arenas]
+        samples, arenas = samples[newer], arenas[newer]
+        order = np.lexsort((samples["capture_time"], arenas))
+        samples, arenas = samples[order], arenas[order]
+        last = np.flatnonzero(np.append(arenas[1:] != arenas[:-1], True)) if len(arenas) else np.zeros(0, int)
+        self.superseded += len(newer) - len(last)
+        if len(last):
+            self.apply(samples, arenas, last)
+        return len(last)
+
+    def apply(self, samples, arenas, last):
+        indices = arenas[last]
+        previous = np.maximum(last - 1, 0)
+        batched = (last > 0) & (arenas[previous] == indices)
+        times = samples["capture_time"][last]
+        positions = np.column_stack((samples["x"][last], samples["y"][last]))
+        previous_times = np.where(batched, samples["capture_time"][previous], self.capture_times[indices])
+        previous_positions = np.where(batched[:, np.newaxis],
+                                      np.column_stack((samples["x"][previous], samples["y"][previous])),
+                                      self.positions[indices])
+        intervals = times - previous_times
+        measured = intervals <= self.max_age
+        velocities = np.zeros((len(indices), 2))
+        np.divide(positions - previous_positions, intervals[:, np.newaxis], out=velocities,
+                  where=measured[:, np.newaxis])
+        smoothed = self.velocities[indices] + self.smoothing * (velocities - self.velocities[indices])
+        self.velocities[indices] = np.where(measured[:, np.newaxis], smoothed, 0.)
+
+        speeds = np.hypot(self.velocities[indices, 0], self.velocities[indices, 1])
+        estimated = np.where(speeds > MIN_HEADING_SPEED,
+                             np.arctan2(self.velocities[indices, 1], self.velocities[indices, 0]),
+                             self.headings[indices])
+        headings = samples["heading"][last]
+        self.headings[indices] = np.where(np.isfinite(headings), headings, estimated)
+        self.capture_times[indices] = times
+        self.positions[indices] = positions
+
+    def get_fresh(self, now):
+        return now - self.capture_times <= self.max_age
+
+    def predict(self, timestamp, max_prediction=MAX_PREDICTION):
+        horizons = np.clip(timestamp - self.capture_times, 0., max_prediction)
+        return self.positions + self.velocities * horizons[:, np.newaxis]
+
+    def get_dropped(self):
+        return self.invalid + self.stale + self.superseded
+
+
+class ClosedLoop(object):
+    def __init__(self, sources, arena_count, clock=time.monotonic, display_lag=0., max_age=MAX_SAMPLE_AGE):
+        self.sources = sources
+        self.feed = TrackerFeed(arena_count, max_age)
+        self.clock = clock
+        self.display_lag = display_lag
+        self.following = np.zeros(arena_count, dtype=bool)
+        self.angles = np.zeros(arena_count)
+        self.distances = np.zeros(arena_count)
+        self.tracked = np.zeros(arena_count, dtype=bool)
+        self.presented_times = np.full(arena_count, -np.inf)
+        self.render_delay = 0.
+        self.placed_at = None
+
+    def follow(self, index, angle, distance):
+        self.following[index] = True
+        self.angles[index] = np.radians(angle)
+        self.distances[index] = distance
+
+    def unfollow(self, index):
+        self.following[index] = False
+
+    def is_following(self, index):
+        return bool(self.following[index])
+
+    def poll(self, now):
+        for source in self.sources:
+            self.feed.update(source.receive(), now)
+
+    def get_stimulus_positions(self, timestamp):
+        fish = self.feed.predict(timestamp)
+        directions = self.feed.headings + self.angles
+        offsets = self.distances[:, np.newaxis] * np.column_stack((np.cos(directions), np.sin(directions)))
+        return np.clip(fish + offsets, 0., 1.)
+
+    def place(self, predator_array):
+        now = self.clock()
+        self.poll(now)
+        self.tracked[:] = self.following & self.feed.get_fresh(now) & predator_array.active
+        predator_array.track(self.tracked, self.get_stimulus_positions(now + self.render_delay + self.display_lag))
+        self.placed_at = now
+        return self.tracked
+
+    def present(self):
+        now = self.clock()
+        if self.placed_at is not None:
+            self.render_delay += DELAY_SMOOTHING * (now - self.placed_at - self.render_delay)
+            self.placed_at = None
+        new = self.tracked & (self.feed.capture_times > self.presented_times)
+        self.presented_times[new] = self.feed.capture_times[new]
+        return now + self.display_lag - self.feed.capture_times[new]
+
+    def get_summary(self):
+        feed = self.feed
+        return "Tracker samples: %d received, %d stale, %d superseded, %d invalid" % (
+            feed.received, feed.stale, feed.superseded, feed.invalid)
+
+    def close(self):
+        for source in self.sources:
+            source.close()
+
+
+class SyntheticTracker(object):
+    def __init__(self, arena_count, rate=SYNTHETIC_RATE, radius=SYNTHETIC_RADIUS,
+                 angular_speed=SYNTHETIC_ANGULAR_SPEED, latency=0., clock=time.monotonic):
+        self.arena_count = arena_count
+        self.period = 1. / rate
+        self.radius = radius
+        self.angular_speed = angular_speed
+        self.latency = latency
+        self.clock = clock
+        self.sent = 0
+        self.accepted = 0
+
+    def get_angles(self, timestamp):
+        return self.angular_speed * timestamp + 2 * pi * np.arange(self.arena_count) / self.arena_count
+
+    def get_positions(self, timestamp):
+        angles = self.get_angles(timestamp)
+        return .5 + self.radius * np.column_stack((np.cos(angles), np.sin(angles)))
+
+    def get_samples(self, timestamp):
+        headings = self.get_angles(timestamp) + (pi / 2 if self.angular_speed >= 0 else -pi / 2)
+        return create_samples(timestamp, np.arange(1, self.arena_count + 1), self.get_positions(timestamp), headings)
+
+    def send(self, sink):
+        samples = self.get_samples(self.clock() - self.latency)
+        self.sent += len(samples)
+        self.accepted += sink.push(samples)
+
+    def run(self, sink, duration=None, sleep=time.sleep):
+        deadline = self.clock()
+        end = None if duration is None else deadline + duration
+        while end is None or self.clock() < end:
+            self.send(sink)
+            deadline += self.period
+            now = self.clock()
+            if deadline <= now:
+                deadline = now + self.period
+            sleep(deadline - now)
+
+
+@click.command(help="Send synthetic fish positions to piscis in closed-loop mode.\n\n"
+                    "Every sample carries the time its camera frame was captured, in seconds of time.monotonic(). "
+                    "piscis compares that capture time with its own time.monotonic() to drop stale samples, predict "
+                    "where the fish is when the frame is shown and measure input-to-photon latency. The monotonic "
+                    "clock is only shared between processes on the same machine, so a tracker has to run on the host "
+                    "that runs piscis and stamp its samples with time.monotonic().")
+@click.option("--udp-port", default=None, type=click.IntRange(1, 65535),
+              help="Send samples as UDP datagrams to piscis started with --tracker-udp-port on this machine.")
+@click.option("--ring", default=None, help="Write samples into the ring piscis created with --tracker-ring.")
+@click.option("--arenas", default=ARENA_COUNT, type=click.IntRange(1, MAX_ARENA_COUNT), help="Number of arenas.")
+@click.option("--rate", default=SYNTHETIC_RATE, type=click.FloatRange(min=0., min_open=True),
+              help="Samples per second and arena.")
+@click.option("--duration", default=None, type=click.FloatRange(min=0.), help="Stop after this many seconds.")
+@click.option("--latency", default=0., type=click.FloatRange(min=0.),
+              help="Pretend every sample took this many seconds from camera to sending.")
+def main(udp_port, ring, arenas, rate, duration, latency):
+    if (udp_port is None) == (ring is None):
+        raise click.UsageError("Choose exactly one of --udp-port and --ring")
+    if ring is None:
+        sink = UdpTrackerSink(udp_port)
+    else:
+        try:
+            sink = SharedTrackerRing(ring, create=False)
+        except FileNotFoundError:
+            raise click.BadParameter("No tracker ring is called %s" % ring, param_hint="--ring")
+    tracker = SyntheticTracker(arenas, rate, latency=latency)
+    try:
+        tracker.run(sink, duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
+    click.echo("Sent %d samples, %d accepted" % (tracker.sent, tracker.accepted))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,149 @@
+import json
+from math import atan2, hypot, isfinite, pi
+import numpy as np
+from piscis.cache import LRUCache
+
+TRAJECTORY_SAMPLES = 256
+TRAJECTORY_CACHE_SIZE = 64
+CIRCLE_SAMPLES = 1024
+SPLINE_SEGMENT_SAMPLES = 64
+
+STRAIGHT = "straight"
+CIRCULAR = "circular"
+POLYLINE = "polyline"
+SPLINE = "spline"
+PATH_KINDS = (STRAIGHT, CIRCULAR, POLYLINE, SPLINE)
+
+HOLD = "hold"
+LOOP = "loop"
+BOUNCE = "bounce"
+REPEAT_MODES = (HOLD, LOOP, BOUNCE)
+
+PATH_KEYS = ("kind", "speed", "repeat", "to", "center", "clockwise", "points")
+
+
+class TrajectoryError(ValueError):
+    pass
+
+
+class Trajectory(object):
+    def __init__(self, table, length, speed, repeat=HOLD, key=None):
+        self.table = table
+        self.length = float(length)
+        self.speed = float(speed)
+        self.repeat = repeat
+        self.key = key
+        self.step = self.length / (len(table) - 1)
+
+    def get_distances(self, elapsed):
+        distances = np.maximum(np.asarray(elapsed, dtype=float), 0.) * self.speed
+        if self.repeat == LOOP:
+            return np.mod(distances, self.length)
+        if self.repeat == BOUNCE:
+            return self.length - np.abs(np.mod(distances, 2 * self.length) - self.length)
+        return np.minimum(distances, self.length)
+
+    def get_positions(self, elapsed):
+        if self.step <= 0:
+            return np.broadcast_to(self.table[0], np.shape(elapsed) + (2,)).copy()
+        scaled = self.get_distances(elapsed) / self.step
+        indices = np.minimum(scaled.astype(int), len(self.table) - 2)
+        fractions = (scaled - indices)[..., np.newaxis]
+        return self.table[indices] * (1. - fractions) + self.table[indices + 1] * fractions
+
+    def is_moving(self, elapsed):
+        if self.speed <= 0 or self.length <= 0:
+            return False
+        return self.repeat != HOLD or elapsed * self.speed < self.length
+
+
+def create_arc_length_table(points, samples=TRAJECTORY_SAMPLES):
+    points = np.asarray(points, dtype=float)
+    segments = np.hypot(*np.diff(points, axis=0).T)
+    points = np.concatenate((points[:1], points[1:][segments > 0]))
+    cumulative = np.concatenate(([0.], np.cumsum(segments[segments > 0])))
+    distances = np.linspace(0., cumulative[-1], samples)
+    table = np.column_stack((np.interp(distances, cumulative, points[:, 0]),
+                             np.interp(distances, cumulative, points[:, 1])))
+    return table, cumulative[-1]
+
+
+def sample_circle(starting_position, center, clockwise=False, samples=CIRCLE_SAMPLES):
+    start_x, start_y = starting_position
+    center_x, center_y = center
+    radius = hypot(start_x - center_x, start_y - center_y)
+    direction = -1. if clockwise else 1.
+    angles = atan2(start_y - center_y, start_x - center_x) + direction * np.linspace(0., 2 * pi, samples)
+    return np.column_stack((center_x + radius * np.cos(angles), center_y + radius * np.sin(angles)))
+
+
+def sample_spline(points, segment_samples=SPLINE_SEGMENT_SAMPLES):
+    points = np.asarray(points, dtype=float)
+    if len(points) < 3:
+        return points
+    padded = np.concatenate((points[:1], points, points[-1:]))
+    t = np.linspace(0., 1., segment_samples, endpoint=False)[:, np.newaxis]
+    t2, t3 = t * t, t * t * t
+    samples = list()
+    for p0, p1, p2, p3 in zip(padded, padded[1:], padded[2:], padded[3:]):
+        samples.append(.5 * (2 * p1 + (p2 - p0) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t2 +
+                             (3 * p1 - p0 - 3 * p2 + p3) * t3))
+    samples.append(points[-1:])
+    return np.concatenate(samples)
+
+
+def get_point(path, key):
+    return parse_point(path.get(key), key)
+
+
+def parse_point(point, name):
+    if not isinstance(point, (list, tuple)) or len(point) != 2 or \
+            not all(isinstance(value, (int, float)) and not isinstance(value, bool) and isfinite(value)
+                    for value in point):
+        raise TrajectoryError("%s of a path must be two numbers" % name)
+    return float(point[0]), float(point[1])
+
+
+def get_path_points(path, starting_position):
+    kind = path.get("kind")
+    if kind == STRAIGHT:
+        return [starting_position, get_point(path, "to")]
+    if kind == CIRCULAR:
+        return sample_circle(starting_position, get_point(path, "center"), bool(path.get("clockwise", False)))
+    points = path.get("points")
+    if not isinstance(points, list) or not points:
+        raise TrajectoryError("A %s path needs a list of points" % kind)
+    points = [starting_position] + [parse_point(point, "Every point") for point in points]
+    return sample_spline(points) if kind == SPLINE else points
+
+
+def compile_trajectory(path, starting_position, samples=TRAJECTORY_SAMPLES):
+    if not isinstance(path, dict):
+        raise TrajectoryError("A path must be a table")
+    unknown = sorted(set(path) - set(PATH_KEYS))
+    if unknown:
+        raise TrajectoryError("Unknown path settings: %s" % ", ".join(unknown))
+    if path.get("kind") not in PATH_KINDS:
+        raise TrajectoryError("The kind of a path must be one of %s" % ", ".join(PATH_KINDS))
+    speed = path.get("speed")
+    if isinstance(speed, bool) or not isinstance(speed, (int, float)) or not speed >= 0:
+        raise TrajectoryError("The speed of a path must be a non-negative number")
+    repeat = path.get("repeat", LOOP if path["kind"] == CIRCULAR else HOLD)
+    if repeat not in REPEAT_MODES:
+        raise TrajectoryError("The repeat of a path must be one of %s" % ", ".join(REPEAT_MODES))
+    starting_position = tuple(float(value) for value in starting_position)
+    table, length = create_arc_length_table(get_path_points(path, starting_position), samples)
+    return Trajectory(table, length, speed, repeat, get_trajectory_key(path, starting_position))
+
+
+def get_trajectory_key(path, starting_position):
+    return json.dumps(path, sort_keys=True), tuple(float(value) for value in starting_position)
+
+
+class TrajectoryCompiler(object):
+    def __init__(self, capacity=TRAJECTORY_CACHE_SIZE):
+        self.cache = LRUCache(capacity)
+
+    def compile(self, path, starting_position):
+        return self.cache.get_or_create(get_trajectory_key(path, starting_position),
+                                        lambda: compile_trajectory(path, starting_position))
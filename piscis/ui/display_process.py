@@ -0,0 +1,105 @@
+import multiprocessing
+from piscis.config import RASTER
+from piscis.layout import ArenaLayout
+from piscis.scheduler import FrameScheduler
+from piscis.shared_state import SharedArenaState, DisplayPredatorArray, unpack_color, DEFAULT_BACKGROUND
+from piscis.ui.render_loop import RenderLoop
+from piscis.ui.sprites import SpriteCache
+
+DISPLAY_JOIN_TIMEOUT = 2.
+
+
+class DisplayRenderer(object):
+    def __init__(self, window, shared_state):
+        self.window = window
+        self.shared_state = shared_state
+        self.predator_array = DisplayPredatorArray(shared_state.arena_count)
+        window.arena_canvas.geometry.add_listener(self.predator_array.mark_all_dirty)
+        self.sequence = None
+        self.backgrounds = [DEFAULT_BACKGROUND] * shared_state.arena_count
+        self.is_fullscreen = False
+        self.is_closed = False
+
+    def update(self):
+        if self.shared_state.get_sequence() == self.sequence:
+            return
+        self.sequence, record = self.shared_state.read()
+        self.predator_array.load(record["arenas"])
+        for i, value in enumerate(record["arenas"]["background"]):
+            color = unpack_color(value, DEFAULT_BACKGROUND)
+            if color != self.backgrounds[i]:
+                self.window.change_canvas_background(color, i)
+                self.backgrounds[i] = color
+        background = unpack_color(record["background"], DEFAULT_BACKGROUND)
+        if background != self.window.current_background_color:
+            self.window.change_background_color(background)
+        if record["fullscreen"] and not self.is_fullscreen:
+            self.window.set_fullscreen()
+            self.is_fullscreen = True
+        self.is_closed = bool(record["closed"])
+
+    def render(self, frame):
+        self.update()
+        if self.is_closed:
+            self.window.master.quit()
+            return False
+        self.predator_array.evaluate(frame.epoch)
+        boxes = self.window.arena_canvas.bounding_boxes(self.predator_array)
+        for i in self.predator_array.get_changed_indices():
+            self.window.arena_canvas.draw(i, boxes[i].tolist(), self.predator_array.colors[i])
+        self.window.arena_canvas.present()
+        return True
+
+
+class DisplayProcess(object):
+    def __init__(self, configuration, layout):
+        self.shared_state = SharedArenaState(layout.arena_count)
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=run_display, name="piscis-display", daemon=True,
+                                       args=(self.shared_state.name, layout.arena_count, layout.rows, layout.columns,
+                                             configuration.target_fps, configuration.render_mode))
+
+    def start(self):
+        self.process.start()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def publish(self, predator_array, backgrounds):
+        self.shared_state.publish(predator_array, backgrounds)
+
+    def publish_tracking(self, predator_array):
+        self.shared_state.publish_tracking(predator_array)
+
+    def change_background_color(self, color):
+        self.shared_state.set_background(color)
+
+    def set_fullscreen(self):
+        self.shared_state.set_fullscreen()
+
+    def stop(self):
+        self.shared_state.close_display()
+        if self.process.pid is not None:
+            self.process.join(DISPLAY_JOIN_TIMEOUT)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.shared_state.close()
+
+
+def run_display(name, arena_count, rows, columns, target_fps, render_mode):  # pragma: no cover
+    from tkinter import Tk
+    from piscis.ui.window import SecondaryWindow
+
+    shared_state = SharedArenaState(arena_count, name)
+    root = Tk()
+    layout = ArenaLayout(arena_count, rows, columns)
+    window = SecondaryWindow(root, layout, SpriteCache() if render_mode == RASTER else None, render_mode=render_mode)
+    for i in range(arena_count):
+        window.arena_canvas.draw_outlines(i)
+    renderer = DisplayRenderer(window, shared_state)
+    render_loop = RenderLoop(root, FrameScheduler(target_fps), renderer.render)
+    render_loop.wake()
+    root.mainloop()
+    render_loop.suspend()
+    shared_state.close()
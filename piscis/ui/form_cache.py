@@ -0,0 +1,85 @@
+from os import path, makedirs
+import hashlib
+import marshal
+import time
+from xml.etree import ElementTree
+
+FORM_CACHE_VERSION = 1
+
+
+def dump_element(element):
+    text = element.text if element.text and element.text.strip() else None
+    return element.tag, dict(element.attrib), text, [dump_element(child) for child in element]
+
+
+def load_element(data, parent=None):
+    tag, attributes, text, children = data
+    element = ElementTree.Element(tag, attributes) if parent is None else \
+        ElementTree.SubElement(parent, tag, attributes)
+    element.text = text
+    for child in children:
+        load_element(child, element)
+    return element
+
+
+def get_signature(file_path):
+    status = path.getmtime(file_path), path.getsize(file_path)
+    return FORM_CACHE_VERSION, status[0], status[1]
+
+
+class FormCache(object):
+    def __init__(self, cache_directory=None):
+        self.cache_directory = cache_directory
+        self.roots = dict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.load_seconds = 0.
+
+    def get_root(self, file_path):
+        file_path = path.abspath(file_path)
+        root = self.roots.get(file_path)
+        if root is not None:
+            self.hits += 1
+            return root
+        start = time.perf_counter()
+        root = self.load_cached_root(file_path)
+        if root is None:
+            self.misses += 1
+            root = ElementTree.parse(file_path).getroot()
+            self.store_cached_root(file_path, root)
+        else:
+            self.disk_hits += 1
+        self.load_seconds += time.perf_counter() - start
+        self.roots[file_path] = root
+        return root
+
+    def get_cache_path(self, file_path):
+        name = hashlib.sha1(file_path.encode("utf-8")).hexdigest()
+        return path.join(self.cache_directory, "%s.%s.form" % (path.basename(file_path), name[:12]))
+
+    def load_cached_root(self, file_path):
+        if self.cache_directory is None:
+            return None
+        try:
+            with open(self.get_cache_path(file_path), "rb") as cache_file:
+                signature, data = marshal.load(cache_file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if tuple(signature) != get_signature(file_path):
+            return None
+        return load_element(data)
+
+    def store_cached_root(self, file_path, root):
+        if self.cache_directory is None:
+            return
+        try:
+            makedirs(self.cache_directory, exist_ok=True)
+            with open(self.get_cache_path(file_path), "wb") as cache_file:
+                marshal.dump((get_signature(file_path), dump_element(root)), cache_file)
+        except OSError:
+            pass
+
+    def get_summary(self):
+        return "forms: %d parsed, %d from disk cache, %d from memory, %.2f ms loading" % (
+            self.misses, self.disk_hits, self.hits, self.load_seconds * 1000)
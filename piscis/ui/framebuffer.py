@@ -0,0 +1,178 @@
+import numpy as np
+from piscis.raster import BACKGROUND_COLOR, create_frame, parse_color
+
+
+def get_pixel_regions(cells, width, height):
+    x, y, cell_width, cell_height = cells.T
+    regions = np.rint(np.stack((x, y, x + cell_width, y + cell_height), axis=-1)).astype(int)
+    regions[:, 0::2] = np.clip(regions[:, 0::2], 0, width)
+    regions[:, 1::2] = np.clip(regions[:, 1::2], 0, height)
+    return regions
+
+
+HIDDEN_DISC = (0., 0., 2., 2.)
+
+
+def get_disc_spans(y, boxes, visible, left, right):
+    radius_x, radius_y = (boxes[:, 2] - boxes[:, 0]) / 2., (boxes[:, 3] - boxes[:, 1]) / 2.
+    visible = visible & (radius_x > 0) & (radius_y > 0)
+    radius_x[~visible], radius_y[~visible] = 1., 1.
+    center_x = boxes[:, 0] + radius_x - .5
+    offset = (y + .5 - boxes[:, 1] - radius_y) / radius_y
+    rest = 1. - offset * offset
+    half = radius_x * np.sqrt(np.maximum(rest, 0.))
+    begin, end = np.ceil(center_x - half), np.floor(center_x + half) + 1
+
+    def is_inside(x):
+        offset = (x - center_x) / radius_x
+        return offset * offset <= rest
+    begin -= is_inside(begin - 1)
+    begin += ~is_inside(begin)
+    end += is_inside(end)
+    end -= ~is_inside(end - 1)
+    begin = np.minimum(np.maximum(begin, left), right).astype(int)
+    end = np.minimum(np.maximum(end, left), right).astype(int)
+    empty = ~visible | (rest < 0) | (end <= begin)
+    return np.where(empty, left, begin), np.where(empty, left, end)
+
+
+def get_disc_rows(boxes, visible, top, bottom):
+    begin = np.where(visible, np.floor(boxes[:, 1]), bottom)
+    end = np.where(visible, np.ceil(boxes[:, 3]), top)
+    return np.clip(begin, top, bottom).astype(int), np.clip(end, top, bottom).astype(int)
+
+
+def expand_spans(begins, ends):
+    spans = np.flatnonzero(ends > begins)
+    lengths = ends[spans] - begins[spans]
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    spans = np.repeat(spans, lengths)
+    return spans, begins[spans] + offsets
+
+
+class Framebuffer(object):
+    def __init__(self, width, height, cells, color=BACKGROUND_COLOR):
+        self.colors = dict()
+        self.palette = np.empty((0, 3), dtype=np.uint8)
+        self.color = color
+        self.frame = create_frame(width, height, color)
+        self.backgrounds = [BACKGROUND_COLOR] * len(cells)
+        self.dirty = np.ones(len(cells), dtype=bool)
+        self.repaint = np.ones(len(cells), dtype=bool)
+        self.set_cells(width, height, cells)
+
+    def get_color_index(self, color):
+        index = self.colors.get(color)
+        if index is None:
+            index = self.colors[color] = len(self.palette)
+            self.palette = np.append(self.palette, np.array([parse_color(color)], dtype=np.uint8), axis=0)
+        return index
+
+    def set_cells(self, width, height, cells):
+        self.regions = get_pixel_regions(cells, width, height)
+        self.spans = np.empty((len(cells), max(1, (self.regions[:, 3] - self.regions[:, 1]).max()), 2), dtype=int)
+        self.spans[:] = self.regions[:, 0, np.newaxis, np.newaxis]
+        self.rows = self.regions[:, [3, 1]]
+        self.discs = [None] * len(cells)
+        self.painted_colors = [-1] * len(cells)
+        self.invalidate()
+
+    def fill(self, color):
+        self.color = color
+        index = self.get_color_index(color)
+        self.frame[:] = self.palette[index]
+        self.invalidate()
+
+    def resize(self, width, height, cells):
+        self.frame = create_frame(width, height, self.color)
+        self.set_cells(width, height, cells)
+
+    def invalidate(self):
+        self.dirty[:] = True
+        self.repaint[:] = True
+        self.is_filled = True
+
+    def set_background(self, index, color):
+        if color != self.backgrounds[index]:
+            self.backgrounds[index] = color
+            self.dirty[index] = True
+            self.repaint[index] = True
+
+    def draw(self, index, box, color):
+        disc = tuple(box), color
+        if disc != self.discs[index]:
+            self.discs[index] = disc
+            self.dirty[index] = True
+
+    def clear(self, index):
+        if self.discs[index] is not None:
+            self.discs[index] = None
+            self.dirty[index] = True
+
+    def compose(self):
+        indices = np.flatnonzero(self.dirty)
+        damage = self.paint(indices) if len(indices) else None
+        self.dirty[:] = False
+        self.repaint[:] = False
+        if self.is_filled:
+            self.is_filled = False
+            height, width = self.frame.shape[:2]
+            return 0, 0, width, height
+        return damage
+
+    def paint(self, indices):
+        colors, backgrounds, boxes = list(), list(), list()
+        repaint = self.repaint[indices]
+        for j, i in enumerate(indices.tolist()):
+            box, color = self.discs[i] or (HIDDEN_DISC, None)
+            color = -1 if color is None else self.get_color_index(color)
+            if color != -1 and self.painted_colors[i] not in (-1, color):
+                repaint[j] = True
+            self.painted_colors[i] = color
+            colors.append(color)
+            backgrounds.append(self.get_color_index(self.backgrounds[i]))
+            boxes.append(box)
+        colors, boxes = np.array(colors), np.array(boxes, dtype=float)
+        visible = colors >= 0
+
+        regions = self.regions[indices]
+        begin_row, end_row = get_disc_rows(boxes, visible, regions[:, 1], regions[:, 3])
+        cells, y = expand_spans(np.where(repaint, regions[:, 1], np.minimum(begin_row, self.rows[indices, 0])),
+                                np.where(repaint, regions[:, 3], np.maximum(end_row, self.rows[indices, 1])))
+        self.rows[indices, 0], self.rows[indices, 1] = begin_row, end_row
+        if not len(y):
+            return None
+        left, right = regions[cells, 0], regions[cells, 2]
+        begin, end = get_disc_spans(y, boxes[cells], visible[cells], left, right)
+        rows = indices[cells], y - regions[cells, 1]
+        old_begin, old_end = self.spans[rows + (0,)], self.spans[rows + (1,)]
+        self.spans[rows + (0,)], self.spans[rows + (1,)] = begin, end
+
+        empty, old_empty = end <= begin, old_end <= old_begin
+        begin, end = np.where(empty, old_begin, begin), np.where(empty, old_begin, end)
+        old_begin, old_end = np.where(old_empty, begin, old_begin), np.where(old_empty, begin, old_end)
+        dense = repaint[cells]
+        spans, x = expand_spans(
+            np.concatenate((np.where(dense, left, np.minimum(begin, old_begin)),
+                            np.where(dense, right, np.minimum(end, old_end)))),
+            np.concatenate((np.where(dense, right, np.maximum(begin, old_begin)),
+                            np.where(dense, right, np.maximum(end, old_end)))))
+        if not len(x):
+            return None
+        spans %= len(y)
+        is_disc = (x >= begin[spans]) & (x < end[spans])
+        y, cells = y[spans], cells[spans]
+        self.frame[y, x] = self.palette[np.where(is_disc, colors[cells], np.array(backgrounds)[cells])]
+        return int(x.min()), int(y.min()), int(x.max()) + 1, int(y.max()) + 1
+
+
+class FramebufferItem(object):
+    def __init__(self, arena_canvas, index):
+        self.arena_canvas = arena_canvas
+        self.index = index
+
+    def update(self, coordinates, color):
+        self.arena_canvas.draw(self.index, coordinates, color)
+
+    def delete(self):
+        self.arena_canvas.framebuffer.clear(self.index)
@@ -0,0 +1,42 @@
+import numpy as np
+from piscis.model import calculate_bounding_boxes
+
+
+class CanvasGeometry(object):
+    def __init__(self, canvas, layout=None):
+        self.canvas = canvas
+        self.layout = layout
+        self.listeners = list()
+        self.width = None
+        self.height = None
+        self.resize(int(canvas.winfo_reqwidth()), int(canvas.winfo_reqheight()))
+        canvas.bind("<Configure>", self.on_configure, add="+")
+
+    def resize(self, width, height):
+        if (width, height) == (self.width, self.height):
+            return False
+        self.width, self.height = width, height
+        if self.layout is None:
+            self.cells = np.array([[0., 0., width, height]])
+        else:
+            self.cells = self.layout.get_cells(width, height)
+        x, y = self.cells[:, 0], self.cells[:, 1]
+        self.cell_widths = self.cells[:, 2].copy()
+        self.cell_heights = self.cells[:, 3].copy()
+        self.offsets = np.stack((x, y, x, y), axis=-1)
+        return True
+
+    def on_configure(self, event):
+        if event.width > 1 and event.height > 1 and self.resize(event.width, event.height):
+            for listener in self.listeners:
+                listener()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def bounding_boxes(self, predator_array):
+        return calculate_bounding_boxes(self.cell_widths, self.cell_heights, predator_array.positions,
+                                        predator_array.diameters) + self.offsets
+
+    def normalize(self, x, y):
+        return x / float(self.width), y / float(self.height)
@@ -0,0 +1,237 @@
+from collections import Counter, deque
+from itertools import count
+from xml.etree import ElementTree
+from piscis.ui.form_cache import FormCache
+from piscis.ui.toolkit import get_form_path
+from piscis.ui.window import MainWindow
+
+CANVAS_CLASSES = ("tk.Canvas",)
+DEFAULT_CANVAS_WIDTH = 378
+DEFAULT_CANVAS_HEIGHT = 265
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+PUT_HISTORY = 8
+
+
+class FakeWidget(object):
+    def __init__(self, clock=None, **options):
+        self.clock = clock
+        self.options = options
+        self.value = "0"
+        self.bindings = dict()
+        self.after_ids = count(1)
+        self.scheduled = dict()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+    def winfo_toplevel(self):
+        return self
+
+    def winfo_screenwidth(self):
+        return SCREEN_WIDTH
+
+    def winfo_screenheight(self):
+        return SCREEN_HEIGHT
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+
+    def cget(self, option):
+        return self.options.get(option)
+
+    def bind(self, sequence, callback, add=None):
+        self.bindings[sequence] = callback
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def delete(self, first, last=None):
+        self.value = ""
+
+    def insert(self, index, value):
+        self.value = str(value)
+
+    def index(self, tab):
+        return 0
+
+    def after(self, milliseconds, callback, *args):
+        after_id = "after#%d" % next(self.after_ids)
+        due = None if self.clock is None else self.clock() + milliseconds / 1000.
+        self.scheduled[after_id] = milliseconds, callback, args, due
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(after_id, None)
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, dict()
+        for _, callback, args, _ in scheduled.values():
+            callback(*args)
+        return len(scheduled)
+
+    def get_next_due(self, exclude=None):
+        dues = [due for after_id, (_, _, _, due) in self.scheduled.items() if after_id != exclude]
+        return min(dues) if dues else None
+
+    def run_due(self):
+        now = self.clock()
+        due_ids = sorted((due, int(after_id[6:]), after_id) for after_id, (_, _, _, due) in self.scheduled.items()
+                         if due <= now)
+        for _, _, after_id in due_ids:
+            _, callback, args, _ = self.scheduled.pop(after_id)
+            callback(*args)
+        return len(due_ids)
+
+
+class FakeEvent(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class FakeCanvas(FakeWidget):
+    def __init__(self, width=DEFAULT_CANVAS_WIDTH, height=DEFAULT_CANVAS_HEIGHT, **options):
+        FakeWidget.__init__(self, None, width=width, height=height, **options)
+        self.items = dict()
+        self.item_ids = count(1)
+        self.calls = Counter()
+
+    def winfo_width(self):
+        return int(self.options["width"])
+
+    def winfo_height(self):
+        return int(self.options["height"])
+
+    winfo_reqwidth = winfo_width
+    winfo_reqheight = winfo_height
+
+    def configure(self, **options):
+        size = self.winfo_width(), self.winfo_height()
+        FakeWidget.configure(self, **options)
+        if (self.winfo_width(), self.winfo_height()) != size and "<Configure>" in self.bindings:
+            self.bindings["<Configure>"](FakeEvent(width=self.winfo_width(), height=self.winfo_height()))
+
+    config = configure
+
+    def winfo_rgb(self, color):
+        return 0, 0, 0
+
+    def create_item(self, kind, coordinates, options):
+        self.calls["create_" + kind] += 1
+        item = next(self.item_ids)
+        self.items[item] = {"kind": kind, "coordinates": tuple(coordinates), "options": dict(options)}
+        return item
+
+    def create_oval(self, *coordinates, **options):
+        return self.create_item("oval", coordinates, options)
+
+    def create_rectangle(self, *coordinates, **options):
+        return self.create_item("rectangle", coordinates, options)
+
+    def create_line(self, *coordinates, **options):
+        return self.create_item("line", coordinates, options)
+
+    def create_text(self, *coordinates, **options):
+        return self.create_item("text", coordinates, options)
+
+    def create_image(self, *coordinates, **options):
+        return self.create_item("image", coordinates, options)
+
+    def coords(self, item, *coordinates):
+        self.calls["coords"] += 1
+        if coordinates:
+            self.items[item]["coordinates"] = tuple(coordinates)
+        return list(self.items[item]["coordinates"])
+
+    def itemconfigure(self, item, **options):
+        self.calls["itemconfigure"] += 1
+        self.items[item]["options"].update(options)
+
+    def delete(self, item):
+        self.calls["delete"] += 1
+        self.items.pop(item, None)
+
+    def find_kind(self, kind):
+        return [item for item, properties in self.items.items() if properties["kind"] == kind]
+
+
+class FakePhotoImage(object):
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.puts = deque(maxlen=PUT_HISTORY)
+        self.put_count = 0
+
+    def put(self, data, to=None):
+        self.puts.append((data, to))
+        self.put_count += 1
+
+
+class FakeStyle(object):
+    def __init__(self):
+        self.styles = dict()
+
+    def configure(self, style, **options):
+        self.styles.setdefault(style, dict()).update(options)
+
+
+class FakeBuilder(object):
+    def __init__(self):
+        self.definitions = dict()
+        self.objects = dict()
+
+    def add_from_file(self, file_path):
+        self.add_from_xmlnode(ElementTree.parse(file_path).getroot())
+
+    def add_from_xmlnode(self, root):
+        for element in root.iter("object"):
+            properties = dict((child.get("name"), child.text) for child in element.findall("property"))
+            self.definitions[element.get("id")] = element.get("class"), properties
+
+    def get_object(self, name, master=None):
+        if name not in self.objects:
+            self.objects[name] = self.create_object(*self.definitions[name])
+        return self.objects[name]
+
+    def create_object(self, widget_class, properties):
+        if widget_class in CANVAS_CLASSES:
+            return FakeCanvas(int(properties.get("width", DEFAULT_CANVAS_WIDTH)),
+                              int(properties.get("height", DEFAULT_CANVAS_HEIGHT)))
+        return FakeWidget()
+
+    def connect_callbacks(self, callbacks):
+        pass
+
+
+class HeadlessToolkit(object):
+    def __init__(self, form_cache=None):
+        self.form_cache = FormCache() if form_cache is None else form_cache
+        self.toplevels = list()
+
+    def load_form(self, name):
+        builder = FakeBuilder()
+        builder.add_from_xmlnode(self.form_cache.get_root(get_form_path(name)))
+        return builder
+
+    def create_toplevel(self):
+        toplevel = FakeWidget()
+        self.toplevels.append(toplevel)
+        return toplevel
+
+    def create_style(self):
+        return FakeStyle()
+
+    def create_image(self, width, height):
+        return FakePhotoImage(width, height)
+
+
+def create_headless_window(configuration=None, toolkit=None, master=None, clock=None):
+    return MainWindow(FakeWidget() if master is None else master, configuration,
+                      HeadlessToolkit() if toolkit is None else toolkit, clock=clock)
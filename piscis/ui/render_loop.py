@@ -0,0 +1,34 @@
+class RenderLoop(object):
+    def __init__(self, master, frame_scheduler, render):
+        self.master = master
+        self.frame_scheduler = frame_scheduler
+        self.render = render
+        self.after_id = None
+
+    def is_running(self):
+        return self.after_id is not None
+
+    def wake(self):
+        if self.after_id is None:
+            self.frame_scheduler.start()
+            self.schedule()
+
+    def suspend(self):
+        if self.after_id is not None:
+            self.master.after_cancel(self.after_id)
+            self.after_id = None
+        self.frame_scheduler.stop()
+
+    def schedule(self):
+        self.after_id = self.master.after(self.frame_scheduler.get_delay(), self.tick)
+
+    def tick(self):
+        self.after_id = None
+        frame = self.frame_scheduler.next_frame()
+        is_animating = self.render(frame)
+        if self.after_id is not None:
+            return
+        if is_animating:
+            self.schedule()
+        else:
+            self.frame_scheduler.stop()
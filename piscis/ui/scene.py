@@ -0,0 +1,28 @@
+class SceneItem(object):
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.item = None
+        self.coordinates = None
+        self.color = None
+
+    def update(self, coordinates, color):
+        coordinates = tuple(coordinates)
+        if self.item is None:
+            self.item = self.canvas.create_oval(*coordinates, fill=color, outline=color)
+        else:
+            self.move(coordinates)
+            self.recolor(color)
+        self.coordinates, self.color = coordinates, color
+
+    def move(self, coordinates):
+        if coordinates != self.coordinates:
+            self.canvas.coords(self.item, *coordinates)
+
+    def recolor(self, color):
+        if color != self.color:
+            self.canvas.itemconfigure(self.item, fill=color, outline=color)
+
+    def delete(self):
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item, self.coordinates, self.color = None, None, None
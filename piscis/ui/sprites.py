@@ -0,0 +1,85 @@
+from base64 import b64encode
+from tkinter import PhotoImage
+from piscis.cache import LRUCache
+from piscis.raster import create_disc_sprite, encode_png
+from piscis.ui.scene import SceneItem
+
+SPRITE_CAPACITY = 128
+SPRITE_TOLERANCE = .01
+
+
+def quantize_diameter(diameter, tolerance=SPRITE_TOLERANCE):
+    diameter = int(round(diameter))
+    step = max(1, int(diameter * tolerance))
+    return step * int(round(diameter / float(step)))
+
+
+def create_photo_image(diameter, color):  # pragma: no cover
+    return PhotoImage(data=b64encode(encode_png(create_disc_sprite(diameter, color))).decode("ascii"), format="png")
+
+
+def create_scene_item(canvas, sprite_cache=None):
+    if sprite_cache is None:
+        return SceneItem(canvas)
+    return SpriteItem(canvas, sprite_cache)
+
+
+class SpriteCache(LRUCache):
+    def __init__(self, capacity=SPRITE_CAPACITY, create_image=create_photo_image):
+        LRUCache.__init__(self, capacity)
+        self.create_image = create_image
+        self.evictions = 0
+
+    def get_sprite(self, diameter, color):
+        if diameter <= 0:
+            return None
+        return self.get_or_create((diameter, color), lambda: self.create_image(diameter, color))
+
+    def evict(self, key, value):
+        self.evictions += 1
+
+
+class SpriteItem(object):
+    def __init__(self, canvas, sprite_cache):
+        self.canvas = canvas
+        self.sprite_cache = sprite_cache
+        self.item = None
+        self.center = None
+        self.sprite = None
+
+    def update(self, coordinates, color):
+        begin_x, begin_y, end_x, end_y = coordinates
+        center = (begin_x + end_x) / 2., (begin_y + end_y) / 2.
+        sprite = self.sprite_cache.get_sprite(quantize_diameter(end_x - begin_x), self.resolve_color(color))
+        if self.item is None:
+            self.item = self.canvas.create_image(*center, image=get_image_name(sprite), anchor="center")
+        else:
+            self.move(center)
+            self.replace(sprite)
+        self.center, self.sprite = center, sprite
+
+    def move(self, center):
+        if center != self.center:
+            self.canvas.coords(self.item, *center)
+
+    def replace(self, sprite):
+        if sprite is not self.sprite:
+            self.canvas.itemconfigure(self.item, image=get_image_name(sprite))
+
+    def resolve_color(self, color):
+        return resolve_color(self.canvas, color)
+
+    def delete(self):
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item, self.center, self.sprite = None, None, None
+
+
+def resolve_color(canvas, color):
+    if color.startswith("#"):
+        return color
+    return "#%04x%04x%04x" % canvas.winfo_rgb(color)
+
+
+def get_image_name(sprite):
+    return "" if sprite is None else sprite
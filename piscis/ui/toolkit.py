@@ -0,0 +1,31 @@
+from os import path
+from tkinter import Toplevel, PhotoImage
+from tkinter.ttk import Style
+from pygubu import Builder
+from piscis.ui.form_cache import FormCache
+
+FORMS_DIRECTORY = path.join(path.dirname(path.abspath(__file__)), "forms")
+
+
+def get_form_path(name):
+    return path.join(FORMS_DIRECTORY, name)
+
+
+class TkToolkit(object):
+    def __init__(self, form_cache=None):
+        self.form_cache = FormCache() if form_cache is None else form_cache
+
+    def load_form(self, name):
+        builder = Builder()
+        builder.add_resource_path(FORMS_DIRECTORY)
+        builder.add_from_xmlnode(self.form_cache.get_root(get_form_path(name)))
+        return builder
+
+    def create_toplevel(self):  # pragma: no cover
+        return Toplevel()
+
+    def create_style(self):  # pragma: no cover
+        return Style()
+
+    def create_image(self, width, height):  # pragma: no cover
+        return PhotoImage(width=width, height=height)
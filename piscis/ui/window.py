@@ -1,18 +1,42 @@
+from itertools import islice
 from os import path
-import random
-from sched import scheduler
-from threading import Timer
-from tkinter import Toplevel, ALL
+import tkinter
+from tkinter import ALL, END
 from tkinter.colorchooser import askcolor
-from tkinter.messagebox import showinfo
-from tkinter.ttk import Style
-from pygubu import TkApplication, Builder
+from tkinter.filedialog import asksaveasfilename, askopenfilename
+from tkinter.messagebox import showinfo, showerror
+from pygubu import TkApplication
 import time
-from piscis.model import PredatorFactory
+import numpy as np
+from piscis.clock import SystemClock
+from piscis.config import Configuration, VECTOR, RASTER, FRAMEBUFFER
+from piscis.control import ControlServer, ControlDispatcher
+from piscis.events import EventLog, EventWriter, START, PAUSE as PAUSE_EVENT, STOP
+from piscis.instrumentation import FrameStatistics, StartupTimer
+from piscis.intervals import IntervalEngine, RUN, PAUSE
+from piscis import model
+from piscis.model import PredatorFactory, PredatorArray, LINEAR, calculate_bounding_boxes
+from piscis.profiler import RuntimeProfiler, ProfilerError, PROFILE_SECONDS, match_functions, match_class, \
+    match_module, match_name, get_profile_paths
+from piscis.protocol import load_protocol, create_seed, ProtocolError
+from piscis.raster import encode_ppm
+from piscis.scheduler import FrameScheduler
+from piscis.session_trace import SessionRecorder, create_header, POSITION, SCALE, SPEED, GENERATE, BACKGROUND, COLOR
+from piscis.session_trace import PROFILE, RUN_INTERVAL, PAUSE_INTERVAL, SELECT_TAB, START as START_ACTION, \
+    STOP as STOP_ACTION
+from piscis.snapshot import SessionSnapshot
+from piscis.telemetry import TelemetryRing, IDLE
+from piscis.timeline import TimelineCompiler
+from piscis.tracker import ClosedLoop, UdpTrackerSource, open_tracker_ring
+from piscis.ui.display_process import DisplayProcess
+from piscis.ui.framebuffer import Framebuffer, FramebufferItem
+from piscis.ui.geometry import CanvasGeometry
+from piscis.ui.render_loop import RenderLoop
+from piscis.ui.sprites import SpriteCache, create_scene_item, resolve_color
+from piscis.ui.toolkit import TkToolkit
 
 MIN_TO_SEC = 60
 
-SCRIPT_DIR = path.dirname(path.abspath(__file__))
 BACKGROUND_COLOR = "#FFFFFF"
 PREDATOR_COLOR = "#000000"
 
@@ -25,56 +49,259 @@ PISCIS_TITLE = "Piscis"
 PISCIS_VERSION = "2.0"
 PISCIS_CONTACT = "Contact: soojin.ryu@mpimf-heidelberg.mpg.de"
 
+STATISTICS_REFRESH_MS = 500
+
+SHORT_TAB_NAME_LIMIT = 8
+
 
 # noinspection PyAttributeOutsideInit
 class MainWindow(TkApplication):
+    def __init__(self, master, configuration=None, toolkit=None, startup_timer=None, clock=None):
+        if configuration is None:
+            configuration = Configuration()
+        self.configuration = configuration
+        self.clock = SystemClock() if clock is None else clock
+        self.toolkit = TkToolkit() if toolkit is None else toolkit
+        self.startup_timer = StartupTimer() if startup_timer is None else startup_timer
+        TkApplication.__init__(self, master)
+
     def _create_ui(self):
-        self.pygubu_builder = Builder()
-        self.pygubu_builder.add_from_file(path.join(SCRIPT_DIR, "forms", "main_window.ui"))
+        with self.startup_timer.phase("main window form"):
+            self.pygubu_builder = self.toolkit.load_form("main_window.ui")
 
-        self.secondary_window = SecondaryWindow(Toplevel())
+        self.layout = self.configuration.create_layout()
+        self.sprite_cache = SpriteCache() if self.configuration.render_mode == RASTER else None
+        with self.startup_timer.phase("secondary window"):
+            self.create_secondary_window()
         # self.secondary_window.master.withdraw()
 
-        self.predator = [None, None, None, None]
+        self.predator = [None] * self.layout.arena_count
+        self.display_background_color = BACKGROUND_COLOR
+        with self.startup_timer.phase("arena state"):
+            self.create_event_log()
+            self.telemetry = None
+            if self.configuration.telemetry_path is not None:
+                self.telemetry = TelemetryRing(len(self.predator), self.configuration.telemetry_frames)
+            self.predator_array = PredatorArray(len(self.predator), TimelineCompiler(self.configuration.target_fps),
+                                               self.event_log)
         self.drawer = PredatorDrawer(None)
-        self.current_tab = 0
         self.tabs = list()
+        self.visible_tab = None
         self.remaining_secs = 0
         self.all_tab = None
-        self.after_id = 0
-
-        self.isDrawOnAllScreenActive = [True, True, True, True]
+        self.notebook = None
+        self.frame_scheduler = FrameScheduler(self.configuration.target_fps, self.configuration.frame_policy,
+                                              self.clock.monotonic, self.clock.time)
+        self.render_loop = RenderLoop(self.master, self.frame_scheduler, self.render)
+        self.interval_engine = IntervalEngine(self.clock.monotonic, self.master)
+        self.frame_statistics = FrameStatistics(self.configuration.target_fps, len(self.predator))
+        self.frame_statistics_window = None
+        self.profiler = RuntimeProfiler(get_hot_paths())
+        self.profile_after_id = None
+        self.protocol = None
+        self.protocol_path = None
+
+        self.isDrawOnAllScreenActive = [True] * self.layout.arena_count
 
         self.predator_factory = PredatorFactory()
 
         self.setup()
+        with self.startup_timer.phase("snapshot"):
+            self.open_snapshot()
+        self.session_recorder = None
+        if self.configuration.session_trace_path is not None:
+            self.session_recorder = SessionRecorder(self.configuration.session_trace_path,
+                                                    create_header(self.configuration, self.layout),
+                                                    self.clock.monotonic)
+        with self.startup_timer.phase("tracker"):
+            self.start_tracker()
+        with self.startup_timer.phase("control server"):
+            self.start_control_server()
+
+    def create_secondary_window(self):
+        self.secondary_window = None
+        self.display_process = None
+        if self.configuration.display_process:
+            self.display_process = DisplayProcess(self.configuration, self.layout)
+            self.display_process.start()
+        else:
+            self.secondary_window = SecondaryWindow(self.toolkit.create_toplevel(), self.layout, self.sprite_cache,
+                                                    self.toolkit, self.configuration.render_mode)
+
+    def open_snapshot(self):
+        self.snapshot = None
+        if self.configuration.snapshot_path is None:
+            return
+        if self.configuration.resume:
+            snapshot = SessionSnapshot(self.configuration.snapshot_path, self.layout.arena_count, resume=True)
+            self.resume_session(snapshot.get_arena_states(), snapshot.get_protocol_path(),
+                                snapshot.get_protocol_seed())
+        else:
+            snapshot = SessionSnapshot(self.configuration.snapshot_path, self.layout.arena_count)
+        self.snapshot = snapshot
+        self.snapshot.set_protocol_path(self.protocol_path)
+        for i, tab in enumerate(self.tabs):
+            self.snapshot.save_arena(i, tab)
+            self.snapshot.set_phase(i, self.get_arena_phase(i))
+
+    def resume_session(self, arena_states, protocol_path, protocol_seed=None):
+        protocol = None
+        if protocol_path is not None:
+            try:
+                protocol = load_protocol(protocol_path, len(self.tabs))
+            except (ProtocolError, OSError, ValueError):
+                protocol = None
+        if protocol is not None:
+            if protocol.seed is None:
+                protocol.seed = protocol_seed
+            protocol.compile(self.predator_array.timeline_compiler)
+            self.protocol, self.protocol_path = protocol, protocol_path
+        for i, arena_state in enumerate(arena_states):
+            if arena_state.is_torn:
+                continue
+            trials = None
+            arena_protocol = None if protocol is None else protocol.get_arena(i)
+            if arena_protocol is not None and arena_state.trial >= 0 and \
+                    (protocol.seed is not None or not arena_protocol.randomize):
+                trials = islice(protocol.expand(i), arena_state.trial, None)
+            self.tabs[i].restore(arena_state, trials)
+
+    def get_arena_phase(self, id_number):
+        phase = self.interval_engine.get_phase(id_number)
+        if phase is not None:
+            return phase.name
+        return RUN if self.is_running(id_number) else IDLE
+
+    def record_action(self, id_number, action, *arguments):
+        if self.session_recorder is not None:
+            self.session_recorder.record(id_number, action, *arguments)
+
+    def on_arena_changed(self, id_number):
+        self.publish_display_state()
+        if self.snapshot is not None:
+            self.snapshot.save_arena(id_number, self.tabs[id_number])
+
+    def save_remaining_seconds(self, id_number):
+        if self.snapshot is not None:
+            tab = self.tabs[id_number]
+            self.snapshot.save_remaining_seconds(id_number, tab.remaining_secs_run, tab.remaining_secs_pause)
+
+    def publish_display_state(self):
+        if self.display_process is not None:
+            self.display_process.publish(self.predator_array, [tab.current_background_color for tab in self.tabs])
+
+    def get_startup_report(self):
+        report = self.startup_timer.get_report()
+        return report + "\n" + self.toolkit.form_cache.get_summary()
+
+    def start_control_server(self):
+        self.control_server = None
+        self.control_after_id = None
+        if self.configuration.control_port is None and self.configuration.control_udp_port is None:
+            return
+        self.control_server = ControlServer(port=self.configuration.control_port or 0, clock=self.clock.monotonic,
+                                            udp_port=self.configuration.control_udp_port)
+        self.control_server.start()
+        self.control_dispatcher = ControlDispatcher(self)
+        self.process_control_commands()
+
+    def process_control_commands(self):
+        try:
+            self.control_server.process_pending(self.control_dispatcher)
+        finally:
+            self.control_after_id = self.master.after(self.control_server.get_poll_interval(),
+                                                      self.process_control_commands)
+
+    def start_tracker(self):
+        self.closed_loop = None
+        sources = list()
+        if self.configuration.tracker_udp_port is not None:
+            sources.append(UdpTrackerSource(port=self.configuration.tracker_udp_port))
+        if self.configuration.tracker_ring is not None:
+            sources.append(open_tracker_ring(self.configuration.tracker_ring))
+        if sources:
+            self.attach_closed_loop(ClosedLoop(sources, len(self.tabs), self.clock.monotonic,
+                                               self.configuration.display_lag))
+
+    def attach_closed_loop(self, closed_loop):
+        self.closed_loop = closed_loop
+        if self.configuration.follow is not None:
+            for i in range(len(self.tabs)):
+                closed_loop.follow(i, *self.configuration.follow)
+        self.render_loop.wake()
+
+    def create_event_log(self):
+        self.event_log = None
+        self.event_writer = None
+        if self.configuration.event_log_path is not None:
+            self.event_log = EventLog(clock=self.clock.monotonic_ns)
+            self.event_writer = EventWriter(self.event_log, self.configuration.event_log_path)
+            self.event_writer.start()
+
+    def attach_event_log(self, event_log):
+        self.event_log = event_log
+        self.predator_array.event_log = event_log
+
+    def log_event(self, kind, id_number, epoch=0, value=0.):
+        if self.event_log is not None:
+            self.event_log.record(kind, id_number, epoch, value)
 
     def setup(self):
         self.set_title(PISCIS_TITLE)
 
-        self.pygubu_builder.get_object('main_frame', self.master)
-        self.set_menu(self.pygubu_builder.get_object('main_menu', self.master))
+        with self.startup_timer.phase("main window"):
+            self.pygubu_builder.get_object('main_frame', self.master)
+            self.set_menu(self.pygubu_builder.get_object('main_menu', self.master))
 
         self.create_tabs()
 
         self.pygubu_builder.connect_callbacks(self)
 
-        for i, item in enumerate(self.predator):
-            draw_all_outlines(self.tabs[i], self.all_tab, self.secondary_window, i)
+        with self.startup_timer.phase("outlines"):
+            for i in range(self.layout.arena_count):
+                self.all_tab.arena_canvas.draw_outlines(i)
+                if self.secondary_window is not None:
+                    self.secondary_window.arena_canvas.draw_outlines(i)
+        for screen in (self.all_tab, self.secondary_window):
+            if screen is not None:
+                screen.arena_canvas.geometry.add_listener(self.on_layout_changed)
 
     def create_tabs(self):
-        self.all_tab = self._create_canvas_tab('tab_all_screens')
-        self.tabs.append(self._create_canvas_tab('tab_single_tab_one'))
-        self.tabs.append(self._create_canvas_tab('tab_single_tab_two'))
-        self.tabs.append(self._create_canvas_tab('tab_single_tab_three'))
-        self.tabs.append(self._create_canvas_tab('tab_single_tab_four'))
-
-    def _create_canvas_tab(self, identifier):
-        if identifier == 'tab_all_screens':
-            return AllCanvasTab(self.pygubu_builder.get_object(identifier, self.master))
-        else:
-            self.current_tab += 1
-            return SingleCanvasTab(self.pygubu_builder.get_object(identifier, self.master), self.current_tab - 1, self)
+        with self.startup_timer.phase("all screens tab"):
+            self.all_tab = AllCanvasTab(self.pygubu_builder.get_object('tab_all_screens', self.master), self.layout,
+                                        self.sprite_cache, self.toolkit, self.configuration.render_mode)
+            self.notebook = self.pygubu_builder.get_object('notebook', self.master)
+        with self.startup_timer.phase("arena tabs"):
+            for i in range(self.layout.arena_count):
+                self.tabs.append(self._create_canvas_tab(i))
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    def _create_canvas_tab(self, id_number):
+        builder = self.toolkit.load_form("single_screen_tab.ui")
+        frame = builder.get_object('tab_single_screen', self.notebook)
+        frame.configure(text=get_screen_name(id_number))
+        self.notebook.add(frame, text=get_tab_name(id_number, self.layout.arena_count))
+        return SingleCanvasTab(frame, id_number, self)
+
+    def on_tab_changed(self, event=None):
+        self.show_tab(self.notebook.index('current') - 1)
+        self.record_action(self.visible_tab, SELECT_TAB)
+
+    def show_tab(self, index):
+        self.visible_tab = index if index is not None and 0 <= index < len(self.tabs) else None
+        if self.visible_tab is not None:
+            self.tabs[self.visible_tab].build()
+            self.predator_array.mark_dirty(self.visible_tab)
+            self.render_loop.wake()
+
+    def on_layout_changed(self):
+        self.predator_array.mark_all_dirty()
+        self.render_loop.wake()
+
+    def get_visible_tab(self):
+        if self.visible_tab is None:
+            return None
+        return self.tabs[self.visible_tab]
 
     @staticmethod
     def on_about():
@@ -82,20 +309,119 @@ class MainWindow(TkApplication):
 
     def on_exit(self):
         self.stop_all_simulations()
+        self.render_loop.suspend()
+        if self.profile_after_id is not None:
+            self.master.after_cancel(self.profile_after_id)
+            self.profile_after_id = None
+            self.profiler.stop()
+        if self.control_server is not None:
+            self.master.after_cancel(self.control_after_id)
+            self.control_server.stop()
+        if self.closed_loop is not None:
+            self.closed_loop.close()
+        if self.display_process is not None:
+            self.display_process.stop()
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        self.export_session_statistics()
+        if self.event_writer is not None:
+            self.event_writer.stop()
+        if self.telemetry is not None:
+            self.telemetry.export_npz(self.configuration.telemetry_path)
         self.master.quit()
 
+    def on_run_protocol(self):
+        file_path = askopenfilename(title="Run Protocol", filetypes=[("Protocol", "*.json *.toml")])
+        if not file_path:
+            return
+        try:
+            protocol = load_protocol(file_path, len(self.tabs))
+        except (ProtocolError, OSError, ValueError) as error:
+            showerror("Invalid Protocol", str(error))
+            return
+        self.run_protocol(protocol, file_path)
+
+    def run_protocol(self, protocol, file_path=None):
+        self.stop_all_simulations()
+        protocol.compile(self.predator_array.timeline_compiler)
+        self.protocol = protocol
+        self.protocol_path = file_path
+        protocol_seed = None
+        if protocol.seed is None:
+            protocol.seed = protocol_seed = create_seed()
+        if self.snapshot is not None:
+            self.snapshot.set_protocol_path(file_path)
+            self.snapshot.set_protocol_seed(protocol_seed)
+        for arena_protocol in protocol.arenas:
+            self.tabs[arena_protocol.arena].start_trials(protocol.expand(arena_protocol.arena))
+
+    def on_frame_statistics(self):
+        if self.frame_statistics_window is None or not self.frame_statistics_window.is_open():
+            self.frame_statistics_window = FrameStatisticsWindow(self.toolkit.create_toplevel(),
+                                                                 self.get_statistics_summary, self.toolkit)
+
+    def get_statistics_summary(self):
+        summary = self.frame_statistics.get_summary()
+        if self.closed_loop is not None:
+            summary += "\n" + self.closed_loop.get_summary()
+        return summary
+
+    def on_export_frame_statistics(self):
+        file_path = asksaveasfilename(title="Export Frame Statistics", defaultextension=".csv",
+                                      filetypes=[("CSV", "*.csv")])
+        if file_path:
+            self.frame_statistics.export_csv(file_path)
+
+    def export_session_statistics(self):
+        if self.configuration.statistics_directory is not None:
+            file_name = time.strftime("frame_statistics_%Y%m%d_%H%M%S.csv")
+            self.frame_statistics.export_csv(path.join(self.configuration.statistics_directory, file_name))
+
+    def on_profile(self):
+        file_path = asksaveasfilename(title="Profile Rendering", defaultextension=".txt",
+                                      filetypes=[("Profile Report", "*.txt")])
+        if not file_path:
+            return
+        try:
+            self.start_profiling(PROFILE_SECONDS, path.splitext(file_path)[0], notify=True)
+        except ProfilerError as error:
+            showerror("Profile Rendering", str(error))
+
+    def start_profiling(self, seconds=PROFILE_SECONDS, prefix=None, notify=False):
+        if prefix is None:
+            prefix = path.join(self.configuration.profile_directory or ".", time.strftime("profile_%Y%m%d_%H%M%S"))
+        self.profiler.start()
+        self.profile_after_id = self.master.after(int(seconds * 1000), self.finish_profiling, prefix, notify)
+        return get_profile_paths(prefix)
+
+    def finish_profiling(self, prefix, notify=False):
+        self.profile_after_id = None
+        paths = self.profiler.stop().write(prefix)
+        if notify:
+            showinfo("Profile Rendering", "The profile was written to\n" + "\n".join(sorted(paths.values())))
+        return paths
+
     def stop_all_simulations(self):
         for i, item in enumerate(self.predator):
-            self.tabs[i].on_stop()
+            self.tabs[i].stop()
 
     def on_fullscreen(self):
-        self.secondary_window.set_fullscreen()
+        self.get_display().set_fullscreen()
 
     def on_change_fullscreen(self):
-        new_color = askcolor(color=self.secondary_window.current_background_color, title="Change Background-Color")[1]
-        self.secondary_window.change_background_color(new_color)
+        new_color = askcolor(color=self.display_background_color, title="Change Background-Color")[1]
+        if new_color is not None:
+            self.display_background_color = new_color
+            self.get_display().change_background_color(new_color)
+
+    def get_display(self):
+        return self.secondary_window if self.display_process is None else self.display_process
 
-    def create_predator(self, color, target_diameter, scaling_velocity, starting_position=None):
+    def create_predator(self, color, target_diameter, scaling_velocity, starting_position=None, profile=LINEAR,
+                        profile_parameter=0., path=None):
         if starting_position is None:
             starting_position = .5, .5
 
@@ -103,99 +429,188 @@ class MainWindow(TkApplication):
         self.predator_factory.target_diameter = target_diameter
         self.predator_factory.scaling_velocity = scaling_velocity
         self.predator_factory.color = color
+        self.predator_factory.profile = profile
+        self.predator_factory.profile_parameter = profile_parameter
+        self.predator_factory.path = path
 
         return self.predator_factory.create()
 
     def get_predator_color(self):
         return self.predator_factory.color
 
-    def start_predator(self, predator, id_number):
+    def get_epoch(self, timestamp=None):
+        now = self.clock.time()
+        if timestamp is not None:
+            now += timestamp - self.interval_engine.clock()
+        return int(now * 1000)
+
+    def start_predator(self, predator, id_number, timestamp=None):
         if predator is None:
             showinfo("No Predator found", "Please place a stimuli first!")
-            return
+            return False
         self.isDrawOnAllScreenActive[id_number] = True
-        predator.start_scaling(int(time.time() * 1000))
+        epoch = self.get_epoch(timestamp)
+        predator.start_both(epoch)
+        self.log_event(START, id_number, epoch, predator.get_target_diameter())
+        self.set_arena_color(id_number, predator.color)
         self.predator[id_number] = predator
+        self.drawer.predator = predator
         self.drawer.start()
-        self.start_update()
-
-    def start_update(self):
-        self.after_id = self.master.after(25, self.update)
-
-    def update(self):
-        self.after_id = self.master.after(25, self.update)
-        self.render()
-
-    def render(self):
-        for i, item in enumerate(self.predator):
-            self.draw_predators(i, item)
-            # self.drawer.draw_all_outlines(self.tabs[i], self.all_tab, self.secondary_window, i)
-
-    def draw_predators(self, i, item):
+        self.predator_array.assign(id_number, predator)
+        self.on_arena_changed(id_number)
+        self.render_loop.wake()
+        return True
+
+    def is_running(self, id_number):
+        return self.predator[id_number] is not None and bool(self.predator_array.active[id_number]) and \
+            float(self.predator_array.target_diameters[id_number]) > 0
+
+    def render(self, frame):
+        render_start = time.perf_counter()
+        if self.closed_loop is not None:
+            self.closed_loop.place(self.predator_array)
+        diameters, positions = self.predator_array.evaluate(frame.epoch)
+        if self.telemetry is not None:
+            self.telemetry.record(frame, diameters, positions)
+        boxes = self.drawer.calculate_all_coordinates(self.predator_array, self.get_visible_tab(), self.all_tab,
+                                                      self.secondary_window)
+        for i in self.predator_array.get_changed_indices():
+            draw_start = time.perf_counter()
+            self.draw_predators(i, self.predator[i], boxes)
+            self.frame_statistics.record_draw(i, time.perf_counter() - draw_start)
+            if self.frame_statistics.pending_commands:
+                self.frame_statistics.record_first_frame(i, self.clock.monotonic())
+        self.drawer.present(self.all_tab, self.secondary_window)
+        if self.closed_loop is not None:
+            self.present_closed_loop()
+        self.frame_statistics.record_frame(frame, time.perf_counter() - render_start)
+        return self.predator_array.is_animating()
+
+    def present_closed_loop(self):
+        if self.display_process is not None:
+            self.display_process.publish_tracking(self.predator_array)
+        self.frame_statistics.record_input_latencies(self.closed_loop.present())
+
+    def draw_predators(self, i, item, boxes):
         if item is not None:
             self.drawer.predator = item
-            self.draw_predators_on_all_screens(i)
+            self.draw_predators_on_all_screens(i, boxes)
 
-    def draw_predators_on_all_screens(self, i):
+    def draw_predators_on_all_screens(self, i, boxes):
         if self.isDrawOnAllScreenActive[i]:
-            self.drawer.draw_predator(self.tabs[i], self.all_tab, self.secondary_window, i)
-
-    def change_background_color_of_all_canvas(self, id_number, color):
-        self.all_tab.change_background(id_number, color)
-        self.secondary_window.change_canvas_background(id_number, color)
-
-    def stop_drawing(self):
+            tab = self.tabs[i] if i == self.visible_tab else None
+            self.drawer.draw_predator(tab, self.all_tab, self.secondary_window, i, boxes)
+
+    def update_predator(self, id_number, predator):
+        if self.predator[id_number] is predator:
+            self.set_arena_color(id_number, predator.color)
+            self.predator_array.sync(id_number)
+            self.on_arena_changed(id_number)
+            self.render_loop.wake()
+
+    def set_arena_color(self, id_number, color):
+        if self.telemetry is not None:
+            self.telemetry.set_color(id_number, color)
+
+    def set_arena_phase(self, id_number, phase):
+        if self.telemetry is not None:
+            self.telemetry.set_phase(id_number, phase)
+        if self.snapshot is not None:
+            self.snapshot.set_phase(id_number, phase)
+
+    def change_background_color_of_all_canvas(self, color, id_number):
+        self.all_tab.change_background(color, id_number)
+        if self.secondary_window is not None:
+            self.secondary_window.change_canvas_background(color, id_number)
+        self.on_arena_changed(id_number)
+
+    def stop_drawing(self, id_number):
+        if self.predator[id_number] is None:
+            return
+        self.drawer.predator = self.predator[id_number]
         self.drawer.stop()
+        self.predator_array.sync(id_number)
+        self.on_arena_changed(id_number)
+        self.render_loop.wake()
 
 
 # noinspection PyAttributeOutsideInit
 class SingleCanvasTab(TkApplication):
     def __init__(self, master, id_number, parent=None):
-        TkApplication.__init__(self, master)
+        self.master = master
+        self.toplevel = master.winfo_toplevel()
         self.id_number = id_number
         self.parent = parent
+        self.is_built = False
 
-        self.change_background_color(self.current_background_color)
+        self.current_background_color = BACKGROUND_COLOR
+        self.color = PREDATOR_COLOR
         self.target_diameter = 0
         self.scaling_velocity = 0
+        self.profile = LINEAR
+        self.profile_parameter = 0.
+        self.path = None
 
+        self.run_seconds = 0
+        self.pause_seconds = 0
         self.remaining_secs_run = 0
         self.remaining_secs_pause = 0
 
         self.predator = None
         self.predator_draw_object = None
+        self.path_item = None
 
         self.starting_position = None
 
-        self.run_timer = None
-        self.pause_timer = None
+        self.trials = None
+        self.trial = None
+
+    def build(self):
+        if not self.is_built:
+            self.is_built = True
+            self._create_ui()
 
     def _create_ui(self):
-        self.pygubu_builder = Builder()
-        self.pygubu_builder.add_from_file(path.join(SCRIPT_DIR, "forms", "single_canvas_tab.ui"))
+        self.pygubu_builder = self.parent.toolkit.load_form("single_canvas_tab.ui")
 
         self.setup()
 
     def setup(self):
         self.canvas = self.pygubu_builder.get_object('canvas', self.master)
         self.canvas.bind("<Button-1>", self.set_starting_position)
-
-        self.current_background_color = BACKGROUND_COLOR
-        self.color = PREDATOR_COLOR
+        self.canvas.configure(background=self.current_background_color)
 
         self._create_scale_slider()
         self._create_speed_slider()
+        self._create_looming_controls()
         self._create_interval_controls()
         self._create_buttons()
 
         self.pygubu_builder.connect_callbacks(self)
 
+        set_spinbox(self.interval_minutes_run, self.run_seconds // MIN_TO_SEC)
+        set_spinbox(self.interval_seconds_run, self.run_seconds % MIN_TO_SEC)
+        set_spinbox(self.interval_minutes_pause, self.pause_seconds // MIN_TO_SEC)
+        set_spinbox(self.interval_seconds_pause, self.pause_seconds % MIN_TO_SEC)
+        self.geometry = CanvasGeometry(self.canvas)
+        self.geometry.add_listener(self.on_canvas_resized)
+        self.outlines = draw_outlines(self.canvas, 0, 0, self.geometry.width, self.geometry.height)
+        self.predator_draw_object = create_scene_item(self.canvas, self.parent.sprite_cache)
+        if self.predator is not None:
+            self.draw_preview_predator()
+
     def _create_scale_slider(self):
         self.pygubu_builder.get_object('scale', self.master)
 
     def _create_speed_slider(self):
         self.pygubu_builder.get_object('speed', self.master)
 
+    def _create_looming_controls(self):
+        self.pygubu_builder.get_object('looming', self.master)
+        self.profile_combobox = self.pygubu_builder.get_object('profile_combobox', self.master)
+        self.profile_combobox.set(LINEAR)
+        self.spin_profile_parameter = self.pygubu_builder.get_object('spin_profile_parameter', self.master)
+
     def _create_interval_controls(self):
         self.pygubu_builder.get_object('interval', self.master)
         self.pygubu_builder.get_object('interval_run', self.master)
@@ -221,239 +636,547 @@ class SingleCanvasTab(TkApplication):
         self.pygubu_builder.get_object('simulate', self.master)
 
     def on_generate(self):
-        self.canvas.delete(self.predator_draw_object)
+        self.parent.record_action(self.id_number, GENERATE)
+        self.generate()
+
+    def generate(self):
         self.predator = self.parent.create_predator(self.color, self.target_diameter, self.scaling_velocity,
-                                                    self.starting_position)
+                                                    self.starting_position, self.profile, self.profile_parameter,
+                                                    self.path)
         self.draw_preview_predator()
         self.parent.isDrawOnAllScreenActive[self.id_number] = False
         self.starting_position = None
+        self.parent.on_arena_changed(self.id_number)
 
     def draw_preview_predator(self):
+        if not self.is_built:
+            return
         drawer = PredatorDrawer(self.predator)
-        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
-        begin_x, begin_y, end_x, end_y = drawer.calculate_coordinates(width, height, self.target_diameter)
-        self.predator_draw_object = self.canvas.create_oval(begin_x, begin_y, end_x,
-                                                            end_y,
-                                                            fill=self.color, outline=self.color)
+        width, height = self.geometry.width, self.geometry.height
+        self.predator_draw_object.update(drawer.calculate_coordinates(width, height, self.target_diameter), self.color)
+        self.draw_preview_path(drawer.calculate_path(width, height))
+
+    def draw_preview_path(self, points):
+        if self.path_item is not None:
+            self.canvas.delete(self.path_item)
+            self.path_item = None
+        if points is not None:
+            self.path_item = self.canvas.create_line(*points, fill="#CCCCCC", dash=(4, 4))
+
+    def on_canvas_resized(self):
+        delete_items(self.canvas, self.outlines)
+        self.outlines = draw_outlines(self.canvas, 0, 0, self.geometry.width, self.geometry.height)
+        if self.predator is not None:
+            self.draw_preview_predator()
+        self.parent.on_layout_changed()
 
     def on_background(self):
         new_color = askcolor(color=self.current_background_color, title="Change Background-Color")[1]
-        self.change_background_color(new_color)
+        if new_color is not None:
+            self.parent.record_action(self.id_number, BACKGROUND, new_color)
+            self.change_background_color(new_color)
 
     def on_stimuli_color(self):
         new_color = askcolor(color=self.parent.get_predator_color(), title="Change Predator-Color")[1]
-        self.color = new_color
+        if new_color is not None:
+            self.parent.record_action(self.id_number, COLOR, new_color)
+            self.set_stimulus_color(new_color)
+
+    def set_stimulus_color(self, color):
+        self.color = color
         if self.predator is not None:
             self.predator.color = self.color
+            self.parent.update_predator(self.id_number, self.predator)
 
     def on_scale_slider(self, value):
-        self.target_diameter = float(value)
+        self.parent.record_action(self.id_number, SCALE, float(value))
+        self.set_target_diameter(float(value))
+
+    def set_target_diameter(self, value):
+        self.target_diameter = value
         if self.predator is not None:
             self.predator.set_target_diameter(self.target_diameter)
+            self.parent.update_predator(self.id_number, self.predator)
 
     def on_speed_slider(self, value):
-        self.scaling_velocity = float(value) / 5
+        self.parent.record_action(self.id_number, SPEED, float(value))
+        self.set_scaling_velocity(float(value) / 5)
+
+    def set_scaling_velocity(self, value):
+        self.scaling_velocity = value
         if self.predator is not None:
             self.predator.set_scaling_velocity(self.scaling_velocity)
+            self.parent.update_predator(self.id_number, self.predator)
+
+    def on_profile_selected(self, event=None):
+        self.set_profile()
+
+    def on_profile_parameter_changed(self):
+        self.set_profile()
+
+    def set_profile(self):
+        profile = self.profile_combobox.get()
+        profile_parameter = 0. if profile == LINEAR else float(self.spin_profile_parameter.get())
+        self.parent.record_action(self.id_number, PROFILE, profile, profile_parameter)
+        self.apply_profile(profile, profile_parameter)
+
+    def apply_profile(self, profile, profile_parameter):
+        self.profile = profile
+        self.profile_parameter = profile_parameter
+        if self.predator is not None:
+            self.predator.set_profile(self.profile, self.profile_parameter)
+            self.parent.update_predator(self.id_number, self.predator)
+
+    def start_trials(self, trials):
+        self.trials = trials
+        self.start_next_trial()
+
+    def start_next_trial(self, start=None):
+        self.trial = next(self.trials, None)
+        if self.trial is None:
+            self.stop()
+            return
+        self.apply_trial()
+        self.start_run(start)
+
+    def apply_trial(self):
+        self.set_run_remaining_seconds()
+        self.set_pause_remaining_seconds()
+        self.apply_stimulus(self.trial.stimulus)
+
+    def apply_stimulus(self, stimulus):
+        self.target_diameter = stimulus["diameter"]
+        self.scaling_velocity = stimulus["velocity"]
+        self.color = stimulus["color"]
+        self.profile = stimulus["profile"]
+        self.profile_parameter = stimulus["profile_parameter"]
+        self.path = stimulus.get("path")
+        self.starting_position = tuple(stimulus["position"])
+        self.generate()
+
+    def restore(self, arena_state, trials=None):
+        self.change_background_color(arena_state.background)
+        self.run_seconds, self.pause_seconds = arena_state.run_seconds, arena_state.pause_seconds
+        if not arena_state.generated:
+            return
+        self.trials = trials
+        self.trial = None if trials is None else next(trials, None)
+        stimulus = arena_state.stimulus
+        if self.trial is not None:
+            stimulus = dict(stimulus, path=self.trial.stimulus["path"])
+        self.apply_stimulus(stimulus)
+        self.remaining_secs_run = arena_state.remaining_run
+        self.remaining_secs_pause = arena_state.remaining_pause
+        if arena_state.phase == RUN:
+            self.start_run()
+        elif arena_state.phase == PAUSE:
+            self.start_pause()
 
     def on_start(self):
-        self.parent.start_predator(self.predator, self.id_number)
+        self.parent.record_action(self.id_number, START_ACTION)
+        self.start_run()
+
+    def start_run(self, start=None):
+        if not self.parent.start_predator(self.predator, self.id_number, start):
+            return
+        self.parent.set_arena_phase(self.id_number, RUN)
         if self.remaining_secs_run > 0:
             self.update_pause_remaining_seconds_label()
-            self.start_run_timer()
+            self.parent.interval_engine.start_phase(self.id_number, RUN, self.remaining_secs_run, self.on_run_tick,
+                                                    self.on_run_end, start)
 
-    def start_run_timer(self):
-        self.run_timer = Timer(1.0, self.reduce_run_remaining_seconds)
-        self.run_timer.start()
+    def on_run_tick(self, remaining_seconds, timestamp):
+        self.remaining_secs_run = remaining_seconds
+        self.update_run_remaining_seconds_label()
+        self.parent.save_remaining_seconds(self.id_number)
 
-    def reduce_run_remaining_seconds(self):
-        self.remaining_secs_run -= 1
+    def on_run_end(self, timestamp):
+        self.parent.log_event(PAUSE_EVENT, self.id_number, self.parent.get_epoch(timestamp))
+        self.stop_stimulus()
         self.update_run_remaining_seconds_label()
-        if int(self.remaining_secs_run) > 0:
-            self.start_run_timer()
-        else:
-            self.on_stop()
-            self.update_run_remaining_seconds_label()
-            self.set_run_remaining_seconds()
-            self.start_pause_timer()
+        self.start_pause(timestamp)
 
-    def start_pause_timer(self):
-        self.pause_timer = Timer(1.0, self.reduce_pause_remaining_seconds)
-        self.pause_timer.start()
+    def start_pause(self, start=None):
+        self.parent.set_arena_phase(self.id_number, PAUSE)
+        self.parent.interval_engine.start_phase(self.id_number, PAUSE, self.remaining_secs_pause, self.on_pause_tick,
+                                                self.on_pause_end, start)
+
+    def on_pause_tick(self, remaining_seconds, timestamp):
+        self.remaining_secs_pause = remaining_seconds
+        self.update_pause_remaining_seconds_label()
+        self.parent.save_remaining_seconds(self.id_number)
 
-    def reduce_pause_remaining_seconds(self):
-        self.remaining_secs_pause -= 1
+    def on_pause_end(self, timestamp):
+        self.set_pause_remaining_seconds()
         self.update_pause_remaining_seconds_label()
-        if int(self.remaining_secs_pause) > 0:
-            self.start_pause_timer()
+        if self.trials is not None:
+            self.start_next_trial(timestamp)
         else:
-            self.update_pause_remaining_seconds_label()
-            self.set_pause_remaining_seconds()
-            self.on_start()
+            self.start_run(timestamp)
 
     def on_stop(self):
-        self.stop_pause_timer()
-        self.stop_run_timer()
-        self.parent.stop_drawing()
+        self.parent.record_action(self.id_number, STOP_ACTION)
+        self.stop()
 
-    def stop_pause_timer(self):
-        if self.pause_timer is not None:
-            self.pause_timer.cancel()
-            self.set_pause_remaining_seconds()
-
-    def stop_run_timer(self):
-        if self.run_timer is not None:
-            self.run_timer.cancel()
-            self.set_run_remaining_seconds()
+    def stop(self):
+        if self.parent.predator[self.id_number] is not None:
+            self.parent.log_event(STOP, self.id_number, self.parent.get_epoch())
+        self.trials = None
+        self.trial = None
+        self.stop_stimulus()
+
+    def stop_stimulus(self):
+        self.parent.interval_engine.cancel(self.id_number)
+        self.set_pause_remaining_seconds()
+        self.set_run_remaining_seconds()
+        self.parent.set_arena_phase(self.id_number, IDLE)
+        self.parent.stop_drawing(self.id_number)
 
     def on_pause_seconds_changed(self):
-        self.set_pause_remaining_seconds()
-        self.update_pause_remaining_seconds_label()
+        self.on_pause_interval_changed()
 
     def on_pause_minutes_changed(self):
+        self.on_pause_interval_changed()
+
+    def on_pause_interval_changed(self):
+        self.update_pause_interval()
+        self.parent.record_action(self.id_number, PAUSE_INTERVAL, self.pause_seconds)
+
+    def set_pause_interval(self, seconds):
+        self.pause_seconds = seconds
+        if self.is_built:
+            set_spinbox(self.interval_minutes_pause, seconds // MIN_TO_SEC)
+            set_spinbox(self.interval_seconds_pause, seconds % MIN_TO_SEC)
+        self.update_pause_interval()
+
+    def update_pause_interval(self):
         self.set_pause_remaining_seconds()
         self.update_pause_remaining_seconds_label()
+        self.parent.on_arena_changed(self.id_number)
 
     def set_pause_remaining_seconds(self):
-        self.remaining_secs_pause = self.minutes_to_seconds(self.interval_minutes_pause.get()) + int(
-            self.interval_seconds_pause.get())
+        if self.trial is not None:
+            self.remaining_secs_pause = self.trial.pause_seconds
+            return
+        if self.is_built:
+            self.pause_seconds = self.minutes_to_seconds(self.interval_minutes_pause.get()) + int(
+                self.interval_seconds_pause.get())
+        self.remaining_secs_pause = self.pause_seconds
 
     def update_pause_remaining_seconds_label(self):
-        self.remaining_secs_label_pause.configure(text=self.remaining_secs_pause)
+        if self.is_built:
+            self.remaining_secs_label_pause.configure(text=self.remaining_secs_pause)
 
     def on_run_seconds_changed(self):
-        self.set_run_remaining_seconds()
-        self.update_run_remaining_seconds_label()
+        self.on_run_interval_changed()
 
     def on_run_minutes_changed(self):
+        self.on_run_interval_changed()
+
+    def on_run_interval_changed(self):
+        self.update_run_interval()
+        self.parent.record_action(self.id_number, RUN_INTERVAL, self.run_seconds)
+
+    def set_run_interval(self, seconds):
+        self.run_seconds = seconds
+        if self.is_built:
+            set_spinbox(self.interval_minutes_run, seconds // MIN_TO_SEC)
+            set_spinbox(self.interval_seconds_run, seconds % MIN_TO_SEC)
+        self.update_run_interval()
+
+    def update_run_interval(self):
         self.set_run_remaining_seconds()
         self.update_run_remaining_seconds_label()
+        self.parent.on_arena_changed(self.id_number)
 
     def set_run_remaining_seconds(self):
-        self.remaining_secs_run = self.minutes_to_seconds(self.interval_minutes_run.get()) + int(
-            self.interval_seconds_run.get())
+        if self.trial is not None:
+            self.remaining_secs_run = self.trial.run_seconds
+            return
+        if self.is_built:
+            self.run_seconds = self.minutes_to_seconds(self.interval_minutes_run.get()) + int(
+                self.interval_seconds_run.get())
+        self.remaining_secs_run = self.run_seconds
 
     def update_run_remaining_seconds_label(self):
-        self.remaining_secs_label_run.configure(text=self.remaining_secs_run)
+        if self.is_built:
+            self.remaining_secs_label_run.configure(text=self.remaining_secs_run)
 
     def minutes_to_seconds(self, value):
         return int(value) * MIN_TO_SEC
 
     def change_background_color(self, color):
-        self.canvas.configure(background=color)
-        self.parent.change_background_color_of_all_canvas(color, self.id_number)
+        if self.is_built:
+            self.canvas.configure(background=color)
         self.current_background_color = color
+        self.parent.change_background_color_of_all_canvas(color, self.id_number)
 
     def set_starting_position(self, event):
-        self.starting_position = event.x / self.canvas.winfo_width(), event.y / self.canvas.winfo_height()
-        self.on_generate()
+        x, y = self.geometry.normalize(event.x, event.y)
+        self.parent.record_action(self.id_number, POSITION, x, y)
+        self.place_stimulus(x, y)
 
+    def place_stimulus(self, x, y):
+        self.starting_position = x, y
+        self.generate()
 
+
+# noinspection PyAttributeOutsideInit
 class AllCanvasTab(TkApplication):
+    def __init__(self, master, layout, sprite_cache=None, toolkit=None, render_mode=VECTOR):
+        self.layout = layout
+        self.sprite_cache = sprite_cache
+        self.toolkit = TkToolkit() if toolkit is None else toolkit
+        self.render_mode = render_mode
+        TkApplication.__init__(self, master)
+
     def _create_ui(self):
-        self.pygubu_builder = Builder()
-        self.pygubu_builder.add_from_file(path.join(SCRIPT_DIR, "forms", "all_screens_tab.ui"))
-        self.canvas = list()
-        self.predator_draw_object = [None, None, None, None]
+        self.pygubu_builder = self.toolkit.load_form("all_screens_tab.ui")
         self.setup()
+        self.predator_draw_object = self.arena_canvas.scene_items
 
     def setup(self):
-        self.canvas.append(self._create_canvas('canvas_one'))
-        self.canvas.append(self._create_canvas('canvas_two'))
-        self.canvas.append(self._create_canvas('canvas_three'))
-        self.canvas.append(self._create_canvas('canvas_four'))
-
-    def _create_canvas(self, identifier):
-        self.pygubu_builder.get_object(identifier + '_label', self.master)
-        return self.pygubu_builder.get_object(identifier, self.master)
+        self.canvas = self.pygubu_builder.get_object('canvas', self.master)
+        self.arena_canvas = create_arena_canvas(self.canvas, self.layout, self.render_mode, self.sprite_cache,
+                                                self.toolkit, show_names=True)
 
     def change_background(self, color, id_number):
-        self.canvas[id_number].configure(background=color)
+        self.arena_canvas.change_background(color, id_number)
 
 
 # noinspection PyAttributeOutsideInit
 class SecondaryWindow(TkApplication):
-    def _create_ui(self):
-        self.pygubu_builder = Builder()
-        self.pygubu_builder.add_from_file(path.join(SCRIPT_DIR, "forms", "secondary_window.ui"))
+    def __init__(self, master, layout, sprite_cache=None, toolkit=None, render_mode=VECTOR):
+        self.layout = layout
+        self.sprite_cache = sprite_cache
+        self.toolkit = TkToolkit() if toolkit is None else toolkit
+        self.render_mode = render_mode
+        TkApplication.__init__(self, master)
 
-        self.style = Style()
+    def _create_ui(self):
+        self.pygubu_builder = self.toolkit.load_form("secondary_window.ui")
 
-        self.canvas = list()
-        self.predator_draw_object = [None, None, None, None]
+        self.style = self.toolkit.create_style()
 
         self.current_background_color = BACKGROUND_COLOR
 
         self.setup()
+        self.predator_draw_object = self.arena_canvas.scene_items
 
     def setup(self):
         self.set_title("Piscis")
-        self.pygubu_builder.get_object('main_frame', self.master)
+        self.main_frame = self.pygubu_builder.get_object('main_frame', self.master)
 
-        self.canvas.append(self._create_canvas('canvas_one'))
-        self.canvas.append(self._create_canvas('canvas_two'))
-        self.canvas.append(self._create_canvas('canvas_three'))
-        self.canvas.append(self._create_canvas('canvas_four'))
+        self.canvas = self.pygubu_builder.get_object('canvas', self.master)
+        self.arena_canvas = create_arena_canvas(self.canvas, self.layout, self.render_mode, self.sprite_cache,
+                                                self.toolkit)
 
         self.change_background_color(BACKGROUND_COLOR)
 
-    def _create_canvas(self, identifier):
-        return self.pygubu_builder.get_object(identifier, self.master)
-
     def set_fullscreen(self):
+        width, height = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
         self.master.overrideredirect(True)
-        self.master.geometry("%dx%d+0+0" % (self.master.winfo_screenwidth(), self.master.winfo_screenheight()))
+        self.master.geometry("%dx%d+0+0" % (width, height))
+        self.main_frame.configure(width=width, height=height)
+        self.canvas.configure(width=width, height=height)
 
     def change_background_color(self, color):
         self.style.configure('TFrame', background=color)
+        self.canvas.configure(background=color)
+        self.arena_canvas.fill(color)
         self.current_background_color = color
 
     def change_canvas_background(self, color, id_number):
-        self.canvas[id_number].configure(background=color)
+        self.arena_canvas.change_background(color, id_number)
+
+
+def create_arena_canvas(canvas, layout, render_mode=VECTOR, sprite_cache=None, toolkit=None, show_names=False):
+    if render_mode == FRAMEBUFFER:
+        return FramebufferCanvas(canvas, layout, TkToolkit() if toolkit is None else toolkit, show_names)
+    return ArenaCanvas(canvas, layout, sprite_cache, show_names)
+
+
+class ArenaCanvas(object):
+    def __init__(self, canvas, layout, sprite_cache=None, show_names=False):
+        self.canvas = canvas
+        self.layout = layout
+        self.geometry = CanvasGeometry(canvas, layout)
+        self.create_backgrounds()
+        self.names = list()
+        if show_names:
+            self.names = [canvas.create_text(x + 2, y + 2, text=str(i + 1), anchor="nw", fill="#999999")
+                          for i, (x, y, _, _) in enumerate(self.cells)]
+        self.outlines = [None] * len(self.cells)
+        self.scene_items = self.create_scene_items(sprite_cache)
+        self.geometry.add_listener(self.relayout)
+
+    @property
+    def cells(self):
+        return self.geometry.cells
+
+    def create_backgrounds(self):
+        self.backgrounds = [self.canvas.create_rectangle(*get_cell_box(cell), fill=BACKGROUND_COLOR, width=0)
+                            for cell in self.cells]
+
+    def move_backgrounds(self):
+        for item, cell in zip(self.backgrounds, self.cells):
+            self.canvas.coords(item, *get_cell_box(cell))
+
+    def create_scene_items(self, sprite_cache):
+        return [create_scene_item(self.canvas, sprite_cache) for _ in self.cells]
+
+    def relayout(self):
+        self.move_backgrounds()
+        for item, (x, y, _, _) in zip(self.names, self.cells):
+            self.canvas.coords(item, x + 2, y + 2)
+        for i, outline in enumerate(self.outlines):
+            if outline is not None:
+                self.draw_outlines(i)
+
+    def draw(self, id_number, coordinates, color):
+        self.scene_items[id_number].update(coordinates, color)
 
+    def change_background(self, color, id_number):
+        self.canvas.itemconfigure(self.backgrounds[id_number], fill=color)
+
+    def fill(self, color):
+        pass
+
+    def present(self):
+        return False
+
+    def bounding_boxes(self, predator_array):
+        return self.geometry.bounding_boxes(predator_array)
+
+    def draw_outlines(self, id_number):
+        delete_items(self.canvas, self.outlines[id_number])
+        self.outlines[id_number] = draw_outlines(self.canvas, *self.cells[id_number])
 
-class PredatorDrawer(object):
-    def __init__(self, predator):
-        self.predator = predator
-        self.is_stopped = False
-        self.now = 0
 
-    def draw_predator(self, tab, all_tab, secondary, index):
-        self.render(tab)
-        self.render_copy_canvases(all_tab, index)
-        self.render_copy_canvases(secondary, index)
+class FramebufferCanvas(ArenaCanvas):
+    def __init__(self, canvas, layout, toolkit, show_names=False):
+        self.toolkit = toolkit
+        self.sinks = list()
+        ArenaCanvas.__init__(self, canvas, layout, None, show_names)
 
-    def render(self, tab):  # pragma: no cover
-        tab.canvas.delete(tab.predator_draw_object)
-        tab.predator_draw_object = self.render_predator(tab.canvas)
+    def create_backgrounds(self):
+        width, height = self.geometry.width, self.geometry.height
+        self.framebuffer = Framebuffer(width, height, self.cells)
+        self.image = self.toolkit.create_image(width, height)
+        self.image_item = self.canvas.create_image(0, 0, image=self.image, anchor="nw")
 
-    def render_copy_canvases(self, copy_screen, index):  # pragma: no cover
-        copy_screen.canvas[index].delete(copy_screen.predator_draw_object[index])
-        copy_screen.predator_draw_object[index] = self.render_predator(copy_screen.canvas[index])
+    def move_backgrounds(self):
+        width, height = self.geometry.width, self.geometry.height
+        self.framebuffer.resize(width, height, self.cells)
+        self.image = self.toolkit.create_image(width, height)
+        self.canvas.itemconfigure(self.image_item, image=self.image)
+        self.present()
+
+    def create_scene_items(self, sprite_cache):
+        return [FramebufferItem(self, i) for i in range(len(self.cells))]
+
+    def draw(self, id_number, coordinates, color):
+        self.framebuffer.draw(id_number, coordinates, resolve_color(self.canvas, color))
+
+    def change_background(self, color, id_number):
+        self.framebuffer.set_background(id_number, resolve_color(self.canvas, color))
+        self.present()
+
+    def fill(self, color):
+        self.framebuffer.fill(resolve_color(self.canvas, color))
+        self.present()
+
+    def present(self):
+        damage = self.framebuffer.compose()
+        if damage is None:
+            return False
+        left, top, right, bottom = damage
+        if 2 * (right - left) > self.framebuffer.frame.shape[1]:
+            left, right = 0, self.framebuffer.frame.shape[1]
+        self.image.put(encode_ppm(self.framebuffer.frame[top:bottom, left:right]), to=(left, top))
+        for sink in self.sinks:
+            sink(self.framebuffer.frame)
+        return True
+
+
+# noinspection PyAttributeOutsideInit
+class FrameStatisticsWindow(TkApplication):
+    def __init__(self, master, get_summary, toolkit=None):
+        self.get_summary = get_summary
+        self.toolkit = TkToolkit() if toolkit is None else toolkit
+        TkApplication.__init__(self, master)
+
+    def _create_ui(self):
+        self.pygubu_builder = self.toolkit.load_form("frame_statistics_window.ui")
+        self.after_id = None
+
+        self.setup()
 
-    def render_predator(self, canvas):  # pragma: no cover
-        width, height = canvas.winfo_width(), canvas.winfo_height()
-        if self.is_stopped is False:
-            self.now = int(time.time() * 1000)
-        begin_x, begin_y, end_x, end_y = \
-            self.calculate_coordinates(width, height, self.predator.get_current_diameter(self.now))
+    def setup(self):
+        self.set_title("Frame Statistics")
+        self.pygubu_builder.get_object('main_frame', self.master)
+        self.statistics_label = self.pygubu_builder.get_object('statistics_label', self.master)
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh()
 
-        return canvas.create_oval(begin_x, begin_y, end_x, end_y, fill=self.predator.color, outline=self.predator.color)
+    def refresh(self):
+        self.statistics_label.configure(text=self.get_summary())
+        self.after_id = self.master.after(STATISTICS_REFRESH_MS, self.refresh)
 
-    def calculate_coordinates(self, width, height, current_diameter):  # pragma: no cover
-        begin_x, begin_y = width * self.predator.get_starting_position()[0], \
-                            height * self.predator.get_starting_position()[1]
-        end_x, end_y = begin_x + current_diameter * width, begin_y + current_diameter * width
+    def is_open(self):
+        return self.after_id is not None
 
-        pred_width, pred_height = end_x - begin_x, end_y - begin_y
+    def on_close(self):
+        self.master.after_cancel(self.after_id)
+        self.after_id = None
+        self.master.destroy()
 
-        begin_x -= pred_width // 2
-        begin_y -= pred_height // 2
 
-        end_x -= pred_width // 2
-        end_y -= pred_height // 2
+class PredatorDrawer(object):
+    def __init__(self, predator):
+        self.predator = predator
+        self.is_stopped = False
 
-        return begin_x, begin_y, end_x, end_y
+    def draw_predator(self, tab, all_tab, secondary, index, boxes):
+        tab_boxes, all_tab_boxes, secondary_boxes = boxes
+        if tab is not None:
+            self.render(tab, tab_boxes[index])
+        self.render_copy_canvases(all_tab, index, all_tab_boxes[index])
+        if secondary is not None:
+            self.render_copy_canvases(secondary, index, secondary_boxes[index])
+
+    def render(self, tab, box):
+        self.render_predator(tab.predator_draw_object, box)
+
+    def render_copy_canvases(self, copy_screen, index, box):
+        copy_screen.arena_canvas.draw(index, box.tolist(), self.predator.color)
+
+    def render_predator(self, scene_item, box):
+        scene_item.update(box.tolist(), self.predator.color)
+
+    def present(self, *screens):
+        for screen in screens:
+            if screen is not None:
+                screen.arena_canvas.present()
+
+    def calculate_all_coordinates(self, predator_array, tab, all_tab, secondary):
+        tab_boxes, secondary_boxes = None, None
+        if tab is not None:
+            tab_boxes = tab.geometry.bounding_boxes(predator_array)
+        if secondary is not None:
+            secondary_boxes = secondary.arena_canvas.bounding_boxes(predator_array)
+        return tab_boxes, all_tab.arena_canvas.bounding_boxes(predator_array), secondary_boxes
+
+    def calculate_path(self, width, height):
+        trajectory = self.predator.movement_vector.trajectory
+        if trajectory is None or trajectory.length <= 0:
+            return None
+        return (trajectory.table * (width, height)).ravel().tolist()
+
+    def calculate_coordinates(self, width, height, current_diameter):
+        box = calculate_bounding_boxes(width, height, np.array([self.predator.get_starting_position()], dtype=float),
+                                       np.array([current_diameter], dtype=float))[0]
+        return tuple(box.tolist())
 
     def stop(self):
         self.is_stopped = True
@@ -468,35 +1191,62 @@ class PredatorDrawer(object):
         self.is_stopped = False
 
 
-def get_startx_starty_horizontal(screen):
-    return screen.winfo_reqwidth() * HORIZONTAL_X_MARGIN, \
-           screen.winfo_reqheight() * HORIZONTAL_Y_MARGIN
+def get_hot_paths():
+    return [("MainWindow.render", match_functions(MainWindow.render)),
+            ("PredatorDrawer", match_class(PredatorDrawer)),
+            ("model", match_module(model)),
+            ("timer callbacks", match_name(tkinter.__file__, "callit"))]
+
+
+def get_screen_name(id_number):
+    return "Screen %d" % (id_number + 1)
+
+
+def get_tab_name(id_number, arena_count):
+    if arena_count > SHORT_TAB_NAME_LIMIT:
+        return str(id_number + 1)
+    return get_screen_name(id_number)
+
+
+def set_spinbox(spinbox, value):
+    spinbox.delete(0, END)
+    spinbox.insert(0, value)
+
+
+def get_cell_box(cell):
+    x, y, width, height = cell
+    return x, y, x + width, y + height
+
+
+def get_startx_starty_horizontal(width, height):
+    return width * HORIZONTAL_X_MARGIN, height * HORIZONTAL_Y_MARGIN
+
 
+def draw_horizontal_borders(screen, x, y, width, height):
+    start_x, start_y = get_startx_starty_horizontal(width, height)
+    return [screen.create_line(x + start_x, y + start_y, x + width - start_x, y + start_y, fill="#CCCCCC"),
+            screen.create_line(x + start_x, y + height - start_y, x + width - start_x, y + height - start_y,
+                               fill="#CCCCCC")]
 
-def draw_horizontal_borders(height, screen, width):
-    start_x, start_y = get_startx_starty_horizontal(screen)
-    screen.create_line(start_x, start_y, width - start_x, start_y, fill="#CCCCCC")
-    screen.create_line(start_x, height - start_y, width - start_x, height - start_y, fill="#CCCCCC")
 
+def get_startx_starty_vertical(width, height):
+    return width * VERTICAL_X_MARGIN, height * VERTICAL_Y_MARGIN
 
-def get_startx_starty_vertical(screen):
-    return screen.winfo_reqwidth() * VERTICAL_X_MARGIN, \
-           screen.winfo_reqheight() * VERTICAL_Y_MARGIN
 
+def draw_vertical_borders(screen, x, y, width, height):
+    start_x, start_y = get_startx_starty_vertical(width, height)
+    return [screen.create_line(x + start_x, y + start_y, x + start_x, y + height - start_y, fill="#CCCCCC"),
+            screen.create_line(x + width - start_x, y + start_y, x + width - start_x, y + height - start_y,
+                               fill="#CCCCCC")]
 
-def draw_vertical_borders(height, screen, width):
-    start_x, start_y = get_startx_starty_vertical(screen)
-    screen.create_line(start_x, start_y, start_x, height - start_y, fill="#CCCCCC")
-    screen.create_line(width - start_x, start_y, width - start_x, height - start_y, fill="#CCCCCC")
 
+def draw_outlines(screen, x=0, y=0, width=None, height=None):
+    if width is None:
+        width, height = screen.winfo_reqwidth(), screen.winfo_reqheight()
+    return draw_horizontal_borders(screen, x, y, width, height) + draw_vertical_borders(screen, x, y, width, height)
 
-def draw_outlines(screen):
-    width, height = screen.winfo_reqwidth(), screen.winfo_reqheight()
-    draw_horizontal_borders(height, screen, width)
-    draw_vertical_borders(height, screen, width)
 
+def delete_items(screen, items):
+    for item in items or ():
+        screen.delete(item)
 
-def draw_all_outlines(tab, all_tab, secondary, i):
-    draw_outlines(tab.canvas)
-    draw_outlines(all_tab.canvas[i])
-    draw_outlines(secondary.canvas[i])
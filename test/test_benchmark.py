@@ -0,0 +1,105 @@
+import os
+import subprocess
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+from piscis.benchmark import measure, run_benchmarks, create_record, save_record, load_record, compare_results, \
+    format_comparison, create_predators, create_epochs, get_commit, main
+from piscis.model import CONSTANT_LV
+
+
+class MeasureTestCase(TestCase):
+    def test_returns_duration_per_call(self):
+        calls = list()
+        duration = measure(lambda: calls.append(1), number=10, repeat=2)
+        self.assertEqual(len(calls), 20)
+        self.assertGreaterEqual(duration, 0)
+
+    def test_creates_predator_per_arena(self):
+        predators = create_predators(12, CONSTANT_LV)
+        self.assertEqual(len(predators), 12)
+        self.assertEqual(predators[0].scaling_vector.profile, CONSTANT_LV)
+
+    def test_epochs_advance_one_frame_at_a_time(self):
+        epochs = create_epochs(1000)
+        self.assertEqual([next(epochs) for _ in range(3)], [1000, 1025, 1050])
+
+    def test_runs_every_benchmark(self):
+        results = run_benchmarks((2,), number=2, repeat=1)
+        self.assertEqual(list(results), ["model.evaluate[2]", "model.evaluate_profiles[2]", "render.frame[2]",
+                                         "render.framebuffer[2]", "render.upload[2]", "startup.headless[2]"])
+        self.assertTrue(all(duration > 0 for duration in results.values()))
+
+
+class ResultsTestCase(TestCase):
+    def setUp(self):
+        handle, self.file_path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_loads_last_record_of_commit(self):
+        save_record(self.file_path, create_record({"a": 1.}, "abc1234"))
+        save_record(self.file_path, create_record({"a": 2.}, "def5678"))
+        save_record(self.file_path, create_record({"a": 3.}, "abc1234"))
+        self.assertEqual(load_record(self.file_path, "abc")["results"], {"a": 3.})
+        self.assertIsNone(load_record(self.file_path, "fff"))
+        self.assertIsNone(load_record(self.file_path + ".missing", "abc"))
+
+    def test_flags_regressions(self):
+        rows = compare_results({"a": 1., "b": 1., "c": 1.}, {"a": 1.05, "b": 2., "d": 1.})
+        self.assertEqual([(name, regressed) for name, _, _, _, regressed in rows], [("a", False), ("b", True)])
+        self.assertIn("REGRESSION", format_comparison(rows))
+
+    def test_commit_is_unknown_without_git(self):
+        with patch("subprocess.check_output", side_effect=OSError):
+            self.assertEqual(get_commit(), "unknown")
+        with patch("subprocess.check_output", side_effect=subprocess.CalledProcessError(128, "git")):
+            self.assertEqual(get_commit(), "unknown")
+
+
+class BenchmarkCommandTestCase(TestCase):
+    def setUp(self):
+        handle, self.file_path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        save_record(self.file_path, create_record({"model.evaluate[1]": 1e-5}, "abc1234"))
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def invoke(self, duration, *args, commit="def5678"):
+        with patch("piscis.benchmark.run_benchmarks", return_value={"model.evaluate[1]": duration}), \
+                patch("piscis.benchmark.get_commit", return_value=commit):
+            return CliRunner().invoke(main, ["--results", self.file_path] + list(args))
+
+    def test_prints_and_stores_results(self):
+        result = self.invoke(1e-5, "--arenas", "1")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Benchmarks of def5678", result.output)
+        self.assertIn("model.evaluate[1]                      10.0 us", result.output)
+        self.assertEqual(load_record(self.file_path, "def")["results"], {"model.evaluate[1]": 1e-5})
+
+    def test_compares_without_saving(self):
+        result = self.invoke(1e-5, "--no-save", "--compare", "abc")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Compared with abc1234", result.output)
+        self.assertNotIn("REGRESSION", result.output)
+        self.assertIsNone(load_record(self.file_path, "def"))
+
+    def test_compares_with_the_stored_run_of_the_same_commit(self):
+        result = self.invoke(2e-5, "--compare", "abc", commit="abc1234")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("REGRESSION", result.output)
+        self.assertEqual(load_record(self.file_path, "abc")["results"], {"model.evaluate[1]": 2e-5})
+
+    def test_regressions_fail(self):
+        result = self.invoke(2e-5, "--no-save", "--compare", "abc")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("REGRESSION", result.output)
+
+    def test_unknown_comparison_fails(self):
+        result = self.invoke(1e-5, "--no-save", "--compare", "fff")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("No stored benchmark results of fff", result.output)
@@ -0,0 +1,60 @@
+from unittest import TestCase
+from piscis.cache import LRUCache
+
+
+class RecordingCache(LRUCache):
+    def __init__(self, capacity):
+        LRUCache.__init__(self, capacity)
+        self.evicted = list()
+
+    def evict(self, key, value):
+        self.evicted.append(key)
+
+
+class LRUCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = RecordingCache(2)
+
+    def test_rejects_empty_capacity(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+    def test_get_missing_returns_default(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("a", 5), 5)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_put_and_get(self):
+        self.cache.put("a", 1)
+        self.assertIn("a", self.cache)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evicted, ["b"])
+        self.assertNotIn("b", self.cache)
+
+    def test_get_or_create_only_creates_once(self):
+        created = list()
+        factory = lambda: created.append(1) or len(created)
+        self.assertEqual(self.cache.get_or_create("a", factory), 1)
+        self.assertEqual(self.cache.get_or_create("a", factory), 1)
+        self.assertEqual(len(created), 1)
+
+    def test_clear_evicts_everything(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.evicted, ["a", "b"])
+
+    def test_plain_cache_drops_least_recently_used(self):
+        cache = LRUCache(1)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(list(cache.entries.items()), [("b", 2)])
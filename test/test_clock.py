@@ -0,0 +1,33 @@
+import time
+from unittest import TestCase
+from piscis.clock import SystemClock, VirtualClock
+
+
+class SystemClockTestCase(TestCase):
+    def test_follows_the_system_time(self):
+        clock = SystemClock()
+        self.assertAlmostEqual(clock.time(), time.time(), delta=1.)
+        self.assertLessEqual(clock.monotonic(), time.monotonic())
+        self.assertLessEqual(clock.monotonic_ns(), time.monotonic_ns())
+
+
+class VirtualClockTestCase(TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(wall_origin=1000., start=5.)
+
+    def test_only_moves_when_advanced(self):
+        self.assertEqual(self.clock.monotonic(), 5.)
+        self.assertEqual(self.clock.time(), 1005.)
+        self.clock.advance(2.5)
+        self.assertEqual(self.clock.monotonic(), 7.5)
+        self.assertEqual(self.clock.monotonic_ns(), 7500000000)
+        self.assertEqual(self.clock.time(), 1007.5)
+
+    def test_advances_to_timestamps(self):
+        self.clock.advance_to(9.)
+        self.clock.advance_to(8.)
+        self.assertEqual(self.clock.monotonic(), 9.)
+
+    def test_does_not_go_back(self):
+        with self.assertRaises(ValueError):
+            self.clock.advance(-1.)
@@ -0,0 +1,333 @@
+import json
+import os
+import socket
+import struct
+from tempfile import TemporaryDirectory
+import threading
+import time
+from unittest import TestCase
+from piscis.control import ControlServer, ControlDispatcher, ControlError, decode_request, encode_response, \
+    CONTROL_POLL_MS, CONTROL_IDLE_POLL_MS, MAX_REQUEST_SIZE
+from piscis.config import Configuration
+from piscis.instrumentation import FrameStatistics
+from piscis.intervals import IntervalEngine, RUN
+from piscis.scheduler import Frame
+from piscis.tracker import SharedTrackerRing, create_samples
+from piscis.ui.headless import create_headless_window
+
+
+class FakeTab(object):
+    def __init__(self):
+        self.predator = None
+        self.target_diameter = 0
+        self.scaling_velocity = 0
+        self.color = "#000000"
+        self.profile = "linear"
+        self.profile_parameter = 0.
+        self.running = False
+
+    def apply_stimulus(self, stimulus):
+        self.target_diameter = stimulus["diameter"]
+        self.scaling_velocity = stimulus["velocity"]
+        self.color = stimulus["color"]
+        self.predator = stimulus
+
+    def on_start(self):
+        self.running = True
+
+    def on_stop(self):
+        self.running = False
+
+    def set_target_diameter(self, value):
+        self.target_diameter = value
+
+    def set_scaling_velocity(self, value):
+        self.scaling_velocity = value
+
+    def set_stimulus_color(self, color):
+        self.color = color
+
+
+class FakeApplication(object):
+    def __init__(self):
+        self.tabs = [FakeTab(), FakeTab()]
+        self.interval_engine = IntervalEngine(clock=lambda: 0.)
+        self.frame_statistics = FrameStatistics(40, 2)
+        self.closed_loop = None
+
+    def stop_all_simulations(self):
+        for tab in self.tabs:
+            tab.on_stop()
+
+    def is_running(self, index):
+        return self.tabs[index].running
+
+
+class RequestTestCase(TestCase):
+    def test_decodes_json_objects(self):
+        self.assertEqual(decode_request(b'{"command": "query"}\n'), {"command": "query"})
+
+    def test_rejects_other_requests(self):
+        for data in (b"start", b"[1, 2]", b"\xff"):
+            with self.assertRaises(ControlError):
+                decode_request(data)
+
+    def test_encodes_response_lines(self):
+        self.assertEqual(encode_response({"ok": True}), b'{"ok": true}\n')
+
+
+class ControlDispatcherTestCase(TestCase):
+    def setUp(self):
+        self.application = FakeApplication()
+        self.dispatcher = ControlDispatcher(self.application)
+
+    def test_generate_applies_stimulus_with_defaults(self):
+        response = self.dispatcher({"command": "generate", "arena": 2, "diameter": .3, "color": "#FF0000"})
+        self.assertTrue(response["ok"])
+        self.assertTrue(response["generated"])
+        self.assertEqual(self.application.tabs[1].predator["diameter"], .3)
+        self.assertEqual(self.application.tabs[1].predator["velocity"], .1)
+        self.assertEqual(response["color"], "#FF0000")
+
+    def test_rejects_invalid_stimulus(self):
+        response = self.dispatcher({"command": "generate", "arena": 1, "diameter": 2})
+        self.assertFalse(response["ok"])
+        self.assertIn("diameter", response["error"])
+        self.assertIsNone(self.application.tabs[0].predator)
+
+    def test_rejects_unknown_arena_and_command(self):
+        self.assertFalse(self.dispatcher({"command": "start", "arena": 3})["ok"])
+        self.assertFalse(self.dispatcher({"command": "start", "arena": True})["ok"])
+        self.assertFalse(self.dispatcher({"command": "jump", "arena": 1})["ok"])
+
+    def test_start_needs_generated_stimulus(self):
+        self.assertFalse(self.dispatcher({"command": "start", "arena": 1})["ok"])
+        self.dispatcher({"command": "generate", "arena": 1})
+        response = self.dispatcher({"command": "start", "arena": 1}, 12.)
+        self.assertTrue(response["running"])
+        self.assertEqual(self.application.frame_statistics.pending_commands, {0: 12.})
+        self.dispatcher({"command": "generate", "arena": 2})
+        self.assertTrue(self.dispatcher({"command": "start", "arena": 2})["running"])
+        self.assertEqual(self.application.frame_statistics.pending_commands, {0: 12.})
+
+    def test_stop_one_or_all_arenas(self):
+        for tab in self.application.tabs:
+            tab.running = True
+        self.assertFalse(self.dispatcher({"command": "stop", "arena": 1})["running"])
+        self.assertTrue(self.application.tabs[1].running)
+        self.assertEqual(self.dispatcher({"command": "stop"}), {"ok": True})
+        self.assertFalse(self.application.tabs[1].running)
+
+    def test_set_parameters(self):
+        self.dispatcher({"command": "set-diameter", "arena": 1, "value": .4})
+        self.dispatcher({"command": "set-speed", "arena": 1, "value": .2})
+        response = self.dispatcher({"command": "set-color", "arena": 1, "value": "#00FF00"})
+        self.assertEqual((response["diameter"], response["velocity"], response["color"]), (.4, .2, "#00FF00"))
+
+    def test_set_rejects_invalid_values(self):
+        self.assertFalse(self.dispatcher({"command": "set-speed", "arena": 1, "value": -1})["ok"])
+        self.assertFalse(self.dispatcher({"command": "set-color", "arena": 1, "value": "blue"})["ok"])
+        self.assertFalse(self.dispatcher({"command": "set-diameter", "arena": 1})["ok"])
+        self.assertEqual(self.application.tabs[0].scaling_velocity, 0)
+
+    def test_query_reports_phase(self):
+        self.application.interval_engine.start_phase(1, RUN, 10, lambda *args: None, lambda *args: None)
+        response = self.dispatcher({"command": "query", "arena": 2})
+        self.assertEqual((response["arena"], response["phase"]), (2, RUN))
+        self.assertIsNone(self.dispatcher({"command": "query", "arena": 1})["phase"])
+
+    def test_unexpected_errors_become_error_responses(self):
+        def fail(value):
+            raise RuntimeError("canvas is gone")
+        self.application.tabs[0].set_target_diameter = fail
+        response = self.dispatcher({"command": "set-diameter", "arena": 1, "value": .4})
+        self.assertFalse(response["ok"])
+        self.assertIn("canvas is gone", response["error"])
+
+    def test_follow_needs_tracker_feed(self):
+        response = self.dispatcher({"command": "follow", "arena": 1, "angle": 90, "distance": .2})
+        self.assertFalse(response["ok"])
+        self.assertIn("tracker", response["error"])
+        self.assertFalse(self.dispatcher({"command": "query", "arena": 1})["following"])
+
+
+class ControlServerTestCase(TestCase):
+    def setUp(self):
+        self.server = ControlServer(port=0, udp_port=0)
+        self.server.start()
+        self.requests = list()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def handle(self, request, received):
+        self.requests.append((request, received))
+        return {"ok": True, "echo": request["command"]}
+
+    def exchange(self, send):
+        result = list()
+        client = threading.Thread(target=lambda: result.append(send()))
+        client.start()
+        deadline = time.monotonic() + 5
+        while client.is_alive() and time.monotonic() < deadline:
+            self.server.process_pending(self.handle)
+            time.sleep(.001)
+        client.join()
+        return result[0]
+
+    def send_tcp(self, *lines):
+        with socket.create_connection((self.server.host, self.server.port), timeout=5) as connection:
+            stream = connection.makefile("rwb")
+            responses = list()
+            for line in lines:
+                stream.write(line + b"\n")
+                stream.flush()
+                responses.append(json.loads(stream.readline().decode("utf-8")))
+            return responses
+
+    def send_udp(self, data):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as connection:
+            connection.settimeout(5)
+            connection.sendto(data, (self.server.host, self.server.udp_port))
+            return json.loads(connection.recv(4096).decode("utf-8"))
+
+    def test_binds_ephemeral_ports(self):
+        self.assertTrue(self.server.is_running())
+        self.assertNotEqual(self.server.port, 0)
+        self.assertNotEqual(self.server.udp_port, 0)
+
+    def test_tcp_commands_are_handled_on_calling_thread(self):
+        responses = self.exchange(lambda: self.send_tcp(b'{"command": "query"}', b'{"command": "start"}'))
+        self.assertEqual(responses, [{"ok": True, "echo": "query"}, {"ok": True, "echo": "start"}])
+        self.assertEqual([request["command"] for request, _ in self.requests], ["query", "start"])
+        self.assertLessEqual(self.requests[0][1], time.monotonic())
+
+    def test_invalid_requests_are_answered_by_server(self):
+        responses = self.exchange(lambda: self.send_tcp(b"start"))
+        self.assertFalse(responses[0]["ok"])
+        self.assertEqual(self.requests, [])
+
+    def test_polls_quickly_only_while_clients_are_connected(self):
+        self.assertFalse(self.server.is_busy())
+        self.assertEqual(self.server.get_poll_interval(), CONTROL_IDLE_POLL_MS)
+        with socket.create_connection((self.server.host, self.server.port), timeout=5):
+            deadline = time.monotonic() + 5
+            while not self.server.is_busy() and time.monotonic() < deadline:
+                time.sleep(.001)
+            self.assertEqual(self.server.get_poll_interval(), CONTROL_POLL_MS)
+        deadline = time.monotonic() + 5
+        while self.server.is_busy() and time.monotonic() < deadline:
+            time.sleep(.001)
+        self.assertEqual(self.server.get_poll_interval(), CONTROL_IDLE_POLL_MS)
+
+    def test_long_requests_are_refused(self):
+        responses = self.exchange(lambda: self.send_tcp(b"x" * (MAX_REQUEST_SIZE + 1)))
+        self.assertEqual(responses, [{"ok": False, "error": "Request too long"}])
+
+    def test_reset_connections_are_dropped(self):
+        connection = socket.create_connection((self.server.host, self.server.port), timeout=5)
+        connection.sendall(b'{"command": "query"}\n')
+        deadline = time.monotonic() + 5
+        while self.server.in_flight == 0 and time.monotonic() < deadline:
+            time.sleep(.001)
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        connection.close()
+        self.assertEqual(self.server.process_pending(self.handle), 1)
+        while self.server.is_busy() and time.monotonic() < deadline:
+            time.sleep(.001)
+        self.assertFalse(self.server.is_busy())
+
+    def test_unanswered_commands_time_out(self):
+        self.server.timeout = .01
+        response = self.send_udp(b'{"command": "query"}')
+        self.assertEqual(response["error"], "The application did not answer in time")
+        self.assertEqual(self.server.process_pending(self.handle), 1)
+
+    def test_udp_commands(self):
+        self.assertEqual(self.exchange(lambda: self.send_udp(b'{"command": "stop"}')), {"ok": True, "echo": "stop"})
+
+    def test_stop_closes_ports(self):
+        port = self.server.port
+        self.server.stop()
+        self.assertFalse(self.server.is_running())
+        with self.assertRaises(OSError):
+            socket.create_connection((self.server.host, port), timeout=1)
+
+    def test_start_reports_bind_errors(self):
+        server = ControlServer(port=self.server.port)
+        with self.assertRaises(OSError):
+            server.start()
+        self.assertFalse(server.is_running())
+
+
+class WindowControlTestCase(TestCase):
+    def setUp(self):
+        configuration = Configuration()
+        configuration.control_port = 0
+        self.window = create_headless_window(configuration)
+
+    def tearDown(self):
+        self.window.on_exit()
+
+    def test_poll_is_rearmed_after_errors(self):
+        def fail(request, received):
+            raise RuntimeError("dispatcher failed")
+        self.window.control_dispatcher = fail
+        self.window.control_server.commands.put(({"command": "query"}, 0., None))
+        with self.assertRaises(RuntimeError):
+            self.window.process_control_commands()
+        milliseconds, callback, _, _ = self.window.master.scheduled[self.window.control_after_id]
+        self.assertEqual((milliseconds, callback), (CONTROL_IDLE_POLL_MS, self.window.process_control_commands))
+
+    def test_exit_cancels_poll(self):
+        after_id = self.window.control_after_id
+        self.window.on_exit()
+        self.assertNotIn(after_id, self.window.master.scheduled)
+        self.assertFalse(self.window.control_server.is_running())
+
+
+class WindowDispatcherTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        configuration = Configuration()
+        configuration.tracker_ring = "piscis-control-test-%d" % os.getpid()
+        configuration.profile_directory = self.directory.name
+        self.window = create_headless_window(configuration)
+        self.ring = SharedTrackerRing(configuration.tracker_ring, create=False)
+        self.dispatcher = ControlDispatcher(self.window)
+
+    def tearDown(self):
+        self.window.on_exit()
+        self.ring.close()
+        self.directory.cleanup()
+
+    def render(self, index):
+        return self.window.render(Frame(index, index * .025, self.window.get_epoch() + index * 25, index * .025, 0))
+
+    def test_set_color_recolors_running_stimulus(self):
+        self.dispatcher({"command": "generate", "arena": 2})
+        response = self.dispatcher({"command": "start", "arena": 2})
+        self.assertEqual(json.loads(encode_response(response).decode("utf-8"))["running"], True)
+        self.render(1)
+        response = self.dispatcher({"command": "set-color", "arena": 2, "value": "#FF0000"})
+        self.assertEqual(response["color"], "#FF0000")
+        self.assertTrue(self.render(2))
+        scene_item = self.window.secondary_window.predator_draw_object[1]
+        self.assertEqual(self.window.secondary_window.canvas.items[scene_item.item]["options"]["fill"], "#FF0000")
+
+    def test_follow_places_stimulus_next_to_fish(self):
+        self.assertFalse(self.dispatcher({"command": "follow", "arena": 1, "angle": "left", "distance": .1})["ok"])
+        self.assertTrue(self.dispatcher({"command": "follow", "arena": 1, "angle": 0, "distance": .1})["following"])
+        self.dispatcher({"command": "generate", "arena": 1, "velocity": 0})
+        self.dispatcher({"command": "start", "arena": 1})
+        self.ring.push(create_samples(time.monotonic(), 1, [(.3, .5)], 0.))
+        self.render(1)
+        self.assertAlmostEqual(self.window.predator_array.positions[0][0], .4)
+
+    def test_profile_writes_into_profile_directory(self):
+        response = self.dispatcher({"command": "profile", "seconds": 1})
+        self.assertEqual(os.path.dirname(response["report"]), self.directory.name)
+        _, callback, args, _ = self.window.master.scheduled.pop(self.window.profile_after_id)
+        callback(*args)
+        self.assertFalse(self.window.profiler.is_running())
+        self.assertTrue(os.path.exists(response["report"]))
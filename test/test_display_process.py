@@ -0,0 +1,100 @@
+import multiprocessing
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from piscis.layout import ArenaLayout
+from piscis.shared_state import SharedArenaState
+from piscis.scheduler import Frame
+from piscis.ui.display_process import DisplayProcess, DisplayRenderer
+from piscis.ui.headless import FakeWidget, HeadlessToolkit, create_headless_window
+from piscis.ui.window import SecondaryWindow
+
+
+def create_frame(window, index, offset_ms):
+    return Frame(index, index * .025, window.get_epoch() + offset_ms, index * .025, 0)
+
+
+class DisplayRendererTestCase(TestCase):
+    def setUp(self):
+        self.application = create_headless_window()
+        self.display_process = DisplayProcess(self.application.configuration, self.application.layout)
+        self.application.display_process = self.display_process
+        self.application.secondary_window = None
+        self.window = SecondaryWindow(FakeWidget(), ArenaLayout(4), toolkit=HeadlessToolkit())
+        self.renderer = DisplayRenderer(self.window, SharedArenaState(4, self.display_process.shared_state.name))
+
+    def tearDown(self):
+        self.renderer.shared_state.close()
+        self.display_process.stop()
+
+    def start(self, index, diameter=.5):
+        tab = self.application.tabs[index]
+        tab.target_diameter, tab.scaling_velocity, tab.color = diameter, .1, "#FF0000"
+        tab.on_generate()
+        tab.on_start()
+
+    def test_draws_published_stimuli(self):
+        self.start(1)
+        frame = create_frame(self.application, 1, 1000)
+        self.assertTrue(self.renderer.render(frame))
+        self.application.render(frame)
+        scene_item = self.window.predator_draw_object[1]
+        expected = self.application.all_tab.arena_canvas.bounding_boxes(self.application.predator_array)[1]
+        self.assertEqual(scene_item.color, "#FF0000")
+        self.assertGreater(scene_item.coordinates[2], scene_item.coordinates[0])
+        width = (scene_item.coordinates[2] - scene_item.coordinates[0]) / self.window.canvas.winfo_width()
+        expected_width = (expected[2] - expected[0]) / self.application.all_tab.canvas.winfo_width()
+        self.assertAlmostEqual(width, expected_width, 2)
+
+    def test_keeps_rendering_without_new_state(self):
+        self.start(0)
+        self.renderer.render(create_frame(self.application, 1, 500))
+        calls = self.window.canvas.calls.copy()
+        self.renderer.render(create_frame(self.application, 2, 1000))
+        self.assertGreater(self.window.canvas.calls["coords"], calls["coords"])
+
+    def test_resized_display_redraws_stimuli(self):
+        self.start(0)
+        self.renderer.render(create_frame(self.application, 1, 500))
+        self.window.canvas.configure(width=1280, height=720)
+        self.assertTrue(self.renderer.predator_array.dirty.all())
+
+    def test_applies_backgrounds_and_fullscreen(self):
+        self.application.tabs[2].change_background_color("#00FF00")
+        self.display_process.change_background_color("#101010")
+        self.application.on_fullscreen()
+        self.renderer.render(create_frame(self.application, 1, 0))
+        background = self.window.arena_canvas.backgrounds[2]
+        self.assertEqual(self.window.canvas.items[background]["options"]["fill"], "#00FF00")
+        self.assertEqual(self.window.current_background_color, "#101010")
+        self.assertTrue(self.renderer.is_fullscreen)
+
+    def test_stops_when_display_is_closed(self):
+        self.display_process.shared_state.close_display()
+        self.assertFalse(self.renderer.render(create_frame(self.application, 1, 0)))
+
+
+
+class DisplayProcessTestCase(TestCase):
+    def setUp(self):
+        application = create_headless_window()
+        self.display_process = DisplayProcess(application.configuration, application.layout)
+
+    def replace_process(self, seconds):
+        context = multiprocessing.get_context("spawn")
+        self.display_process.process = context.Process(target=time.sleep, args=(seconds,), daemon=True)
+
+    def test_stop_joins_finished_display(self):
+        self.replace_process(0)
+        self.display_process.start()
+        self.display_process.stop()
+        self.assertEqual(self.display_process.process.exitcode, 0)
+
+    def test_stop_terminates_hanging_display(self):
+        self.replace_process(60)
+        self.display_process.start()
+        self.assertTrue(self.display_process.is_alive())
+        with patch("piscis.ui.display_process.DISPLAY_JOIN_TIMEOUT", .01):
+            self.display_process.stop()
+        self.assertFalse(self.display_process.is_alive())
+        self.assertNotEqual(self.display_process.process.exitcode, 0)
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+from piscis.clock import VirtualClock
+from piscis.events import EventRing, EventLog, EventWriter, START, STOP, TARGET_REACHED, EVENT_LOG_HEADER
+
+
+class EventRingTestCase(TestCase):
+    def setUp(self):
+        self.ring = EventRing(3)
+
+    def test_rejects_empty_ring(self):
+        with self.assertRaises(ValueError):
+            EventRing(0)
+
+    def test_pop_returns_events_in_order(self):
+        self.ring.push(1, 0, 0, 10, .5)
+        self.ring.push(2, 1, 3, 20, 0)
+        timestamps, arenas, kinds, epochs, values = self.ring.pop_all()
+        self.assertEqual(list(timestamps), [1, 2])
+        self.assertEqual(list(arenas), [0, 1])
+        self.assertEqual(list(kinds), [0, 3])
+        self.assertEqual(list(epochs), [10, 20])
+        self.assertEqual(list(values), [.5, 0])
+        self.assertEqual(len(self.ring), 0)
+
+    def test_full_ring_drops_new_events(self):
+        for i in range(4):
+            self.ring.push(i, 0, 0, 0, 0)
+        self.assertEqual(self.ring.dropped, 1)
+        self.assertEqual(list(self.ring.pop_all()[0]), [0, 1, 2])
+
+    def test_wraps_around(self):
+        for i in range(3):
+            self.ring.push(i, 0, 0, 0, 0)
+        self.ring.pop_all()
+        for i in range(3, 5):
+            self.ring.push(i, 0, 0, 0, 0)
+        self.assertEqual(list(self.ring.pop_all()[0]), [3, 4])
+
+
+class EventLogTestCase(TestCase):
+    def test_records_monotonic_timestamps(self):
+        clock = VirtualClock(start=1e-6)
+        event_log = EventLog(8, clock.monotonic_ns)
+        event_log.record(START, 2, 5000, .5)
+        clock.advance(1e-9)
+        event_log.record(STOP, 2)
+        self.assertEqual(event_log.drain(), [(1000, 2, START, 5000, .5), (1001, 2, STOP, 0, 0.)])
+        self.assertEqual(event_log.drain(), [])
+
+    def test_counts_dropped_events(self):
+        event_log = EventLog(1, VirtualClock().monotonic_ns)
+        self.assertTrue(event_log.record(START, 0))
+        self.assertFalse(event_log.record(STOP, 0))
+        self.assertEqual(event_log.get_dropped(), 1)
+
+
+class EventWriterTestCase(TestCase):
+    def setUp(self):
+        handle, self.file_path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        os.remove(self.file_path)
+        self.clock = VirtualClock(start=1e-6)
+        self.event_log = EventLog(8, self.clock.monotonic_ns)
+        self.writer = EventWriter(self.event_log, self.file_path, flush_interval=.01)
+
+    def tearDown(self):
+        self.writer.stop()
+        os.remove(self.file_path)
+
+    def read_lines(self):
+        with open(self.file_path) as log_file:
+            return log_file.readlines()
+
+    def test_writes_header_once(self):
+        self.writer.start()
+        self.writer.stop()
+        self.writer.start()
+        self.writer.stop()
+        self.assertEqual(self.read_lines(), [EVENT_LOG_HEADER])
+
+    def test_flushes_events_on_stop(self):
+        self.writer.start()
+        self.event_log.record(TARGET_REACHED, 0, 4000, .25)
+        self.writer.stop()
+        self.assertFalse(self.writer.is_running())
+        self.assertEqual(self.read_lines()[1:], ["1000,1,target-reached,4000,0.25\n"])
+
+    def test_flushes_events_periodically_while_running(self):
+        self.writer.start()
+        self.event_log.record(START, 1)
+        deadline = time.monotonic() + 5
+        while len(self.read_lines()) < 2 and time.monotonic() < deadline:
+            time.sleep(.01)
+        self.assertTrue(self.writer.is_running())
+        self.assertEqual(self.read_lines()[1:], ["1000,2,start,0,0\n"])
+
+    def test_flush_appends_batches(self):
+        self.writer.start()
+        self.writer.stop()
+        self.event_log.record(START, 0)
+        self.clock.advance(1e-9)
+        self.event_log.record(STOP, 3)
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(self.writer.flush(), 0)
+        self.assertEqual(self.read_lines()[1:], ["1000,1,start,0,0\n", "1001,4,stop,0,0\n"])
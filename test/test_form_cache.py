@@ -0,0 +1,81 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from xml.etree import ElementTree
+from piscis.ui.form_cache import FormCache, dump_element, load_element
+from piscis.ui.toolkit import get_form_path
+
+FORM = """<?xml version='1.0' encoding='utf-8'?>
+<interface>
+  <object class="ttk.Frame" id="main_frame">
+    <property name="height">200</property>
+    <child>
+      <object class="tk.Canvas" id="canvas">
+        <property name="width">300</property>
+      </object>
+    </child>
+  </object>
+</interface>
+"""
+
+
+def get_objects(root):
+    return [(element.get("id"), element.get("class"), [(child.get("name"), child.text)
+                                                       for child in element.findall("property")])
+            for element in root.iter("object")]
+
+
+class ElementTestCase(TestCase):
+    def test_round_trip(self):
+        root = ElementTree.parse(get_form_path("single_canvas_tab.ui")).getroot()
+        self.assertEqual(get_objects(load_element(dump_element(root))), get_objects(root))
+
+
+class FormCacheTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.form_path = os.path.join(self.directory.name, "form.ui")
+        self.cache_directory = os.path.join(self.directory.name, "cache")
+        with open(self.form_path, "w") as form_file:
+            form_file.write(FORM)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_caches_roots_in_memory(self):
+        form_cache = FormCache()
+        root = form_cache.get_root(self.form_path)
+        self.assertIs(form_cache.get_root(self.form_path), root)
+        self.assertEqual((form_cache.misses, form_cache.hits), (1, 1))
+        self.assertIn("1 parsed", form_cache.get_summary())
+
+    def test_loads_roots_from_disk_cache(self):
+        FormCache(self.cache_directory).get_root(self.form_path)
+        form_cache = FormCache(self.cache_directory)
+        root = form_cache.get_root(self.form_path)
+        self.assertEqual((form_cache.misses, form_cache.disk_hits), (0, 1))
+        self.assertEqual(get_objects(root)[1], ("canvas", "tk.Canvas", [("width", "300")]))
+
+    def test_changed_forms_are_parsed_again(self):
+        FormCache(self.cache_directory).get_root(self.form_path)
+        with open(self.form_path, "w") as form_file:
+            form_file.write(FORM.replace("300", "400").replace("200", "20"))
+        form_cache = FormCache(self.cache_directory)
+        root = form_cache.get_root(self.form_path)
+        self.assertEqual(form_cache.misses, 1)
+        self.assertEqual(get_objects(root)[1][2], [("width", "400")])
+
+    def test_ignores_corrupt_cache_files(self):
+        form_cache = FormCache(self.cache_directory)
+        form_cache.get_root(self.form_path)
+        with open(form_cache.get_cache_path(os.path.abspath(self.form_path)), "wb") as cache_file:
+            cache_file.write(b"broken")
+        form_cache = FormCache(self.cache_directory)
+        form_cache.get_root(self.form_path)
+        self.assertEqual(form_cache.misses, 1)
+
+    def test_unwritable_cache_directory_still_parses_forms(self):
+        form_cache = FormCache(self.form_path)
+        root = form_cache.get_root(self.form_path)
+        self.assertEqual(get_objects(root)[0][0], "main_frame")
+        self.assertEqual(form_cache.misses, 1)
@@ -0,0 +1,159 @@
+from unittest import TestCase
+import numpy as np
+from piscis.config import Configuration, FRAMEBUFFER
+from piscis.layout import ArenaLayout
+from piscis.raster import parse_color
+from piscis.scheduler import Frame
+from piscis.ui.framebuffer import Framebuffer, get_pixel_regions
+from piscis.ui.headless import FakeCanvas, HeadlessToolkit, create_headless_window
+from piscis.ui.window import FramebufferCanvas, create_arena_canvas, ArenaCanvas
+
+WHITE = parse_color("#FFFFFF")
+BLACK = parse_color("#000000")
+
+
+class FramebufferTestCase(TestCase):
+    def setUp(self):
+        self.framebuffer = Framebuffer(410, 210, ArenaLayout(4, 2, 2, spacing=10).get_cells(410, 210))
+        self.framebuffer.compose()
+
+    def test_pixel_regions_are_clipped_to_the_frame(self):
+        regions = get_pixel_regions(np.array([[10.4, 10.6, 100., 300.]]), 200, 100)
+        self.assertEqual(regions.tolist(), [[10, 11, 110, 100]])
+
+    def test_first_frame_covers_everything(self):
+        framebuffer = Framebuffer(100, 50, ArenaLayout(1).get_cells(100, 50))
+        self.assertEqual(framebuffer.compose(), (0, 0, 100, 50))
+        self.assertIsNone(framebuffer.compose())
+
+    def test_draws_discs_inside_their_cell(self):
+        self.framebuffer.draw(3, (290, 140, 330, 180), "#000000")
+        self.assertEqual(self.framebuffer.compose(), (290, 140, 330, 180))
+        frame = self.framebuffer.frame
+        self.assertEqual(tuple(frame[160, 310]), BLACK)
+        self.assertEqual(tuple(frame[160, 250]), WHITE)
+        self.assertEqual(tuple(frame[50, 100]), WHITE)
+
+    def test_clips_discs_at_the_cell_border(self):
+        self.framebuffer.draw(0, (150, 20, 250, 120), "#000000")
+        self.framebuffer.compose()
+        self.assertEqual(tuple(self.framebuffer.frame[70, 199]), BLACK)
+        self.assertEqual(tuple(self.framebuffer.frame[70, 215]), WHITE)
+
+    def test_unchanged_discs_do_not_dirty_cells(self):
+        self.framebuffer.draw(1, (250, 20, 260, 30), "#000000")
+        self.framebuffer.compose()
+        self.framebuffer.draw(1, (250, 20, 260, 30), "#000000")
+        self.framebuffer.set_background(1, "#FFFFFF")
+        self.assertIsNone(self.framebuffer.compose())
+
+    def test_background_changes_repaint_the_whole_cell(self):
+        self.framebuffer.set_background(0, "#FF0000")
+        self.framebuffer.draw(3, (250, 120, 260, 130), "#000000")
+        self.assertEqual(self.framebuffer.compose(), (10, 10, 260, 130))
+        self.assertEqual(tuple(self.framebuffer.frame[20, 20]), (255, 0, 0))
+
+    def test_damage_covers_the_old_and_new_disc(self):
+        self.framebuffer.draw(0, (80, 40, 120, 80), "#000000")
+        self.framebuffer.compose()
+        self.framebuffer.draw(0, (95, 55, 105, 65), "#000000")
+        self.assertEqual(self.framebuffer.compose(), (80, 40, 120, 80))
+        self.assertEqual(tuple(self.framebuffer.frame[45, 100]), WHITE)
+        self.assertEqual(tuple(self.framebuffer.frame[60, 100]), BLACK)
+
+    def test_clearing_erases_the_disc(self):
+        self.framebuffer.draw(0, (20, 20, 60, 60), "#000000")
+        self.framebuffer.compose()
+        self.framebuffer.clear(0)
+        self.framebuffer.compose()
+        self.assertEqual(tuple(self.framebuffer.frame[40, 40]), WHITE)
+        self.framebuffer.clear(0)
+        self.assertIsNone(self.framebuffer.compose())
+
+    def test_recoloring_a_disc_repaints_it(self):
+        self.framebuffer.draw(0, (20, 20, 60, 60), "#000000")
+        self.framebuffer.compose()
+        self.framebuffer.draw(0, (20, 20, 60, 60), "#FF0000")
+        self.assertEqual(self.framebuffer.compose(), (10, 10, 200, 100))
+        self.assertEqual(tuple(self.framebuffer.frame[40, 40]), (255, 0, 0))
+
+    def test_hidden_discs_in_blank_cells_cause_no_damage(self):
+        self.framebuffer.draw(2, (50, 150, 50, 150), "#000000")
+        self.assertIsNone(self.framebuffer.compose())
+
+    def test_fill_repaints_spacing(self):
+        self.framebuffer.fill("#00FF00")
+        self.assertEqual(self.framebuffer.compose(), (0, 0, 410, 210))
+        self.assertEqual(tuple(self.framebuffer.frame[5, 5]), (0, 255, 0))
+        self.assertEqual(tuple(self.framebuffer.frame[20, 20]), WHITE)
+
+
+class FramebufferCanvasTestCase(TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas(410, 210)
+        self.arena_canvas = create_arena_canvas(self.canvas, ArenaLayout(4, 2, 2, spacing=10), FRAMEBUFFER, None,
+                                                HeadlessToolkit(), show_names=True)
+
+    def test_replaces_cell_items_with_one_image(self):
+        self.assertIsInstance(self.arena_canvas, FramebufferCanvas)
+        self.assertEqual(len(self.canvas.find_kind("image")), 1)
+        self.assertEqual(len(self.canvas.find_kind("rectangle")), 0)
+        self.assertEqual(len(self.canvas.find_kind("text")), 4)
+
+    def test_presents_changed_regions(self):
+        image = self.arena_canvas.image
+        self.assertTrue(self.arena_canvas.present())
+        self.assertEqual(image.puts[0][1], (0, 0))
+        self.assertFalse(self.arena_canvas.present())
+        self.arena_canvas.scene_items[3].update((290, 140, 330, 180), "black")
+        self.assertTrue(self.arena_canvas.present())
+        data, to = image.puts[-1]
+        self.assertEqual(to, (290, 140))
+        self.assertTrue(data.startswith(b"P6 40 40 255\n"))
+
+    def test_deleted_items_are_erased(self):
+        self.arena_canvas.scene_items[3].update((290, 140, 330, 180), "#000000")
+        self.arena_canvas.present()
+        self.arena_canvas.scene_items[3].delete()
+        self.assertTrue(self.arena_canvas.present())
+        self.assertEqual(tuple(self.arena_canvas.framebuffer.frame[160, 310]), WHITE)
+
+    def test_background_changes_are_shown_immediately(self):
+        self.arena_canvas.present()
+        self.arena_canvas.change_background("#123456", 2)
+        self.assertEqual(self.arena_canvas.image.puts[-1][1], (10, 110))
+        self.assertEqual(tuple(self.arena_canvas.framebuffer.frame[150, 50]), parse_color("#123456"))
+
+    def test_feeds_sinks(self):
+        frames = list()
+        self.arena_canvas.sinks.append(frames.append)
+        self.arena_canvas.present()
+        self.assertEqual(frames[0].shape, (210, 410, 3))
+
+    def test_resize_recreates_the_framebuffer(self):
+        self.arena_canvas.change_background("#123456", 3)
+        self.canvas.configure(width=810, height=410)
+        self.assertEqual(self.arena_canvas.framebuffer.frame.shape, (410, 810, 3))
+        self.assertEqual((self.arena_canvas.image.width, self.arena_canvas.image.height), (810, 410))
+        self.assertEqual(self.arena_canvas.image.puts[-1][1], (0, 0))
+        self.assertEqual(tuple(self.arena_canvas.framebuffer.frame[300, 600]), parse_color("#123456"))
+        self.assertEqual(len(self.canvas.find_kind("image")), 1)
+
+    def test_vector_mode_keeps_canvas_items(self):
+        self.assertIsInstance(create_arena_canvas(FakeCanvas(410, 210), ArenaLayout(4)), ArenaCanvas)
+
+
+class FramebufferWindowTestCase(TestCase):
+    def test_render_composes_displays_into_images(self):
+        configuration = Configuration()
+        configuration.render_mode = FRAMEBUFFER
+        window = create_headless_window(configuration)
+        tab = window.tabs[1]
+        tab.target_diameter, tab.scaling_velocity, tab.starting_position = .5, .1, (.5, .5)
+        tab.generate()
+        tab.start_run()
+        images = [window.all_tab.arena_canvas.image, window.secondary_window.arena_canvas.image]
+        puts = [image.put_count for image in images]
+        window.render(Frame(1, .025, window.get_epoch() + 1000, .025, 0))
+        self.assertEqual([image.put_count for image in images], [count + 1 for count in puts])
+        self.assertEqual(len(window.secondary_window.canvas.find_kind("oval")), 0)
@@ -0,0 +1,42 @@
+from unittest import TestCase
+import numpy as np
+from piscis.layout import ArenaLayout
+from piscis.model import PredatorArray
+from piscis.ui.geometry import CanvasGeometry
+from piscis.ui.headless import FakeCanvas, FakeEvent
+
+
+class CanvasGeometryTestCase(TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas(410, 210)
+        self.geometry = CanvasGeometry(self.canvas, ArenaLayout(4, 2, 2, spacing=10))
+        self.changes = list()
+        self.geometry.add_listener(lambda: self.changes.append((self.geometry.width, self.geometry.height)))
+
+    def test_caches_cells_of_requested_size(self):
+        self.assertEqual((self.geometry.width, self.geometry.height), (410, 210))
+        self.assertEqual(self.geometry.cells[3].tolist(), [210, 110, 190, 90])
+        self.assertEqual(self.geometry.offsets[3].tolist(), [210, 110, 210, 110])
+
+    def test_configure_events_update_cells(self):
+        self.canvas.configure(width=810)
+        self.assertEqual(self.changes, [(810, 210)])
+        self.assertEqual(self.geometry.cells[3].tolist(), [410, 110, 390, 90])
+
+    def test_ignores_unchanged_and_unmapped_sizes(self):
+        self.canvas.bindings["<Configure>"](FakeEvent(width=410, height=210))
+        self.canvas.bindings["<Configure>"](FakeEvent(width=1, height=1))
+        self.assertEqual(self.changes, [])
+        self.assertEqual(self.geometry.width, 410)
+
+    def test_bounding_boxes_use_cell_transforms(self):
+        predator_array = PredatorArray(4)
+        predator_array.positions[:] = .5
+        predator_array.diameters[:] = .1
+        boxes = self.geometry.bounding_boxes(predator_array)
+        np.testing.assert_allclose(boxes[3], predator_array.bounding_boxes(190, 90)[3] + [210, 110, 210, 110])
+
+    def test_canvas_without_layout_is_one_cell(self):
+        geometry = CanvasGeometry(FakeCanvas(700, 450))
+        self.assertEqual(geometry.cells.tolist(), [[0, 0, 700, 450]])
+        self.assertEqual(geometry.normalize(350, 90), (.5, .2))
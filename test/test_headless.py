@@ -0,0 +1,99 @@
+from unittest import TestCase
+from pygubu import Builder
+from piscis.ui.form_cache import FormCache
+from piscis.ui.headless import FakeWidget, FakeCanvas, FakeBuilder, FakeStyle, HeadlessToolkit
+from piscis.ui.toolkit import TkToolkit, get_form_path
+
+
+class FakeWidgetTestCase(TestCase):
+    def setUp(self):
+        self.widget = FakeWidget()
+
+    def test_ignores_unknown_methods(self):
+        self.assertIsNone(self.widget.grid(row=0))
+        self.assertIs(self.widget.winfo_toplevel(), self.widget)
+        self.assertFalse(hasattr(self.widget, "__deepcopy__"))
+
+    def test_stores_values_and_options(self):
+        self.widget.set("linear")
+        self.widget.configure(text="Screen 1")
+        self.assertEqual(self.widget.get(), "linear")
+        self.assertEqual(self.widget.cget("text"), "Screen 1")
+
+    def test_runs_scheduled_callbacks(self):
+        calls = list()
+        self.widget.after(10, calls.append, 1)
+        cancelled = self.widget.after(10, calls.append, 2)
+        self.widget.after_cancel(cancelled)
+        self.assertEqual(self.widget.run_scheduled(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(self.widget.run_scheduled(), 0)
+
+    def test_runs_due_callbacks_in_order(self):
+        now = [0.]
+        widget = FakeWidget(lambda: now[0])
+        calls = list()
+        late = widget.after(30, calls.append, 3)
+        widget.after(10, calls.append, 1)
+        widget.after(20, calls.append, 2)
+        self.assertEqual(widget.get_next_due(), 0.01)
+        now[0] = 0.025
+        self.assertEqual(widget.run_due(), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(widget.get_next_due(), 0.03)
+        self.assertIsNone(widget.get_next_due(late))
+
+
+class FakeCanvasTestCase(TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas(700, 450)
+
+    def test_reports_size(self):
+        self.assertEqual((self.canvas.winfo_width(), self.canvas.winfo_reqheight()), (700, 450))
+
+    def test_tracks_items_and_calls(self):
+        oval = self.canvas.create_oval(1, 2, 3, 4, fill="#000")
+        self.canvas.create_line(0, 0, 1, 1)
+        self.canvas.coords(oval, 5, 6, 7, 8)
+        self.canvas.itemconfigure(oval, fill="#FFF")
+        self.assertEqual(self.canvas.coords(oval), [5, 6, 7, 8])
+        self.assertEqual(self.canvas.items[oval]["options"], {"fill": "#FFF"})
+        self.assertEqual(self.canvas.find_kind("line"), [2])
+        self.assertEqual(self.canvas.calls["coords"], 2)
+        self.canvas.delete(oval)
+        self.assertEqual(self.canvas.find_kind("oval"), [])
+
+
+class FakeBuilderTestCase(TestCase):
+    def setUp(self):
+        self.builder = FakeBuilder()
+        self.builder.add_from_file(get_form_path("single_canvas_tab.ui"))
+
+    def test_creates_canvas_with_form_size(self):
+        canvas = self.builder.get_object('canvas')
+        self.assertIsInstance(canvas, FakeCanvas)
+        self.assertEqual((canvas.winfo_width(), canvas.winfo_height()), (700, 450))
+
+    def test_returns_same_object(self):
+        self.assertIs(self.builder.get_object('scale'), self.builder.get_object('scale'))
+
+    def test_unknown_objects_raise(self):
+        with self.assertRaises(KeyError):
+            self.builder.get_object('missing')
+
+
+class HeadlessToolkitTestCase(TestCase):
+    def test_creates_fakes(self):
+        toolkit = HeadlessToolkit()
+        self.assertIsInstance(toolkit.load_form("main_window.ui"), FakeBuilder)
+        self.assertIsInstance(toolkit.create_style(), FakeStyle)
+        self.assertEqual(toolkit.toplevels, [toolkit.create_toplevel()])
+
+
+class TkToolkitTestCase(TestCase):
+    def test_loads_forms_through_form_cache(self):
+        toolkit = TkToolkit(FormCache())
+        builder = toolkit.load_form("main_window.ui")
+        self.assertIsInstance(builder, Builder)
+        self.assertIn(get_form_path("main_window.ui"), toolkit.form_cache.roots)
+        self.assertIsInstance(TkToolkit().form_cache, FormCache)
@@ -0,0 +1,120 @@
+import csv
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from piscis.instrumentation import Histogram, FrameStatistics, StartupTimer
+from piscis.scheduler import Frame
+
+
+class HistogramTestCase(TestCase):
+    def setUp(self):
+        self.histogram = Histogram(0.001, 10)
+
+    def test_is_empty(self):
+        self.assertEqual(self.histogram.count, 0)
+        self.assertEqual(self.histogram.get_mean(), 0.0)
+        self.assertEqual(self.histogram.get_percentile(99), 0.0)
+
+    def test_adds_values_into_bins(self):
+        self.histogram.add(0.0005)
+        self.histogram.add(0.0025)
+        self.assertEqual(list(self.histogram.counts[:4]), [1, 0, 1, 0])
+        self.assertAlmostEqual(self.histogram.get_mean(), 0.0015)
+        self.assertEqual(self.histogram.maximum, 0.0025)
+
+    def test_values_beyond_last_bin_overflow(self):
+        self.histogram.add(1.0)
+        self.assertEqual(self.histogram.counts[-1], 1)
+        self.assertEqual(len(self.histogram.counts), 11)
+
+    def test_percentile_is_upper_bin_edge(self):
+        for _ in range(99):
+            self.histogram.add(0.0015)
+        self.histogram.add(0.0085)
+        self.assertAlmostEqual(self.histogram.get_percentile(50), 0.002)
+        self.assertAlmostEqual(self.histogram.get_percentile(100), 0.0085)
+
+    def test_bins(self):
+        bins = list(self.histogram.get_bins())
+        self.assertEqual(len(bins), 11)
+        self.assertEqual(bins[0], (0, 0.001, 0))
+        self.assertEqual(bins[-1][1], float("inf"))
+
+
+class FrameStatisticsTestCase(TestCase):
+    def setUp(self):
+        self.statistics = FrameStatistics(40, 2)
+
+    def test_records_render_duration_and_interval(self):
+        self.statistics.record_frame(Frame(1, 10.025, 0, 10.025, 0), 0.002)
+        self.statistics.record_frame(Frame(2, 10.050, 0, 10.050, 0), 0.003)
+        self.assertEqual(self.statistics.frames, 2)
+        self.assertEqual(self.statistics.render_durations.count, 2)
+        self.assertEqual(self.statistics.frame_intervals.count, 1)
+        self.assertAlmostEqual(self.statistics.frame_intervals.total, 0.025)
+
+    def test_first_frame_after_restart_has_no_interval(self):
+        self.statistics.record_frame(Frame(1, 10.025, 0, 10.025, 0), 0.002)
+        self.statistics.record_frame(Frame(1, 50.025, 0, 50.025, 0), 0.002)
+        self.assertEqual(self.statistics.frame_intervals.count, 0)
+
+    def test_counts_late_and_dropped_frames(self):
+        self.statistics.record_frame(Frame(1, 10.030, 0, 10.025, 0), 0.002)
+        self.statistics.record_frame(Frame(5, 10.130, 0, 10.125, 3), 0.002)
+        self.assertEqual(self.statistics.late_frames, 0)
+        self.statistics.record_frame(Frame(6, 10.160, 0, 10.150, 0), 0.002)
+        self.assertEqual(self.statistics.late_frames, 1)
+        self.assertEqual(self.statistics.dropped_frames, 3)
+
+    def test_records_draw_cost_per_arena(self):
+        self.statistics.record_draw(1, 0.001)
+        self.assertEqual(self.statistics.draw_durations[0].count, 0)
+        self.assertEqual(self.statistics.draw_durations[1].count, 1)
+
+    def test_command_latency_is_measured_at_first_frame(self):
+        self.statistics.expect_frame(1, 10.)
+        self.statistics.record_first_frame(0, 10.5)
+        self.statistics.record_first_frame(1, 10.004)
+        self.statistics.record_first_frame(1, 10.5)
+        self.assertEqual(self.statistics.command_latencies.count, 1)
+        self.assertAlmostEqual(self.statistics.command_latencies.get_mean(), .004)
+        self.assertEqual(self.statistics.pending_commands, dict())
+
+    def test_summary_lists_every_histogram(self):
+        summary = self.statistics.get_summary()
+        self.assertIn("Dropped frames: 0", summary)
+        self.assertIn("draw_duration_arena_2", summary)
+
+    def test_export_csv(self):
+        self.statistics.record_frame(Frame(1, 10.025, 0, 10.025, 0), 0.0025)
+        with TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "statistics.csv")
+            self.statistics.export_csv(file_path)
+            with open(file_path) as csv_file:
+                rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0], ["metric", "lower_ms", "upper_ms", "count"])
+        self.assertEqual(rows[1], ["frames", "", "", "1"])
+        self.assertIn(["render_duration", "2", "3", "1"], rows)
+
+
+class StartupTimerTestCase(TestCase):
+    def setUp(self):
+        self.now = [0.]
+        self.timer = StartupTimer(clock=lambda: self.now[0])
+
+    def test_reports_phases_and_remainder(self):
+        with self.timer.phase("forms"):
+            self.now[0] = .03
+        self.now[0] = .04
+        self.assertEqual(self.timer.finish(), .04)
+        report = self.timer.get_report().splitlines()
+        self.assertEqual(report[0], "Startup: 40.0 ms")
+        self.assertIn("30.0 ms  75.0 %", report[1])
+        self.assertIn("10.0 ms  25.0 %", report[2])
+        self.assertEqual(len(report), 3)
+
+    def test_phases_are_recorded_on_errors(self):
+        with self.assertRaises(KeyError):
+            with self.timer.phase("tabs"):
+                raise KeyError()
+        self.assertEqual(self.timer.phases, [("tabs", 0.)])
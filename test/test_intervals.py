@@ -0,0 +1,115 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from piscis.clock import VirtualClock
+from piscis.intervals import IntervalEngine, RUN, PAUSE
+
+
+class IntervalEngineTestCase(TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=1000.)
+        self.engine = IntervalEngine(self.clock.monotonic)
+        self.ticks = list()
+        self.ends = list()
+
+    def on_tick(self, remaining, timestamp):
+        self.ticks.append((remaining, timestamp))
+
+    def on_end(self, timestamp):
+        self.ends.append(timestamp)
+
+    def advance(self, seconds):
+        self.clock.advance(seconds)
+        self.engine.run_pending()
+
+    def test_ticks_every_second_until_the_end(self):
+        self.engine.start_phase(0, RUN, 3, self.on_tick, self.on_end)
+        self.advance(3.5)
+        self.assertEqual(self.ticks, [(2, 1001.0), (1, 1002.0)])
+        self.assertEqual(self.ends, [1003.0])
+        self.assertIsNone(self.engine.get_phase(0))
+
+    def test_phase_ends_at_absolute_deadline_despite_late_polling(self):
+        self.engine.start_phase(0, RUN, 1800, self.on_tick, self.on_end)
+        for _ in range(1800):
+            self.advance(1.0137)
+        self.assertEqual(self.ends, [2800.0])
+
+    def test_chained_phases_do_not_drift(self):
+        def on_run_end(timestamp):
+            self.ends.append(timestamp)
+            self.engine.start_phase(0, PAUSE, 2, self.on_tick, self.on_end, timestamp)
+
+        self.engine.start_phase(0, RUN, 3, self.on_tick, on_run_end)
+        self.advance(3.4)
+        self.assertEqual(self.engine.get_phase(0).name, PAUSE)
+        self.advance(1.7)
+        self.assertEqual(self.ends, [1003.0, 1005.0])
+
+    def test_zero_length_phase_ends_immediately(self):
+        self.engine.start_phase(0, PAUSE, 0, self.on_tick, self.on_end)
+        self.engine.run_pending()
+        self.assertEqual(self.ends, [1000.0])
+
+    def test_cancel_stops_phase(self):
+        self.engine.start_phase(0, RUN, 3, self.on_tick, self.on_end)
+        self.engine.cancel(0)
+        self.engine.cancel(0)
+        self.advance(5)
+        self.assertEqual(self.ticks, [])
+        self.assertEqual(self.ends, [])
+
+    def test_phase_can_be_cancelled_from_its_tick(self):
+        def on_tick(remaining, timestamp):
+            self.on_tick(remaining, timestamp)
+            self.engine.cancel(0)
+
+        self.engine.start_phase(0, RUN, 3, on_tick, self.on_end)
+        self.advance(5)
+        self.assertEqual(self.ticks, [(2, 1001.0)])
+        self.assertEqual(self.ends, [])
+
+    def test_starting_a_phase_replaces_previous_phase(self):
+        self.engine.start_phase(0, RUN, 3, self.on_tick, self.on_end)
+        self.engine.start_phase(0, PAUSE, 1, self.on_tick, self.on_end)
+        self.advance(5)
+        self.assertEqual(self.ends, [1001.0])
+
+    def test_arenas_are_independent(self):
+        self.engine.start_phase(0, RUN, 1, self.on_tick, self.on_end)
+        self.engine.start_phase(1, RUN, 2, self.on_tick, self.on_end)
+        self.engine.cancel(0)
+        self.advance(2)
+        self.assertEqual(self.ends, [1002.0])
+
+    def test_get_delay_until_next_event(self):
+        self.assertIsNone(self.engine.get_delay())
+        self.engine.start_phase(0, RUN, 3, self.on_tick, self.on_end)
+        self.clock.advance(.25)
+        self.assertEqual(self.engine.get_delay(), .75)
+        self.assertEqual(self.engine.get_phase(0).get_remaining(self.clock.monotonic()), 2.75)
+
+
+class MainLoopIntervalEngineTestCase(TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=1000.)
+        self.master = MagicMock()
+        self.master.after.side_effect = lambda delay, callback: "after#%d" % self.master.after.call_count
+        self.engine = IntervalEngine(self.clock.monotonic, self.master)
+
+    def test_arms_timer_for_next_deadline(self):
+        self.engine.start_phase(0, RUN, 3, lambda *args: None, lambda *args: None)
+        self.master.after.assert_called_once_with(1000, self.engine.on_timer)
+
+    def test_timer_runs_due_events_and_rearms(self):
+        ends = list()
+        self.engine.start_phase(0, RUN, 1, lambda *args: None, ends.append)
+        self.clock.advance(1.0004)
+        self.engine.on_timer()
+        self.assertEqual(ends, [1001.0])
+        self.assertIsNone(self.engine.after_id)
+
+    def test_cancel_disarms_timer(self):
+        self.engine.start_phase(0, RUN, 3, lambda *args: None, lambda *args: None)
+        self.engine.cancel(0)
+        self.master.after_cancel.assert_called_once_with("after#1")
+        self.assertIsNone(self.engine.after_id)
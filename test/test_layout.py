@@ -0,0 +1,43 @@
+from unittest import TestCase
+from piscis.layout import ArenaLayout, LayoutError, parse_layout
+
+
+class ArenaLayoutTestCase(TestCase):
+    def test_chooses_square_grid(self):
+        layout = ArenaLayout(4)
+        self.assertEqual((layout.rows, layout.columns), (2, 2))
+        layout = ArenaLayout(24)
+        self.assertEqual((layout.rows, layout.columns), (5, 5))
+
+    def test_completes_partial_grid(self):
+        self.assertEqual(ArenaLayout(96, rows=8).columns, 12)
+        self.assertEqual(ArenaLayout(96, columns=12).rows, 8)
+
+    def test_rejects_too_small_grid(self):
+        with self.assertRaises(LayoutError):
+            ArenaLayout(96, 8, 8)
+        with self.assertRaises(LayoutError):
+            ArenaLayout(0)
+
+    def test_position_is_row_major(self):
+        self.assertEqual(ArenaLayout(6, 2, 3).get_position(4), (1, 1))
+
+    def test_cells_fill_canvas_with_spacing(self):
+        cells = ArenaLayout(4, 2, 2, spacing=10).get_cells(410, 210)
+        self.assertEqual(tuple(cells[0]), (10, 10, 190, 90))
+        self.assertEqual(tuple(cells[3]), (210, 110, 190, 90))
+
+    def test_cells_never_have_negative_size(self):
+        cells = ArenaLayout(4, 2, 2, spacing=10).get_cells(10, 10)
+        self.assertEqual(tuple(cells[0, 2:]), (0, 0))
+
+
+class ParseLayoutTestCase(TestCase):
+    def test_parses_rows_and_columns(self):
+        self.assertEqual(parse_layout("8x12"), (8, 12))
+        self.assertEqual(parse_layout("4X6"), (4, 6))
+
+    def test_rejects_malformed_layout(self):
+        for text in ("8", "8x", "axb", "0x4", "2x3x4"):
+            with self.assertRaises(LayoutError):
+                parse_layout(text)
@@ -2,7 +2,10 @@ from math import sqrt
 from unittest import TestCase
 import time
 from unittest.mock import patch
-from piscis.model import MovementVector, DEGREES_45, ScalingVector, TimeTracker, PredatorFactory, Predator
+import numpy as np
+from piscis.model import MovementVector, DEGREES_45, ScalingVector, TimeTracker, PredatorFactory, Predator, \
+    PredatorArray, calculate_bounding_boxes, LINEAR, CONSTANT_LV, EXPONENTIAL, get_profile_diameter
+from piscis.events import EventLog, TARGET_REACHED
 
 STARTING_EPOCH = 100000000
 CURRENT_EPOCH = 100001414
@@ -63,6 +66,27 @@ class ScalingVectorTestCase(TestCase):
         current_diameter = vector.get_current_diameter(100)
         assertEqualFloat(current_diameter, 100)
 
+    def test_rejects_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            ScalingVector(5, 50, "quadratic")
+
+    def test_rejects_profile_without_parameter(self):
+        with self.assertRaises(ValueError):
+            ScalingVector(5, 50, CONSTANT_LV, 0)
+
+    def test_constant_lv_profile_reaches_target_at_end_of_loom(self):
+        vector = ScalingVector(.5, .25, CONSTANT_LV, .5)
+        vector.start(0)
+        assertEqualFloat(vector.get_current_diameter(0), .1, 1e-9)
+        assertEqualFloat(vector.get_current_diameter(1000), .5 / 3, 1e-9)
+        self.assertTrue(vector.is_target_diameter_reached(2000))
+
+    def test_exponential_profile_reaches_target_at_end_of_loom(self):
+        vector = ScalingVector(.5, .25, EXPONENTIAL, 1.)
+        vector.start(0)
+        assertEqualFloat(vector.get_current_diameter(1000), .5 * 0.36787944, 1e-6)
+        self.assertTrue(vector.is_target_diameter_reached(2000))
+
     def test_when_target_size_is_reached_is_target_size_reached_true(self):
         vector = ScalingVector(500, 1000)
         self.vector.start(0)
@@ -115,14 +139,11 @@ class PredatorTestCase(TestCase):
         self.pr.get_current_diameter(100)
         assertEqualFloat(self.pr.scaling_vector.starting_epoch, 50)
 
-    @patch("time.time")
-    def test_when_target_diamater_is_not_reached_keep_scaling_up(self, mock_time):
-        mock_time.return_value = 50
-        self.pr.start_scaling(time.time())
-        mock_time.return_value = 120
+    def test_when_target_diamater_is_not_reached_keep_scaling_up(self):
+        self.pr.start_scaling(50)
 
         self.pr.get_current_diameter(400000)
-        assertEqualFloat(self.pr.scaling_vector.starting_epoch, 120000.)
+        assertEqualFloat(self.pr.scaling_vector.starting_epoch, 400000.)
 
     def test_old_diameter_accessors(self):
         self.pr.set_old_diameter(5)
@@ -131,6 +152,13 @@ class PredatorTestCase(TestCase):
     def test_target_diameter_accessors(self):
         self.assertEqual(self.pr.get_target_diameter(), 120)
 
+    def test_can_set_profile(self):
+        self.pr.set_profile(EXPONENTIAL, 2.)
+        self.assertEqual(self.pr.scaling_vector.profile, EXPONENTIAL)
+        self.assertEqual(self.pr.scaling_vector.profile_parameter, 2.)
+        with self.assertRaises(ValueError):
+            self.pr.set_profile(CONSTANT_LV, -1)
+
 
 class PredatorFactoryTestCase(TestCase):
     def setUp(self):
@@ -153,6 +181,184 @@ class PredatorFactoryTestCase(TestCase):
         self.pf.target_diameter = 500
         self.assertEqual(self.pf.create().scaling_vector.target_diameter, 500)
 
+    def test_sets_predator_profile(self):
+        self.pf.profile = CONSTANT_LV
+        self.pf.profile_parameter = .5
+        self.assertEqual(self.pf.create().scaling_vector.profile, CONSTANT_LV)
+        self.assertEqual(self.pf.create().scaling_vector.profile_parameter, .5)
+
     def test_sets_predator_color(self):
         self.pf.color = "#FF00FF"
         self.assertEqual(self.pf.create().color, "#FF00FF")
+
+
+class PredatorArrayTestCase(TestCase):
+    def setUp(self):
+        self.pf = PredatorFactory()
+        self.predators = list()
+        for i, (diameter, velocity) in enumerate([(.2, .1), (.5, .4), (.1, 1.)]):
+            self.pf.starting_position = (.1 * (i + 1), .2 * (i + 1))
+            self.pf.target_diameter = diameter
+            self.pf.scaling_velocity = velocity
+            self.pf.movement_velocity = (DEGREES_45 * i, i)
+            predator = self.pf.create()
+            predator.start_both(STARTING_EPOCH)
+            self.predators.append(predator)
+
+        self.array = PredatorArray(4)
+        for i, predator in enumerate(self.predators):
+            self.array.assign(i, predator)
+
+    def test_has_capacity(self):
+        self.assertEqual(len(self.array), 4)
+
+    def test_unassigned_slots_are_inactive(self):
+        self.assertEqual(list(self.array.active), [True, True, True, False])
+
+    def test_diameters_match_predator(self):
+        epoch = STARTING_EPOCH + 1000
+        diameters, _ = self.array.evaluate(epoch)
+        self.assertEqual(diameters[0], self.predators[0].scaling_vector.get_current_diameter(epoch))
+        self.assertEqual(diameters[1], self.predators[1].scaling_vector.get_current_diameter(epoch))
+        self.assertEqual(diameters[3], 0)
+
+    def test_positions_match_movement_vector(self):
+        epoch = STARTING_EPOCH + 1500
+        _, positions = self.array.evaluate(epoch)
+        for i, predator in enumerate(self.predators):
+            expected_x, expected_y = predator.movement_vector.get_current_position(epoch)
+            assertEqualFloat(positions[i][0], expected_x, 1e-9)
+            assertEqualFloat(positions[i][1], expected_y, 1e-9)
+
+    def test_when_target_diameter_is_reached_restart_scaling(self):
+        epoch = STARTING_EPOCH + 500
+        diameters, _ = self.array.evaluate(epoch)
+        self.assertEqual(diameters[2], 0)
+        self.assertEqual(self.array.scaling_epochs[2], epoch)
+        self.assertEqual(self.predators[2].scaling_vector.starting_epoch, epoch)
+        self.assertEqual(self.predators[0].scaling_vector.starting_epoch, STARTING_EPOCH)
+
+    def test_target_reached_is_logged(self):
+        self.array.event_log = EventLog(8)
+        self.array.evaluate(STARTING_EPOCH + 500)
+        self.assertEqual([event[1:] for event in self.array.event_log.drain()],
+                         [(2, TARGET_REACHED, STARTING_EPOCH + 500, .1)])
+
+    def test_stopped_predators_never_reach_their_target(self):
+        self.predators[2].set_target_diameter(0)
+        self.array.sync(2)
+        self.array.event_log = EventLog(8)
+        self.array.evaluate(STARTING_EPOCH + 500)
+        self.assertEqual(self.array.event_log.drain(), [])
+        self.assertEqual(self.array.scaling_epochs[2], STARTING_EPOCH)
+
+    def test_sync_picks_up_changed_parameters(self):
+        self.predators[0].set_target_diameter(.05)
+        self.array.sync(0)
+        diameters, _ = self.array.evaluate(STARTING_EPOCH + 100)
+        assertEqualFloat(diameters[0], .01, 1e-9)
+        self.array.sync(3)
+        self.assertFalse(self.array.active[3])
+
+    def test_sync_all(self):
+        for predator in self.predators:
+            predator.set_scaling_velocity(0)
+        self.array.sync_all()
+        self.assertEqual(list(self.array.scaling_velocities), [0, 0, 0, 0])
+
+    def test_first_evaluation_marks_assigned_slots_changed(self):
+        self.array.evaluate(STARTING_EPOCH)
+        self.assertEqual(list(self.array.get_changed_indices()), [0, 1, 2])
+
+    def test_unchanged_slots_are_not_marked_changed(self):
+        self.predators[0].set_scaling_velocity(0)
+        self.array.sync(0)
+        self.array.evaluate(STARTING_EPOCH + 100)
+        self.array.evaluate(STARTING_EPOCH + 200)
+        self.assertEqual(list(self.array.get_changed_indices()), [1, 2])
+
+    def test_sync_marks_slot_changed(self):
+        self.array.evaluate(STARTING_EPOCH)
+        self.array.sync(3)
+        self.array.sync(1)
+        self.array.evaluate(STARTING_EPOCH)
+        self.assertEqual(list(self.array.get_changed_indices()), [1])
+
+    def test_mark_dirty_redraws_unchanged_slot(self):
+        self.predators[0].set_scaling_velocity(0)
+        self.array.sync(0)
+        self.array.evaluate(STARTING_EPOCH + 100)
+        self.array.mark_dirty(0)
+        self.array.evaluate(STARTING_EPOCH + 200)
+        self.assertEqual(list(self.array.get_changed_indices()), [0, 1, 2])
+
+    def test_is_animating_while_scaling_or_moving(self):
+        self.assertTrue(self.array.is_animating())
+
+    def test_stopped_predators_are_not_animating(self):
+        for predator in self.predators:
+            predator.set_target_diameter(0)
+            predator.movement_vector.magnitude = 0
+        self.array.sync_all()
+        self.assertFalse(self.array.is_animating())
+
+    def test_follows_trajectories(self):
+        self.pf.path = {"kind": "straight", "to": [.9, .5], "speed": .2}
+        self.pf.starting_position = .1, .5
+        predator = self.pf.create()
+        predator.start_both(STARTING_EPOCH)
+        self.array.assign(3, predator)
+        _, positions = self.array.evaluate(STARTING_EPOCH + 2000)
+        np.testing.assert_allclose(positions[3], (.5, .5))
+        self.assertEqual(predator.movement_vector.get_current_position(STARTING_EPOCH + 2000), (.5, .5))
+        self.assertEqual(self.array.trajectory_indices, [3])
+
+    def test_finished_trajectories_are_not_animating(self):
+        for predator in self.predators:
+            predator.set_scaling_velocity(0)
+            predator.movement_vector.magnitude = 0
+        self.pf.path = {"kind": "straight", "to": [.9, .5], "speed": .2}
+        self.pf.scaling_velocity = 0
+        self.pf.movement_velocity = (0, 0)
+        predator = self.pf.create()
+        predator.start_both(STARTING_EPOCH)
+        self.array.assign(3, predator)
+        self.array.sync_all()
+        self.array.evaluate(STARTING_EPOCH + 1000)
+        self.assertTrue(self.array.is_animating())
+        self.array.evaluate(STARTING_EPOCH + 60000)
+        self.assertFalse(self.array.is_animating())
+
+    def test_release_deactivates_slot(self):
+        self.array.release(1)
+        diameters, _ = self.array.evaluate(STARTING_EPOCH + 1000)
+        self.assertIsNone(self.array.predators[1])
+        self.assertEqual(diameters[1], 0)
+
+    def test_bounding_boxes_are_centered_on_position(self):
+        self.array.evaluate(STARTING_EPOCH + 1000)
+        boxes = self.array.bounding_boxes(200, 100)
+        self.assertEqual(tuple(boxes[0]), (10, 10, 30, 30))
+
+    def test_bounding_boxes_accept_size_per_arena(self):
+        self.array.evaluate(STARTING_EPOCH + 1000)
+        boxes = self.array.bounding_boxes([200, 100, 100, 100], [100, 50, 50, 50])
+        self.assertEqual(tuple(boxes[0]), (10, 10, 30, 30))
+        self.assertEqual(boxes.shape, (4, 4))
+
+
+class ProfileTestCase(TestCase):
+    def test_linear_profile_grows_with_velocity(self):
+        self.assertEqual(list(get_profile_diameter(LINEAR, [0, 1, 3], .5, .25, 0)), [0, .25, .5])
+
+    def test_profiles_stay_empty_without_velocity_or_target(self):
+        for profile in (LINEAR, CONSTANT_LV, EXPONENTIAL):
+            self.assertEqual(list(get_profile_diameter(profile, [0, 1], .5, 0, .5)), [0, 0])
+            self.assertEqual(list(get_profile_diameter(profile, [0, 1], 0, .5, .5)), [0, 0])
+
+
+class CalculateBoundingBoxesTestCase(TestCase):
+    def test_floors_half_of_predator_size(self):
+        boxes = calculate_bounding_boxes(101, 101, np.array([[.5, .5]]), np.array([.05]))
+        self.assertEqual(tuple(boxes[0]), (48.5, 48.5, 53.55, 53.55))
+
@@ -0,0 +1,77 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+import numpy as np
+from piscis.model import PredatorFactory
+from piscis.offline import Schedule, OfflineStimulus, OfflineRenderer
+
+
+def create_stimulus(schedule=None):
+    pf = PredatorFactory()
+    pf.starting_position = (.5, .5)
+    pf.target_diameter = .5
+    pf.scaling_velocity = 1.
+    pf.color = "#000000"
+    return OfflineStimulus(pf.create(), schedule)
+
+
+class ScheduleTestCase(TestCase):
+    def test_runs_forever_without_run_interval(self):
+        self.assertEqual(Schedule().get_run_frame(1000, 10), 1000)
+
+    def test_alternates_run_and_pause(self):
+        schedule = Schedule(1, 2)
+        self.assertEqual(schedule.get_run_frame(9, 10), 9)
+        self.assertIsNone(schedule.get_run_frame(10, 10))
+        self.assertIsNone(schedule.get_run_frame(29, 10))
+        self.assertEqual(schedule.get_run_frame(30, 10), 0)
+
+
+class OfflineRendererTestCase(TestCase):
+    def setUp(self):
+        self.renderer = OfflineRenderer([create_stimulus(), create_stimulus(Schedule(.2, .2))], 10, 20, 10,
+                                        processes=1, chunk_frames=3)
+
+    def test_compiles_timelines(self):
+        self.assertEqual(len(self.renderer.stimuli[0].timeline), 5)
+
+    def test_splits_frames_into_ranges(self):
+        self.assertEqual(self.renderer.get_ranges(7), [(0, 3), (3, 6), (6, 7)])
+
+    def test_renders_growing_disc(self):
+        frames = self.renderer.render_range(0, 5)
+        self.assertEqual(frames.shape, (5, 2, 10, 20, 3))
+        dark_pixels = [int((frame[0, :, :, 0] == 0).sum()) for frame in frames]
+        self.assertEqual(dark_pixels[0], 0)
+        self.assertEqual(dark_pixels, sorted(dark_pixels))
+        self.assertGreater(dark_pixels[4], 0)
+
+    def test_loom_restarts_like_live_display(self):
+        frames = self.renderer.render_range(0, 10)
+        np.testing.assert_array_equal(frames[0, 0], frames[5, 0])
+
+    def test_paused_arena_shows_background_only(self):
+        frames = self.renderer.render_range(0, 4)
+        self.assertGreater(int((frames[1, 1] == 0).sum()), 0)
+        self.assertEqual(int((frames[2, 1] == 0).sum()), 0)
+
+    def test_pool_and_serial_rendering_match(self):
+        pooled = OfflineRenderer(self.renderer.stimuli, 10, 20, 10, processes=2, chunk_frames=3)
+        serial = np.concatenate([frames for _, frames in self.renderer.render(7)])
+        parallel = np.concatenate([frames for _, frames in pooled.render(7)])
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_saves_npy_npz_and_raw_video(self):
+        expected = self.renderer.render_range(0, 7)
+        with TemporaryDirectory() as directory:
+            self.renderer.save_npy(os.path.join(directory, "frames.npy"), 7)
+            np.testing.assert_array_equal(np.load(os.path.join(directory, "frames.npy")), expected)
+
+            self.renderer.save_npz(os.path.join(directory, "frames.npz"), 7)
+            with np.load(os.path.join(directory, "frames.npz")) as archive:
+                np.testing.assert_array_equal(archive["frames"], expected)
+                self.assertEqual(archive["fps"], 10)
+
+            self.renderer.save_raw_video(os.path.join(directory, "frames.rgb"), 7)
+            with open(os.path.join(directory, "frames.rgb"), "rb") as video:
+                self.assertEqual(video.read(), expected.tobytes())
@@ -0,0 +1,146 @@
+import os
+from tempfile import TemporaryDirectory
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from piscis.config import Configuration
+from piscis.control import ControlDispatcher
+from piscis.profiler import RuntimeProfiler, StackSampler, ProfilerError, match_functions, get_stack
+from piscis.scheduler import Frame
+from piscis.ui.headless import create_headless_window
+
+
+def outer(count):
+    total = 0
+    for i in range(count):
+        total += inner(i)
+    return total
+
+
+def inner(value):
+    return value * 2
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        outer(10)
+
+
+class StackSamplerTestCase(TestCase):
+    def test_collects_stacks_of_profiled_thread(self):
+        sampler = StackSampler(threading.get_ident(), .001)
+        sampler.start()
+        deadline = time.perf_counter() + 5
+        while not sampler.samples and time.perf_counter() < deadline:
+            busy(.01)
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        self.assertTrue(any("test_profiler.py:busy" in stack for stack in sampler.stacks))
+
+    def test_ignores_missing_threads(self):
+        sampler = StackSampler(-1)
+        sampler.sample()
+        self.assertEqual(sampler.samples, 0)
+
+    def test_stacks_start_at_the_root(self):
+        stack = get_stack(__import__("sys")._getframe()).split(";")
+        self.assertTrue(stack[-1].startswith("test_profiler.py:"))
+        self.assertTrue(stack[-1].endswith("test_stacks_start_at_the_root"))
+
+
+class RuntimeProfilerTestCase(TestCase):
+    def setUp(self):
+        self.profiler = RuntimeProfiler([("outer and inner", match_functions(outer, inner)),
+                                         ("inner", match_functions(inner))], interval=.001)
+
+    def test_start_and_stop_only_once(self):
+        with self.assertRaises(ProfilerError):
+            self.profiler.stop()
+        self.profiler.start()
+        with self.assertRaises(ProfilerError):
+            self.profiler.start()
+        self.profiler.stop()
+        self.assertFalse(self.profiler.is_running())
+
+    def test_hot_paths_count_outermost_calls(self):
+        self.profiler.start()
+        for _ in range(3):
+            outer(5)
+        result = self.profiler.stop()
+        paths = dict((name, (calls, seconds)) for name, calls, seconds in result.get_hot_paths())
+        self.assertEqual(paths["outer and inner"][0], 3)
+        self.assertEqual(paths["inner"][0], 15)
+        self.assertGreaterEqual(paths["outer and inner"][1], paths["inner"][1])
+
+    def test_writes_report_stacks_and_profile(self):
+        self.profiler.start()
+        busy(.02)
+        result = self.profiler.stop()
+        with TemporaryDirectory() as directory:
+            paths = result.write(os.path.join(directory, "rig"))
+            self.assertEqual(sorted(os.listdir(directory)), ["rig.folded", "rig.prof", "rig.txt"])
+            with open(paths["report"]) as report_file:
+                report = report_file.read()
+            with open(paths["stacks"]) as stack_file:
+                lines = stack_file.read().splitlines()
+        self.assertIn("outer and inner", report)
+        self.assertIn("cumulative", report)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+
+
+class WindowProfilerTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        configuration = Configuration()
+        configuration.profile_directory = self.directory.name
+        self.window = create_headless_window(configuration)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_profiles_rendering_for_a_window_of_time(self):
+        tab = self.window.tabs[0]
+        tab.target_diameter, tab.scaling_velocity = .5, .1
+        tab.on_generate()
+        tab.on_start()
+        paths = self.window.start_profiling(.5, os.path.join(self.directory.name, "render"))
+        for i in range(1, 20):
+            self.window.render(Frame(i, i * .025, self.window.get_epoch() + i * 25, i * .025, 0))
+        _, callback, args, _ = self.window.master.scheduled.pop(self.window.profile_after_id)
+        callback(*args)
+        self.assertFalse(self.window.profiler.is_running())
+        with open(paths["report"]) as report_file:
+            report = report_file.read()
+        render_line = [line for line in report.splitlines() if line.startswith("MainWindow.render")][0]
+        self.assertEqual(render_line.split()[1], "19")
+        self.assertTrue(os.path.exists(paths["stacks"]))
+
+    def test_control_api_starts_profiles(self):
+        dispatcher = ControlDispatcher(self.window)
+        response = dispatcher({"command": "profile", "seconds": 1})
+        self.assertTrue(response["ok"])
+        self.assertEqual(os.path.dirname(response["report"]), self.directory.name)
+        self.assertFalse(dispatcher({"command": "profile"})["ok"])
+        self.window.on_exit()
+        self.assertFalse(self.window.profiler.is_running())
+        self.assertFalse(dispatcher({"command": "profile", "seconds": -1})["ok"])
+
+    def test_profile_dialog(self):
+        prefix = os.path.join(self.directory.name, "dialog")
+        with patch("piscis.ui.window.asksaveasfilename", return_value=""):
+            self.window.on_profile()
+        self.assertFalse(self.window.profiler.is_running())
+        with patch("piscis.ui.window.asksaveasfilename", return_value=prefix + ".txt"):
+            self.window.on_profile()
+            with patch("piscis.ui.window.showerror") as showerror:
+                self.window.on_profile()
+        self.assertEqual(showerror.call_args[0][0], "Profile Rendering")
+        _, callback, args, _ = self.window.master.scheduled.pop(self.window.profile_after_id)
+        with patch("piscis.ui.window.showinfo") as showinfo:
+            callback(*args)
+        self.assertIn(prefix + ".txt", showinfo.call_args[0][1])
+        self.assertTrue(os.path.exists(prefix + ".folded"))
@@ -0,0 +1,159 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipIf
+from piscis.model import CONSTANT_LV
+from piscis.protocol import parse_protocol, load_protocol, get_permutation, ProtocolError, tomllib
+from piscis.timeline import TimelineCompiler
+import random
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+EXAMPLE = os.path.join(EXAMPLES, "sweep_protocol.json")
+
+
+def create_data(**arena):
+    data = {"arena": 1, "run_seconds": 10, "sweep": {"diameter": [.25, .5], "velocity": [.1, .2, .3]}}
+    data.update(arena)
+    return {"seed": 1, "arenas": [data]}
+
+
+class PermutationTestCase(TestCase):
+    def test_without_generator_keeps_order(self):
+        order = get_permutation(5)
+        self.assertEqual([order(i) for i in range(5)], [0, 1, 2, 3, 4])
+
+    def test_with_generator_visits_every_position_once(self):
+        order = get_permutation(1000, random.Random(3))
+        self.assertEqual(sorted(order(i) for i in range(1000)), list(range(1000)))
+        self.assertNotEqual([order(i) for i in range(1000)], list(range(1000)))
+
+    def test_example_repetitions_are_shuffled_independently(self):
+        trials = list(load_protocol(EXAMPLE, 4).expand(0))
+        stimuli = [(t.stimulus["diameter"], t.stimulus["velocity"], t.stimulus["color"]) for t in trials]
+        orders = [tuple(stimuli[i:i + 18]) for i in range(0, len(stimuli), 18)]
+        self.assertEqual(len(set(orders)), 5)
+        colors = [color for _, _, color in stimuli]
+        self.assertTrue(any(first == second for first, second in zip(colors, colors[1:])))
+
+
+class ParseProtocolTestCase(TestCase):
+    def test_loads_example_protocol(self):
+        protocol = load_protocol(EXAMPLE, 4)
+        self.assertEqual([arena.arena for arena in protocol.arenas], [0, 1])
+        self.assertEqual(protocol.arenas[0].get_trial_count(), 90)
+        self.assertEqual(protocol.arenas[1].stimulus["profile"], CONSTANT_LV)
+        self.assertFalse(protocol.arenas[1].randomize)
+
+    def test_loads_moving_example_protocol(self):
+        protocol = load_protocol(os.path.join(EXAMPLES, "moving_protocol.json"), 4)
+        self.assertEqual(protocol.arenas[1].stimulus["path"]["kind"], "circular")
+        self.assertEqual([stimulus["path"]["kind"] for stimulus in protocol.arenas[2].get_combinations()],
+                         ["polyline", "spline"])
+        predator = next(protocol.expand(0)).create_predator()
+        self.assertAlmostEqual(predator.movement_vector.trajectory.length, .8)
+
+    @skipIf(tomllib is None, "TOML protocols need Python 3.11 or the tomli package")
+    def test_loads_toml_protocol(self):
+        with TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "protocol.toml")
+            with open(file_path, "w") as protocol_file:
+                protocol_file.write("seed = 3\n[[arenas]]\narena = 2\nrun_seconds = 5\n")
+            protocol = load_protocol(file_path, 4)
+        self.assertEqual(protocol.arenas[0].arena, 1)
+        self.assertEqual(protocol.seed, 3)
+
+    def test_loads_json_protocol(self):
+        with TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "protocol.json")
+            with open(file_path, "w") as protocol_file:
+                json.dump(create_data(), protocol_file)
+            self.assertEqual(load_protocol(file_path, 4).arenas[0].get_trial_count(), 6)
+
+    def test_fills_in_stimulus_defaults(self):
+        stimulus = parse_protocol(create_data(), 4).arenas[0].stimulus
+        self.assertEqual(stimulus["color"], "#000000")
+        self.assertEqual(stimulus["position"], (.5, .5))
+        self.assertIsNone(stimulus["path"])
+
+    def test_rejects_invalid_protocols(self):
+        invalid = [
+            {"arenas": []},
+            {"arenas": [{"arena": 1, "run_seconds": 1}], "unknown": 1},
+            {"arenas": [{"arena": 1, "run_seconds": 1}, {"arena": 1, "run_seconds": 1}]},
+            {"arenas": ["arena"]},
+            {"arenas": {"arena": 1}},
+            create_data(arena=5),
+            create_data(arena=1.5),
+            create_data(run_seconds=0),
+            create_data(pause_seconds=-1),
+            create_data(repetitions=0),
+            create_data(randomize="yes"),
+            create_data(sweep={"diameter": []}),
+            create_data(sweep={"diameter": [2]}),
+            create_data(sweep={"position": [[0, 0]]}),
+            create_data(stimulus={"velocity": -1}),
+            create_data(stimulus={"color": "red"}),
+            create_data(stimulus={"profile": "constant-lv"}),
+            create_data(stimulus={"position": [.5]}),
+            create_data(stimulus={"position": "center"}),
+            create_data(stimulus={"diameter": "big"}),
+            create_data(stimulus={"diameter": True}),
+            create_data(stimulus={"path": {"kind": "straight", "speed": 1}}),
+            create_data(sweep={"path": [{"kind": "circular", "center": [.5, .5], "speed": -1}]}),
+        ]
+        for data in invalid:
+            with self.assertRaises(ProtocolError, msg=str(data)):
+                parse_protocol(data, 4)
+
+
+class ExpandProtocolTestCase(TestCase):
+    def setUp(self):
+        self.protocol = parse_protocol(create_data(repetitions=2), 4)
+
+    def test_expands_sweep_in_order(self):
+        trials = list(self.protocol.expand(0))
+        self.assertEqual(len(trials), 12)
+        self.assertEqual([(t.stimulus["diameter"], t.stimulus["velocity"]) for t in trials[:3]],
+                         [(.25, .1), (.25, .2), (.25, .3)])
+        self.assertEqual(trials[3].stimulus["diameter"], .5)
+        self.assertEqual([t.number for t in trials], list(range(12)))
+        self.assertEqual(trials[6].repetition, 1)
+        self.assertEqual(trials[0].run_seconds, 10)
+
+    def test_unknown_arena_has_no_protocol(self):
+        self.assertIs(self.protocol.get_arena(0), self.protocol.arenas[0])
+        self.assertIsNone(self.protocol.get_arena(7))
+
+    def test_expansion_is_lazy(self):
+        protocol = parse_protocol(create_data(repetitions=10 ** 9), 4)
+        trials = protocol.expand(0)
+        self.assertEqual(next(trials).number, 0)
+        self.assertEqual(next(trials).number, 1)
+
+    def test_randomized_expansion_is_seeded(self):
+        protocol = parse_protocol(create_data(repetitions=2, randomize=True), 4)
+        first = [(t.stimulus["diameter"], t.stimulus["velocity"]) for t in protocol.expand(0)]
+        second = [(t.stimulus["diameter"], t.stimulus["velocity"]) for t in protocol.expand(0)]
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(first[:6]), sorted(first[6:]))
+        self.assertEqual(len(set(first[:6])), 6)
+
+    def test_trial_creates_predator(self):
+        predator = next(self.protocol.expand(0)).create_predator()
+        self.assertEqual(predator.get_target_diameter(), .25)
+        self.assertEqual(predator.scaling_vector.velocity, .1)
+        self.assertEqual(predator.get_starting_position(), (.5, .5))
+
+    def test_compile_skips_linear_profiles(self):
+        compiler = TimelineCompiler(40, 8)
+        self.assertEqual(self.protocol.compile(compiler), 0)
+        self.assertEqual(len(compiler.cache), 0)
+
+    def test_compile_prepares_combinations_up_to_cache_capacity(self):
+        protocol = parse_protocol(create_data(stimulus={"profile": CONSTANT_LV, "profile_parameter": .5}), 4)
+        compiler = TimelineCompiler(40, 8)
+        self.assertEqual(protocol.compile(compiler), 6)
+        self.assertEqual(len(compiler.cache), 6)
+        compiler = TimelineCompiler(40, 2)
+        self.assertEqual(protocol.compile(compiler), 2)
+        self.assertEqual(compiler.cache.capacity, 2)
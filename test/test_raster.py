@@ -0,0 +1,72 @@
+from unittest import TestCase
+import struct
+import zlib
+import numpy as np
+from piscis.raster import parse_color, create_frame, draw_disc, get_disc_mask, create_disc_sprite, encode_png, \
+    encode_ppm, PNG_SIGNATURE
+
+
+class ParseColorTestCase(TestCase):
+    def test_parses_short_long_and_tk_colors(self):
+        self.assertEqual(parse_color("#FFF"), (255, 255, 255))
+        self.assertEqual(parse_color("#102030"), (16, 32, 48))
+        self.assertEqual(parse_color("#ffff00000000"), (255, 0, 0))
+
+    def test_rejects_named_colors(self):
+        with self.assertRaises(ValueError):
+            parse_color("red")
+
+
+class DrawDiscTestCase(TestCase):
+    def setUp(self):
+        self.frame = create_frame(10, 8, "#000000")
+
+    def test_creates_background_frame(self):
+        self.assertEqual(self.frame.shape, (8, 10, 3))
+        self.assertEqual(self.frame.max(), 0)
+
+    def test_fills_pixels_inside_disc(self):
+        draw_disc(self.frame, (2, 2, 8, 8), "#FF0000")
+        self.assertEqual(tuple(self.frame[5, 5]), (255, 0, 0))
+        self.assertEqual(tuple(self.frame[2, 2]), (0, 0, 0))
+        self.assertEqual(tuple(self.frame[5, 1]), (0, 0, 0))
+        self.assertEqual(self.frame[:, :, 0].sum() // 255, 32)
+
+    def test_clips_disc_at_frame_border(self):
+        draw_disc(self.frame, (-4, -4, 4, 4), "#FF0000")
+        self.assertEqual(tuple(self.frame[0, 0]), (255, 0, 0))
+
+    def test_empty_or_outside_discs_draw_nothing(self):
+        self.assertIsNone(get_disc_mask((5, 5, 5, 5), 10, 8))
+        self.assertIsNone(get_disc_mask((20, 20, 30, 30), 10, 8))
+        draw_disc(self.frame, (5, 5, 5, 5), "#FF0000")
+        self.assertEqual(self.frame.max(), 0)
+
+
+class DiscSpriteTestCase(TestCase):
+    def test_disc_is_opaque_and_corners_transparent(self):
+        sprite = create_disc_sprite(9, "#102030")
+        self.assertEqual(sprite.shape, (9, 9, 4))
+        self.assertEqual(tuple(sprite[4, 4]), (16, 32, 48, 255))
+        self.assertEqual(tuple(sprite[0, 0]), (0, 0, 0, 0))
+
+    def test_empty_sprite(self):
+        self.assertEqual(create_disc_sprite(0, "#000").shape, (0, 0, 4))
+
+    def test_encodes_rgba_png(self):
+        sprite = create_disc_sprite(5, "#FF0000")
+        data = encode_png(sprite)
+        self.assertTrue(data.startswith(PNG_SIGNATURE))
+        width, height, depth, color_type = struct.unpack(">IIBB", data[16:26])
+        self.assertEqual((width, height, depth, color_type), (5, 5, 8, 6))
+
+        length = struct.unpack(">I", data[33:37])[0]
+        rows = np.frombuffer(zlib.decompress(data[41:41 + length]), dtype=np.uint8).reshape(5, 21)
+        self.assertEqual(list(rows[:, 0]), [0] * 5)
+        np.testing.assert_array_equal(rows[:, 1:].reshape(5, 5, 4), sprite)
+
+    def test_encodes_rgb_ppm(self):
+        frame = create_frame(4, 2, "#102030")[:, 1:3]
+        data = encode_ppm(frame)
+        self.assertTrue(data.startswith(b"P6 2 2 255\n"))
+        self.assertEqual(data[11:], bytes([16, 32, 48]) * 4)
@@ -0,0 +1,61 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from piscis.scheduler import FrameScheduler
+from piscis.ui.render_loop import RenderLoop
+
+
+class RenderLoopTestCase(TestCase):
+    def setUp(self):
+        self.master = MagicMock()
+        self.master.after.side_effect = lambda delay, callback: "after#%d" % self.master.after.call_count
+        self.is_animating = True
+        self.frames = list()
+        self.loop = RenderLoop(self.master, FrameScheduler(40), self.render)
+
+    def render(self, frame):
+        self.frames.append(frame)
+        return self.is_animating
+
+    def test_is_idle_until_woken(self):
+        self.assertFalse(self.loop.is_running())
+        self.assertFalse(self.master.after.called)
+
+    def test_wake_starts_exactly_one_loop(self):
+        self.loop.wake()
+        self.loop.wake()
+        self.loop.wake()
+        self.assertEqual(self.master.after.call_count, 1)
+        self.assertTrue(self.loop.is_running())
+        self.assertTrue(self.loop.frame_scheduler.is_running)
+
+    def test_tick_renders_and_reschedules_while_animating(self):
+        self.loop.wake()
+        self.loop.tick()
+        self.assertEqual(len(self.frames), 1)
+        self.assertEqual(self.master.after.call_count, 2)
+        self.assertTrue(self.loop.is_running())
+
+    def test_tick_suspends_when_nothing_animates(self):
+        self.loop.wake()
+        self.is_animating = False
+        self.loop.tick()
+        self.assertEqual(self.master.after.call_count, 1)
+        self.assertFalse(self.loop.is_running())
+        self.assertFalse(self.loop.frame_scheduler.is_running)
+
+    def test_wake_during_render_does_not_stack_loops(self):
+        self.loop.wake()
+        self.render = lambda frame: self.loop.wake() or True
+        self.loop.render = self.render
+        self.loop.tick()
+        self.assertEqual(self.master.after.call_count, 2)
+
+    def test_suspend_cancels_pending_frame(self):
+        self.loop.wake()
+        self.loop.suspend()
+        self.master.after_cancel.assert_called_once_with("after#1")
+        self.assertFalse(self.loop.is_running())
+
+    def test_suspend_when_idle_does_nothing(self):
+        self.loop.suspend()
+        self.assertFalse(self.master.after_cancel.called)
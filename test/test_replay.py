@@ -0,0 +1,151 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+from piscis.config import Configuration
+from piscis.model import CONSTANT_LV
+from piscis.clock import VirtualClock
+from piscis.replay import SessionReplay, create_configuration, create_fast_replay, main
+from piscis.session_trace import load_trace, START
+from piscis.telemetry import PAUSE, RUN
+from piscis.ui.headless import create_headless_window
+
+
+class FakeEvent(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class SessionReplayTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "session.trace")
+        configuration = Configuration()
+        configuration.arena_count = 3
+        configuration.session_trace_path = self.file_path
+        self.window = create_headless_window(configuration)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record_session(self):
+        self.window.notebook.index = lambda tab: 2
+        self.window.on_tab_changed()
+        tab = self.window.tabs[1]
+        tab.on_scale_slider("0.4")
+        tab.on_speed_slider("0.5")
+        tab.on_run_interval_changed()
+        tab.set_starting_position(FakeEvent(tab.canvas.winfo_width() / 4, tab.canvas.winfo_height() / 2))
+        tab.on_start()
+        self.window.tabs[2].on_generate()
+        self.window.tabs[2].on_stop()
+        self.window.session_recorder.record(0, START)
+        self.window.session_recorder.close()
+        return load_trace(self.file_path)
+
+    def test_replay_reproduces_session(self):
+        header, actions = self.record_session()
+        self.assertEqual([action.action for action in actions],
+                         ["tab", "scale", "speed", "run-interval", "position", "start", "generate", "stop", "start"])
+        replay = create_fast_replay(header, actions)
+        window = replay.window
+        replay.run_fast()
+        self.assertEqual((replay.applied, replay.skipped), (8, 1))
+        self.assertEqual(window.visible_tab, 1)
+        tab = window.tabs[1]
+        self.assertEqual((tab.target_diameter, tab.scaling_velocity), (.4, .1))
+        self.assertEqual(tab.predator.get_starting_position(), (.25, .5))
+        self.assertTrue(window.is_running(1))
+        self.assertIsNotNone(window.tabs[2].predator)
+        self.assertFalse(window.is_running(2))
+
+    def record_settings(self):
+        self.window.notebook.index = lambda tab: 1
+        self.window.on_tab_changed()
+        tab = self.window.tabs[0]
+        tab.interval_minutes_run.set("1")
+        tab.interval_seconds_run.set("10")
+        tab.on_run_seconds_changed()
+        tab.interval_seconds_pause.set("20")
+        tab.on_pause_seconds_changed()
+        with patch("piscis.ui.window.askcolor", return_value=((0, 255, 0), "#00FF00")):
+            tab.on_background()
+            tab.on_stimuli_color()
+        tab.profile_combobox.set(CONSTANT_LV)
+        tab.spin_profile_parameter.set(".5")
+        tab.on_profile_selected()
+        self.window.tabs[2].run_seconds, self.window.tabs[2].pause_seconds = 9, 7
+        self.window.tabs[2].on_run_interval_changed()
+        self.window.tabs[2].on_pause_interval_changed()
+        self.window.session_recorder.close()
+        return load_trace(self.file_path)
+
+    def test_replay_restores_settings(self):
+        header, actions = self.record_settings()
+        replay = create_fast_replay(header, actions)
+        window = replay.window
+        replay.run_fast()
+        self.assertEqual((replay.applied, replay.skipped), (8, 0))
+        tab = window.tabs[0]
+        self.assertEqual((tab.run_seconds, tab.pause_seconds), (70, 20))
+        self.assertEqual((tab.interval_minutes_run.get(), tab.interval_seconds_run.get()), ("1", "10"))
+        self.assertEqual((tab.current_background_color, tab.color), ("#00FF00", "#00FF00"))
+        self.assertEqual((tab.profile, tab.profile_parameter), (CONSTANT_LV, .5))
+        self.assertEqual((window.tabs[2].remaining_secs_run, window.tabs[2].remaining_secs_pause), (9, 7))
+
+    def test_realtime_replay_schedules_actions(self):
+        _, actions = self.record_session()
+        actions[-1].timestamp = 1.
+        window = create_headless_window(create_configuration(load_trace(self.file_path)[0]))
+        replay = SessionReplay(window, actions)
+        replay.start_realtime(speed=2.)
+        self.assertEqual(max(ms for ms, _, _, _ in window.master.scheduled.values()), 500)
+        window.master.run_scheduled()
+        self.assertEqual((replay.applied, replay.skipped), (8, 1))
+
+    def test_renders_frames_between_actions(self):
+        header, actions = self.record_session()
+        actions[-1].timestamp = 1.
+        replay = create_fast_replay(header, actions)
+        self.assertEqual(replay.run_fast(), 40)
+        self.assertEqual(replay.window.frame_statistics.frames, 40)
+        self.assertEqual(replay.clock.monotonic(), 1.)
+
+    def test_replays_run_and_pause_intervals(self):
+        clock = VirtualClock()
+        configuration = Configuration()
+        configuration.session_trace_path = self.file_path
+        window = create_headless_window(configuration, clock=clock)
+        tab = window.tabs[0]
+        tab.on_scale_slider("0.4")
+        tab.on_generate()
+        tab.run_seconds, tab.pause_seconds = 2, 1
+        tab.on_run_interval_changed()
+        tab.on_pause_interval_changed()
+        clock.advance(.5)
+        tab.on_start()
+        clock.advance(2.2)
+        window.tabs[1].on_generate()
+        window.session_recorder.close()
+        header, actions = load_trace(self.file_path)
+        self.assertEqual([action.timestamp for action in actions][-2:], [.5, 2.7])
+
+        replay = create_fast_replay(header, actions)
+        window = replay.window
+        replay.run_fast()
+        self.assertEqual(window.get_arena_phase(0), PAUSE)
+        self.assertFalse(window.is_running(0))
+        replay.advance_to(3.6)
+        self.assertEqual(window.get_arena_phase(0), RUN)
+        self.assertTrue(window.is_running(0))
+
+    def test_command_line(self):
+        self.record_session()
+        result = CliRunner().invoke(main, [self.file_path])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Replayed 8 actions, skipped 1", result.output)
+        with open(self.file_path, "w") as trace_file:
+            trace_file.write("broken\n")
+        self.assertEqual(CliRunner().invoke(main, [self.file_path]).exit_code, 1)
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from piscis.ui.scene import SceneItem
+
+BOX = (10, 10, 30, 30)
+
+
+class SceneItemTestCase(TestCase):
+    def setUp(self):
+        self.canvas = MagicMock()
+        self.canvas.create_oval.return_value = 7
+        self.item = SceneItem(self.canvas)
+
+    def test_first_update_creates_oval(self):
+        self.item.update(BOX, "#000000")
+        self.canvas.create_oval.assert_called_once_with(10, 10, 30, 30, fill="#000000", outline="#000000")
+        self.assertEqual(self.item.item, 7)
+
+    def test_unchanged_update_does_not_touch_canvas(self):
+        self.item.update(BOX, "#000000")
+        self.item.update(list(BOX), "#000000")
+        self.assertEqual(self.canvas.create_oval.call_count, 1)
+        self.assertFalse(self.canvas.coords.called)
+        self.assertFalse(self.canvas.itemconfigure.called)
+
+    def test_changed_geometry_moves_item(self):
+        self.item.update(BOX, "#000000")
+        self.item.update((5, 5, 35, 35), "#000000")
+        self.canvas.coords.assert_called_once_with(7, 5, 5, 35, 35)
+        self.assertFalse(self.canvas.itemconfigure.called)
+
+    def test_changed_color_recolors_item(self):
+        self.item.update(BOX, "#000000")
+        self.item.update(BOX, "#FF0000")
+        self.canvas.itemconfigure.assert_called_once_with(7, fill="#FF0000", outline="#FF0000")
+        self.assertFalse(self.canvas.coords.called)
+
+    def test_delete_removes_item(self):
+        self.item.update(BOX, "#000000")
+        self.item.delete()
+        self.canvas.delete.assert_called_once_with(7)
+        self.assertIsNone(self.item.item)
+
+    def test_delete_without_item_does_nothing(self):
+        self.item.delete()
+        self.assertFalse(self.canvas.delete.called)
@@ -0,0 +1,72 @@
+from unittest import TestCase
+from piscis.clock import VirtualClock
+from piscis.scheduler import FrameScheduler, CATCH_UP, SKIP, MAX_CATCH_UP_FRAMES
+
+
+class FrameSchedulerTestCase(TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(wall_origin=0., start=100.)
+        self.scheduler = FrameScheduler(40, SKIP, self.clock.monotonic, self.clock.time)
+        self.scheduler.start()
+
+    def test_rejects_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            FrameScheduler(40, "whatever")
+
+    def test_has_target_fps(self):
+        self.assertEqual(self.scheduler.get_target_fps(), 40)
+
+    def test_first_delay_is_one_period(self):
+        self.assertEqual(self.scheduler.get_delay(), 25)
+
+    def test_delay_targets_absolute_deadline(self):
+        self.clock.advance(.030)
+        self.scheduler.next_frame()
+        self.clock.advance(.005)
+        self.assertEqual(self.scheduler.get_delay(), 15)
+
+    def test_delay_is_never_negative(self):
+        self.clock.advance(1.0)
+        self.assertEqual(self.scheduler.get_delay(), 0)
+
+    def test_frame_is_stamped_once(self):
+        self.clock.advance(.025)
+        frame = self.scheduler.next_frame()
+        self.assertEqual(frame.index, 1)
+        self.assertEqual(frame.timestamp, self.clock.monotonic())
+        self.assertEqual(frame.epoch, int(self.clock.time() * 1000))
+        self.assertAlmostEqual(frame.get_lateness(), 0)
+
+    def test_skip_drops_missed_frames(self):
+        self.clock.advance(.110)
+        frame = self.scheduler.next_frame()
+        self.assertEqual(frame.index, 4)
+        self.assertEqual(frame.dropped, 3)
+        self.assertEqual(self.scheduler.dropped_frames, 3)
+        self.assertEqual(self.scheduler.get_delay(), 15)
+
+    def test_catch_up_renders_missed_frames_immediately(self):
+        scheduler = FrameScheduler(40, CATCH_UP, self.clock.monotonic, self.clock.time)
+        scheduler.start()
+        self.clock.advance(.110)
+        frame = scheduler.next_frame()
+        self.assertEqual(frame.index, 1)
+        self.assertEqual(frame.dropped, 0)
+        self.assertEqual(scheduler.get_delay(), 0)
+
+    def test_catch_up_resynchronizes_when_too_far_behind(self):
+        scheduler = FrameScheduler(40, CATCH_UP, self.clock.monotonic, self.clock.time)
+        scheduler.start()
+        self.clock.advance(.025 * (MAX_CATCH_UP_FRAMES + 3) + .001)
+        frame = scheduler.next_frame()
+        self.assertEqual(frame.dropped, MAX_CATCH_UP_FRAMES + 2)
+
+    def test_start_resets_frame_counter(self):
+        self.clock.advance(.110)
+        self.scheduler.next_frame()
+        self.scheduler.start()
+        self.assertEqual(self.scheduler.frame_index, 0)
+        self.assertEqual(self.scheduler.dropped_frames, 0)
+        self.assertTrue(self.scheduler.is_running)
+        self.scheduler.stop()
+        self.assertFalse(self.scheduler.is_running)
@@ -0,0 +1,41 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from piscis.session_trace import SessionRecorder, TraceError, load_trace, parse_action, TRACE_VERSION, SCALE, \
+    SELECT_TAB
+
+
+class SessionTraceTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "session.trace")
+        self.now = [10.]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_records_relative_timestamps(self):
+        recorder = SessionRecorder(self.file_path, {"version": TRACE_VERSION, "arenas": 2},
+                                   clock=lambda: self.now[0])
+        self.now[0] = 10.5
+        recorder.record(1, SCALE, .25)
+        recorder.record(None, SELECT_TAB)
+        recorder.close()
+        header, actions = load_trace(self.file_path)
+        self.assertEqual(header["arenas"], 2)
+        self.assertEqual([(action.timestamp, action.arena, action.action, action.arguments) for action in actions],
+                         [(.5, 1, SCALE, [.25]), (.5, None, SELECT_TAB, [])])
+        self.assertEqual(recorder.count, 2)
+
+    def test_rejects_invalid_actions(self):
+        for line in ("start", "[1, 0]", '[-1, 0, "start"]', '[0, 0, "jump"]', '[0, 2, "start"]', '[0, true, "stop"]'):
+            with self.assertRaises(TraceError):
+                parse_action(line, 2)
+
+    def test_rejects_other_files(self):
+        for content in ("", json.dumps({"version": TRACE_VERSION + 1}) + "\n"):
+            with open(self.file_path, "w") as trace_file:
+                trace_file.write(content)
+            with self.assertRaises(TraceError):
+                load_trace(self.file_path)
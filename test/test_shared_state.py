@@ -0,0 +1,109 @@
+import multiprocessing
+from unittest import TestCase
+from unittest.mock import patch
+import numpy as np
+from piscis.model import PredatorArray, PredatorFactory, CONSTANT_LV
+from piscis.shared_state import SharedArenaState, DisplayPredatorArray, unpack_color
+
+
+def read_target_diameters(name, arena_count, queue):
+    shared_state = SharedArenaState(arena_count, name)
+    _, record = shared_state.read()
+    queue.put(record["arenas"]["target_diameter"].tolist())
+    shared_state.close()
+
+
+def create_predator_array():
+    predator_factory = PredatorFactory()
+    predator_array = PredatorArray(3)
+    predator_factory.starting_position = .25, .75
+    predator_factory.target_diameter = .4
+    predator_factory.scaling_velocity = .2
+    predator_factory.color = "#FF0000"
+    predator_array.assign(0, predator_factory.create())
+    predator_factory.profile, predator_factory.profile_parameter = CONSTANT_LV, .5
+    predator_factory.color = "#00FF00"
+    predator_array.assign(2, predator_factory.create())
+    predator_array.predators[2].start_scaling(500)
+    predator_array.sync(2)
+    return predator_array
+
+
+class UnpackColorTestCase(TestCase):
+    def test_unpacks_rgb(self):
+        self.assertEqual(unpack_color(0x102030), "#102030")
+        self.assertEqual(unpack_color(-1, "#FFFFFF"), "#FFFFFF")
+
+
+class SharedArenaStateTestCase(TestCase):
+    def setUp(self):
+        self.shared_state = SharedArenaState(3)
+        self.predator_array = create_predator_array()
+
+    def tearDown(self):
+        self.shared_state.close()
+
+    def test_publish_bumps_even_sequence(self):
+        self.assertEqual(self.shared_state.get_sequence(), 0)
+        self.shared_state.publish(self.predator_array, ["#FFFFFF", "#000000", "#FFFFFF"])
+        sequence, record = self.shared_state.read()
+        self.assertEqual(sequence, 2)
+        arenas = record["arenas"]
+        self.assertEqual(arenas["active"].tolist(), [True, False, True])
+        self.assertEqual(arenas["color"][0], 0xFF0000)
+        self.assertEqual(arenas["background"][1], 0)
+        self.assertEqual(arenas["profile"].tolist(), [0, 0, 1])
+
+    def test_read_retries_while_a_write_is_in_progress(self):
+        with patch.object(self.shared_state, "get_sequence", side_effect=[1, 2, 4, 4, 4, 4]) as get_sequence:
+            sequence, _ = self.shared_state.read()
+        self.assertEqual(sequence, 4)
+        self.assertEqual(get_sequence.call_count, 5)
+
+    def test_other_instances_attach_by_name(self):
+        self.shared_state.set_background("#123456")
+        self.shared_state.set_fullscreen()
+        attached = SharedArenaState(3, self.shared_state.name)
+        _, record = attached.read()
+        attached.close()
+        self.assertEqual((record["background"], record["fullscreen"], record["closed"]), (0x123456, True, False))
+
+    def test_state_reaches_other_processes(self):
+        self.shared_state.publish(self.predator_array, ["#FFFFFF"] * 3)
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(target=read_target_diameters, args=(self.shared_state.name, 3, queue))
+        process.start()
+        self.assertEqual(queue.get(timeout=30), [.4, 0., .4])
+        process.join()
+
+
+class DisplayPredatorArrayTestCase(TestCase):
+    def test_evaluates_like_the_published_array(self):
+        predator_array = create_predator_array()
+        shared_state = SharedArenaState(3)
+        shared_state.publish(predator_array, ["#FFFFFF"] * 3)
+        display_array = DisplayPredatorArray(3)
+        display_array.load(shared_state.read()[1]["arenas"])
+        shared_state.close()
+        for epoch in (0, 1000, 2100):
+            expected = predator_array.evaluate(epoch)[0].copy()
+            np.testing.assert_allclose(display_array.evaluate(epoch)[0], expected)
+        self.assertEqual(display_array.colors, ["#FF0000", "#000000", "#00FF00"])
+
+    def test_follows_published_trajectories(self):
+        predator_array = create_predator_array()
+        predator_factory = PredatorFactory()
+        predator_factory.starting_position = .5, .3
+        predator_factory.target_diameter, predator_factory.scaling_velocity = .4, .2
+        predator_factory.path = {"kind": "circular", "center": [.5, .5], "speed": .1}
+        predator_array.assign(1, predator_factory.create())
+        shared_state = SharedArenaState(3)
+        shared_state.publish(predator_array, ["#FFFFFF"] * 3)
+        display_array = DisplayPredatorArray(3)
+        display_array.load(shared_state.read()[1]["arenas"])
+        shared_state.close()
+        self.assertEqual(display_array.trajectory_indices, [1])
+        for epoch in (0, 1500, 4000):
+            expected = predator_array.evaluate(epoch)[1].copy()
+            np.testing.assert_allclose(display_array.evaluate(epoch)[1], expected)
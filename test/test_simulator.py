@@ -0,0 +1,84 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from click.testing import CliRunner
+from piscis.events import START, PAUSE, STOP, TARGET_REACHED
+from piscis.protocol import parse_protocol
+from piscis.simulator import ProtocolSimulator, main
+
+PROTOCOL = {"arenas": [{"arena": 1, "run_seconds": 10, "pause_seconds": 20, "repetitions": 3,
+                        "stimulus": {"diameter": 0.5, "velocity": 0.25}},
+                       {"arena": 2, "run_seconds": 5, "pause_seconds": 5, "repetitions": 2}]}
+
+
+class ProtocolSimulatorTestCase(TestCase):
+    def simulate(self, data, arena_count=2, **options):
+        simulator = ProtocolSimulator(parse_protocol(data, arena_count), arena_count, **options)
+        simulator.run()
+        return simulator
+
+    def get_times(self, simulator, arena, kind):
+        return [event.seconds for event in simulator.events if event.arena == arena and event.kind == kind]
+
+    def test_reports_phase_transitions_in_simulated_time(self):
+        simulator = self.simulate(PROTOCOL)
+        self.assertEqual(self.get_times(simulator, 0, START), [0., 30., 60.])
+        self.assertEqual(self.get_times(simulator, 0, PAUSE), [10., 40., 70.])
+        self.assertEqual(self.get_times(simulator, 0, STOP), [90.])
+        self.assertEqual(self.get_times(simulator, 1, START), [0., 10.])
+        self.assertEqual(self.get_times(simulator, 1, STOP), [20.])
+        self.assertAlmostEqual(simulator.get_simulated_seconds(), 90., delta=0.1)
+
+    def test_reports_when_stimuli_reach_their_target(self):
+        simulator = self.simulate(PROTOCOL)
+        reached = self.get_times(simulator, 0, TARGET_REACHED)
+        self.assertEqual(len(reached), 15)
+        self.assertAlmostEqual(reached[0], 2., delta=0.05)
+
+    def test_skips_frames_between_events(self):
+        data = {"arenas": [{"arena": 1, "run_seconds": 600, "pause_seconds": 600, "repetitions": 12}]}
+        simulator = self.simulate(data, 1)
+        self.assertEqual(len(self.get_times(simulator, 0, START)), 12)
+        self.assertAlmostEqual(simulator.get_simulated_seconds(), 14400., delta=0.1)
+        self.assertLess(simulator.steps, 14400 * 3)
+
+    def test_rendering_gives_the_same_events(self):
+        evaluated = self.simulate(PROTOCOL)
+        rendered = self.simulate(PROTOCOL, render=True)
+        for kind in (START, PAUSE, STOP):
+            self.assertEqual(self.get_times(rendered, 0, kind), self.get_times(evaluated, 0, kind))
+        self.assertGreater(rendered.window.frame_statistics.frames, 0)
+
+    def test_stops_after_a_duration(self):
+        simulator = ProtocolSimulator(parse_protocol(PROTOCOL, 2), 2)
+        simulator.run(25.)
+        self.assertAlmostEqual(simulator.get_simulated_seconds(), 25.)
+        self.assertEqual(self.get_times(simulator, 0, START), [0.])
+
+
+class SimulatorCommandTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "protocol.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_protocol(self, data):
+        with open(self.file_path, "w") as protocol_file:
+            json.dump(data, protocol_file)
+
+    def test_prints_events_and_summary(self):
+        self.write_protocol(PROTOCOL)
+        result = CliRunner().invoke(main, [self.file_path, "--arenas", "2"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Simulated 90.0 s", result.output)
+        self.assertIn("start: 5", result.output)
+        self.assertNotIn("  " + TARGET_REACHED + " ", result.output)
+
+    def test_reports_invalid_protocols(self):
+        self.write_protocol({"arenas": [{"arena": 5}]})
+        result = CliRunner().invoke(main, [self.file_path, "--arenas", "2"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Error", result.output)
@@ -0,0 +1,98 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from piscis.intervals import RUN, PAUSE
+from piscis.model import PredatorFactory, CONSTANT_LV
+from piscis.protocol import Trial
+from piscis.snapshot import SessionSnapshot, SnapshotError, check_snapshot, NO_TRIAL, PROTOCOL_PATH_SIZE
+from piscis.telemetry import IDLE
+
+
+class FakeTab(object):
+    def __init__(self):
+        predator_factory = PredatorFactory()
+        predator_factory.starting_position = .2, .3
+        predator_factory.target_diameter = .4
+        predator_factory.scaling_velocity = .1
+        predator_factory.color = "#FF0000"
+        predator_factory.profile, predator_factory.profile_parameter = CONSTANT_LV, .5
+        self.predator = predator_factory.create()
+        self.target_diameter = .4
+        self.current_background_color = "#00FF00"
+        self.run_seconds = 10
+        self.pause_seconds = 5
+        self.remaining_secs_run = 7
+        self.remaining_secs_pause = 5
+        self.trial = Trial(1, 3, 0, None, 10, 5)
+
+
+class SessionSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "session.snapshot")
+        self.snapshot = SessionSnapshot(self.file_path, 2)
+
+    def tearDown(self):
+        del self.snapshot
+        self.directory.cleanup()
+
+    def test_new_snapshot_is_idle(self):
+        states = SessionSnapshot(self.file_path, 2, resume=True).get_arena_states()
+        self.assertEqual([state.generated for state in states], [False, False])
+        self.assertEqual([state.phase for state in states], [IDLE, IDLE])
+        self.assertEqual(states[0].trial, NO_TRIAL)
+        self.assertIsNone(self.snapshot.get_protocol_path())
+        self.assertIsNone(self.snapshot.get_protocol_seed())
+
+    def test_restores_saved_arena(self):
+        self.snapshot.save_arena(1, FakeTab())
+        self.snapshot.set_phase(1, RUN)
+        self.snapshot.save_remaining_seconds(1, 6, 5)
+        self.snapshot.set_protocol_path("protocol.json")
+        self.snapshot.set_protocol_seed(1234567)
+        snapshot = SessionSnapshot(self.file_path, 2, resume=True)
+        state = snapshot.get_arena_states()[1]
+        self.assertTrue(state.generated)
+        self.assertEqual(state.phase, RUN)
+        self.assertEqual(state.stimulus, {"diameter": .4, "velocity": .1, "color": "#FF0000", "profile": CONSTANT_LV,
+                                          "profile_parameter": .5, "position": (.2, .3)})
+        self.assertEqual((state.background, state.run_seconds, state.pause_seconds), ("#00FF00", 10, 5))
+        self.assertEqual((state.remaining_run, state.remaining_pause, state.trial), (6, 5, 3))
+        self.assertFalse(state.is_torn)
+        self.assertEqual(snapshot.get_protocol_path(), os.path.abspath("protocol.json"))
+        self.assertEqual(snapshot.get_protocol_seed(), 1234567)
+
+    def test_drops_protocol_paths_that_do_not_fit(self):
+        self.snapshot.set_protocol_path("protocol.json")
+        self.snapshot.set_protocol_path("p" * (PROTOCOL_PATH_SIZE + 1))
+        self.assertIsNone(self.snapshot.get_protocol_path())
+
+    def test_detects_torn_arena_records(self):
+        self.snapshot.begin(0)
+        self.snapshot.set_phase(1, PAUSE)
+        states = SessionSnapshot(self.file_path, 2, resume=True).get_arena_states()
+        self.assertEqual([state.is_torn for state in states], [True, False])
+
+    def test_flushes_on_phase_and_protocol_changes(self):
+        flushes = list()
+        self.snapshot.flush = lambda: flushes.append(True)
+        self.snapshot.save_arena(0, FakeTab())
+        self.snapshot.save_remaining_seconds(0, 6, 5)
+        self.assertEqual(flushes, [])
+        self.snapshot.set_phase(0, RUN)
+        self.snapshot.set_protocol_path("protocol.json")
+        self.snapshot.set_protocol_seed(None)
+        self.assertEqual(len(flushes), 3)
+        self.snapshot.close()
+        self.assertEqual(len(flushes), 4)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(SnapshotError):
+            check_snapshot(self.file_path, 3)
+        with self.assertRaises(SnapshotError):
+            check_snapshot(os.path.join(self.directory.name, "missing"), 2)
+        other_path = os.path.join(self.directory.name, "other")
+        with open(other_path, "wb") as other_file:
+            other_file.write(b"\0" * os.path.getsize(self.file_path))
+        with self.assertRaises(SnapshotError):
+            check_snapshot(other_path, 2)
@@ -0,0 +1,98 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from piscis.ui.scene import SceneItem
+from piscis.ui.sprites import SpriteCache, SpriteItem, quantize_diameter, create_scene_item
+
+BOX = (10, 10, 30, 30)
+
+
+def create_image(diameter, color):
+    return "sprite-%d-%s" % (diameter, color)
+
+
+class QuantizeDiameterTestCase(TestCase):
+    def test_small_diameters_keep_pixel_precision(self):
+        self.assertEqual(quantize_diameter(20.4), 20)
+        self.assertEqual(quantize_diameter(20.6), 21)
+
+    def test_large_diameters_are_quantized_relatively(self):
+        self.assertEqual(quantize_diameter(1001), 1000)
+        self.assertEqual(quantize_diameter(1006), 1010)
+
+
+class SpriteCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = SpriteCache(2, create_image)
+
+    def test_creates_sprite_once(self):
+        self.assertEqual(self.cache.get_sprite(20, "#000"), "sprite-20-#000")
+        self.assertEqual(self.cache.get_sprite(20, "#000"), "sprite-20-#000")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_empty_disc_has_no_sprite(self):
+        self.assertIsNone(self.cache.get_sprite(0, "#000"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.get_sprite(10, "#000")
+        self.cache.get_sprite(20, "#000")
+        self.cache.get_sprite(10, "#000")
+        self.cache.get_sprite(10, "#FFF")
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertNotIn((20, "#000"), self.cache)
+        self.assertIn((10, "#000"), self.cache)
+
+
+class SpriteItemTestCase(TestCase):
+    def setUp(self):
+        self.canvas = MagicMock()
+        self.canvas.create_image.return_value = 7
+        self.item = SpriteItem(self.canvas, SpriteCache(8, create_image))
+
+    def test_first_update_creates_centered_image(self):
+        self.item.update(BOX, "#000000")
+        self.canvas.create_image.assert_called_once_with(20., 20., image="sprite-20-#000000", anchor="center")
+        self.assertEqual(self.item.item, 7)
+
+    def test_unchanged_update_does_not_touch_canvas(self):
+        self.item.update(BOX, "#000000")
+        self.item.update(BOX, "#000000")
+        self.canvas.coords.assert_not_called()
+        self.canvas.itemconfigure.assert_not_called()
+
+    def test_move_only_moves_image(self):
+        self.item.update(BOX, "#000000")
+        self.item.update((20, 10, 40, 30), "#000000")
+        self.canvas.coords.assert_called_once_with(7, 30., 20.)
+        self.canvas.itemconfigure.assert_not_called()
+
+    def test_growing_disc_swaps_sprite(self):
+        self.item.update(BOX, "#000000")
+        self.item.update((5, 5, 35, 35), "#000000")
+        self.canvas.itemconfigure.assert_called_once_with(7, image="sprite-30-#000000")
+
+    def test_empty_disc_hides_image(self):
+        self.item.update(BOX, "#000000")
+        self.item.update((20, 20, 20, 20), "#000000")
+        self.canvas.itemconfigure.assert_called_once_with(7, image="")
+
+    def test_named_colors_are_resolved(self):
+        self.canvas.winfo_rgb.return_value = (65535, 0, 0)
+        self.item.update(BOX, "red")
+        self.assertEqual(self.item.sprite, "sprite-20-#ffff00000000")
+
+    def test_delete(self):
+        self.item.update(BOX, "#000000")
+        self.item.delete()
+        self.canvas.delete.assert_called_once_with(7)
+        self.assertIsNone(self.item.item)
+        self.item.delete()
+        self.canvas.delete.assert_called_once_with(7)
+
+
+class CreateSceneItemTestCase(TestCase):
+    def test_vector_mode_without_sprite_cache(self):
+        self.assertIsInstance(create_scene_item(MagicMock()), SceneItem)
+
+    def test_raster_mode_with_sprite_cache(self):
+        self.assertIsInstance(create_scene_item(MagicMock(), SpriteCache(1, create_image)), SpriteItem)
@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from piscis.intervals import RUN, PAUSE
+from piscis.scheduler import Frame
+from piscis.telemetry import TelemetryRing, pack_color, IDLE, UNKNOWN_COLOR
+
+
+def create_frame(index):
+    return Frame(index, index * .025, 1000 + index * 25, index * .025, 0)
+
+
+class PackColorTestCase(TestCase):
+    def test_packs_rgb(self):
+        self.assertEqual(pack_color("#102030"), 0x102030)
+
+    def test_unknown_colors(self):
+        self.assertEqual(pack_color("red"), UNKNOWN_COLOR)
+        self.assertEqual(pack_color(None), UNKNOWN_COLOR)
+
+
+class TelemetryRingTestCase(TestCase):
+    def setUp(self):
+        self.ring = TelemetryRing(2, capacity=3)
+        self.diameters = np.zeros(2)
+        self.positions = np.zeros((2, 2))
+
+    def record(self, index):
+        self.diameters[:] = index / 10., 0
+        self.positions[:] = index / 100.
+        self.ring.record(create_frame(index), self.diameters, self.positions)
+
+    def test_rejects_empty_ring(self):
+        with self.assertRaises(ValueError):
+            TelemetryRing(2, capacity=0)
+
+    def test_records_frame_state(self):
+        self.ring.set_color(0, "#FF0000")
+        self.ring.set_color(1, "#FF0000")
+        self.ring.set_color(1, "#000000")
+        self.ring.set_phase(0, RUN)
+        self.record(1)
+        columns = self.ring.get_columns()
+        self.assertEqual(list(columns["frame"]), [1])
+        self.assertEqual(list(columns["epoch"]), [1025])
+        self.assertAlmostEqual(columns["diameter"][0, 0], .1, places=6)
+        self.assertAlmostEqual(columns["x"][0, 1], .01, places=6)
+        self.assertEqual(list(columns["color"][0]), [0xFF0000, 0])
+        self.assertEqual([columns["phase_names"][code] for code in columns["phase"][0]], [RUN, IDLE])
+
+    def test_records_copy_of_state(self):
+        self.ring.set_phase(1, PAUSE)
+        self.record(1)
+        self.ring.set_phase(1, IDLE)
+        self.record(2)
+        self.assertEqual(list(self.ring.get_columns()["phase"][:, 1]), [2, 0])
+        self.assertAlmostEqual(self.ring.get_columns()["diameter"][0, 0], .1, places=6)
+
+    def test_overwrites_oldest_frames(self):
+        for index in range(5):
+            self.record(index)
+        self.assertEqual(len(self.ring), 3)
+        self.assertEqual(list(self.ring.get_columns()["frame"]), [2, 3, 4])
+
+    def test_exports_npz_columns(self):
+        handle, file_path = tempfile.mkstemp(suffix=".npz")
+        os.close(handle)
+        try:
+            self.record(1)
+            self.record(2)
+            self.ring.export_npz(file_path)
+            with np.load(file_path) as columns:
+                self.assertEqual(list(columns["frame"]), [1, 2])
+                self.assertEqual(columns["y"].shape, (2, 2))
+        finally:
+            os.remove(file_path)
+
+    def test_backs_ring_with_file(self):
+        handle, file_path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            ring = TelemetryRing(2, capacity=4, file_path=file_path)
+            ring.record(create_frame(7), self.diameters, self.positions)
+            ring.flush()
+            self.assertEqual(os.path.getsize(file_path), ring.records.nbytes)
+            del ring
+        finally:
+            os.remove(file_path)
@@ -0,0 +1,138 @@
+from unittest import TestCase
+from piscis.model import PredatorFactory, PredatorArray, LINEAR, CONSTANT_LV, EXPONENTIAL
+from piscis.timeline import TimelineCompiler, compile_timeline, get_frame_count
+
+STARTING_EPOCH = 100000000
+
+
+def create_predator(profile=LINEAR, profile_parameter=0., target_diameter=.5, scaling_velocity=.25):
+    pf = PredatorFactory()
+    pf.starting_position = (.5, .25)
+    pf.target_diameter = target_diameter
+    pf.scaling_velocity = scaling_velocity
+    pf.profile = profile
+    pf.profile_parameter = profile_parameter
+    return pf.create()
+
+
+class CompileTimelineTestCase(TestCase):
+    def test_frame_count_covers_one_loom(self):
+        self.assertEqual(get_frame_count(2., 40), 80)
+        self.assertEqual(get_frame_count(0., 40), 1)
+        self.assertEqual(get_frame_count(float("inf"), 40), 1)
+
+    def test_linear_timeline_matches_scaling_vector(self):
+        predator = create_predator()
+        predator.start_both(0)
+        timeline = compile_timeline(predator, 40)
+        self.assertEqual(len(timeline), 80)
+        for index in (0, 1, 40, 79):
+            self.assertAlmostEqual(timeline.frames[index, 2],
+                                   predator.scaling_vector.get_current_diameter(index * 25))
+
+    def test_timeline_contains_position(self):
+        timeline = compile_timeline(create_predator(), 40)
+        self.assertEqual(tuple(timeline.frames[10, :2]), (.5, .25))
+
+    def test_timeline_follows_trajectory(self):
+        pf = PredatorFactory()
+        pf.starting_position = (.1, .5)
+        pf.target_diameter, pf.scaling_velocity = .5, .25
+        pf.path = {"kind": "straight", "to": [.9, .5], "speed": .2}
+        timeline = compile_timeline(pf.create(), 40)
+        self.assertAlmostEqual(timeline.frames[40, 0], .3)
+
+    def test_constant_lv_timeline_grows_hyperbolically(self):
+        timeline = compile_timeline(create_predator(CONSTANT_LV, .5), 40)
+        self.assertAlmostEqual(timeline.frames[0, 2], .5 * .5 / 2.5)
+        self.assertAlmostEqual(timeline.frames[40, 2], .5 * .5 / 1.5)
+        self.assertLess(timeline.frames[-1, 2], .5)
+
+    def test_exponential_timeline_grows_exponentially(self):
+        timeline = compile_timeline(create_predator(EXPONENTIAL, 2.), 40)
+        self.assertAlmostEqual(timeline.frames[40, 2] / timeline.frames[0, 2], 7.389056, places=5)
+
+    def test_lookup_past_the_end_reports_target_diameter(self):
+        timeline = compile_timeline(create_predator(CONSTANT_LV, .5), 40)
+        self.assertEqual(timeline.get_diameter(2.), .5)
+        self.assertEqual(timeline.get_diameter(0.), timeline.frames[0, 2])
+        self.assertEqual(timeline.get_diameter(.0249), timeline.frames[0, 2])
+        self.assertEqual(timeline.get_diameter(.0251), timeline.frames[1, 2])
+
+    def test_lookup_never_runs_ahead_of_the_profile(self):
+        predator = create_predator(CONSTANT_LV, .5)
+        timeline = compile_timeline(predator, 40)
+        for elapsed in (.001, .0126, .5126, 1.9999):
+            self.assertLessEqual(timeline.get_diameter(elapsed),
+                                 predator.scaling_vector.get_current_diameter(elapsed * 1000))
+
+    def test_lookup_before_the_start_reports_first_frame(self):
+        timeline = compile_timeline(create_predator(CONSTANT_LV, .5), 40)
+        self.assertEqual(timeline.get_diameter(-.02), timeline.frames[0, 2])
+        self.assertEqual(timeline.get_diameter(-5.), timeline.frames[0, 2])
+
+    def test_stationary_predator_has_single_frame(self):
+        timeline = compile_timeline(create_predator(CONSTANT_LV, .5, scaling_velocity=0), 40)
+        self.assertEqual(len(timeline), 1)
+        self.assertEqual(timeline.frames[0, 2], 0)
+        self.assertEqual(timeline.get_diameter(.5), 0)
+        self.assertEqual(timeline.get_diameter(1000.), 0)
+
+    def test_stationary_predator_never_reaches_target(self):
+        predator_array = PredatorArray(1, TimelineCompiler(40))
+        predator = create_predator(CONSTANT_LV, .5, scaling_velocity=0)
+        predator.start_both(STARTING_EPOCH)
+        predator_array.assign(0, predator)
+        predator_array.evaluate(STARTING_EPOCH + 60000)
+        self.assertEqual(predator_array.diameters[0], 0)
+        self.assertEqual(predator.scaling_vector.starting_epoch, STARTING_EPOCH)
+
+
+class TimelineCompilerTestCase(TestCase):
+    def setUp(self):
+        self.compiler = TimelineCompiler(40, 2)
+
+    def test_reuses_timeline_for_equal_parameters(self):
+        first = self.compiler.compile(create_predator(CONSTANT_LV, .5))
+        second = self.compiler.compile(create_predator(CONSTANT_LV, .5))
+        self.assertIs(first, second)
+        self.assertEqual(self.compiler.cache.hits, 1)
+
+    def test_compiles_new_timeline_for_changed_parameters(self):
+        first = self.compiler.compile(create_predator(CONSTANT_LV, .5))
+        second = self.compiler.compile(create_predator(CONSTANT_LV, .25))
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.compiler.cache), 2)
+
+
+class PredatorArrayTimelineTestCase(TestCase):
+    def setUp(self):
+        self.predator = create_predator(CONSTANT_LV, .5)
+        self.predator.start_both(STARTING_EPOCH)
+
+    def test_looks_up_diameter_from_timeline(self):
+        array = PredatorArray(1, TimelineCompiler(40))
+        array.assign(0, self.predator)
+        self.assertIsNotNone(array.timelines[0])
+        diameters, _ = array.evaluate(STARTING_EPOCH + 1000)
+        self.assertAlmostEqual(diameters[0], .5 * .5 / 1.5)
+
+    def test_restarts_after_timeline_ends(self):
+        array = PredatorArray(1, TimelineCompiler(40))
+        array.assign(0, self.predator)
+        diameters, _ = array.evaluate(STARTING_EPOCH + 2000)
+        self.assertAlmostEqual(diameters[0], .5 * .5 / 2.5)
+        self.assertEqual(self.predator.scaling_vector.starting_epoch, STARTING_EPOCH + 2000)
+
+    def test_evaluates_profile_without_compiler(self):
+        array = PredatorArray(1)
+        array.assign(0, self.predator)
+        self.assertIsNone(array.timelines[0])
+        diameters, _ = array.evaluate(STARTING_EPOCH + 1000)
+        self.assertAlmostEqual(diameters[0], .5 * .5 / 1.5)
+
+    def test_linear_predators_do_not_compile_timelines(self):
+        array = PredatorArray(1, TimelineCompiler(40))
+        array.assign(0, create_predator())
+        self.assertIsNone(array.timelines[0])
+        self.assertEqual(array.profile_indices, [])
@@ -0,0 +1,334 @@
+from math import pi
+import socket
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+import numpy as np
+from piscis.clock import VirtualClock
+from piscis.config import Configuration
+from piscis.control import ControlDispatcher
+from piscis.model import PredatorArray, PredatorFactory
+from piscis.scheduler import Frame
+from piscis.shared_state import SharedArenaState, DisplayPredatorArray
+from piscis.tracker import SharedTrackerRing, UdpTrackerSource, UdpTrackerSink, TrackerFeed, ClosedLoop, \
+    SyntheticTracker, TrackerError, create_samples, encode_samples, decode_samples, open_tracker_ring, main, \
+    MAX_PREDICTION
+from piscis.ui.headless import FakeWidget, create_headless_window
+
+
+def create_sample(capture_time, arena, x, y, heading=float("nan")):
+    return create_samples(capture_time, arena, [(x, y)], heading)
+
+
+class SampleTestCase(TestCase):
+    def test_samples_survive_encoding(self):
+        samples = create_samples([1., 2.], [1, 2], [(.1, .2), (.3, .4)], [0., pi])
+        decoded = decode_samples(encode_samples(samples))
+        self.assertEqual(decoded.tolist(), samples.tolist())
+
+    def test_rejects_partial_samples(self):
+        with self.assertRaises(TrackerError):
+            decode_samples(encode_samples(create_sample(1., 1, .5, .5))[:-1])
+
+
+class SharedTrackerRingTestCase(TestCase):
+    def setUp(self):
+        self.ring = SharedTrackerRing(capacity=4)
+        self.writer = SharedTrackerRing(self.ring.name, create=False)
+
+    def tearDown(self):
+        self.writer.close()
+        self.ring.close()
+
+    def test_writer_reads_capacity_from_ring(self):
+        self.assertEqual(self.writer.capacity, 4)
+
+    def test_samples_pass_between_handles(self):
+        samples = create_samples([1., 2., 3.], [1, 1, 2], [(.1, .1), (.2, .2), (.3, .3)], 0.)
+        self.assertEqual(self.writer.push(samples), 3)
+        self.assertEqual(len(self.ring), 3)
+        self.assertEqual(self.ring.receive().tolist(), samples.tolist())
+        self.assertEqual(len(self.ring.receive()), 0)
+
+    def test_rejects_empty_rings(self):
+        with self.assertRaises(ValueError):
+            SharedTrackerRing(capacity=0)
+
+    def test_reattaches_to_rings_left_behind(self):
+        self.writer.push(create_samples([1., 2.], 1, [(.1, .1), (.2, .2)], 0.))
+        with patch("piscis.tracker.click.echo") as echo:
+            ring = open_tracker_ring(self.ring.name)
+        self.assertIn("left behind by an earlier session", echo.call_args[0][0])
+        self.ring.is_owner = False
+        self.assertEqual((ring.capacity, len(ring), ring.is_owner), (4, 0, True))
+        self.writer.push(create_sample(3., 1, .3, .3))
+        self.assertEqual(ring.receive()["capture_time"].tolist(), [3.])
+        ring.close()
+
+    def test_full_ring_rejects_samples(self):
+        samples = create_samples(np.arange(6.), 1, np.zeros((6, 2)), 0.)
+        self.assertEqual(self.writer.push(samples), 4)
+        self.assertEqual(self.writer.get_rejected(), 2)
+        self.assertEqual(self.ring.receive(limit=3)["capture_time"].tolist(), [0., 1., 2.])
+        self.assertEqual(self.writer.push(samples[4:]), 2)
+        self.assertEqual(self.ring.receive()["capture_time"].tolist(), [3., 4., 5.])
+
+
+class UdpTrackerTestCase(TestCase):
+    def setUp(self):
+        self.source = UdpTrackerSource()
+        self.sink = UdpTrackerSink(self.source.port)
+
+    def tearDown(self):
+        self.sink.close()
+        self.source.close()
+
+    def receive(self, count):
+        received = list()
+        deadline = time.monotonic() + 5
+        while sum(len(samples) for samples in received) < count and time.monotonic() < deadline:
+            received.append(self.source.receive())
+        return np.concatenate(received)
+
+    def test_samples_arrive_in_datagrams(self):
+        samples = create_samples(np.arange(40.), 1, np.zeros((40, 2)), 0.)
+        self.assertEqual(self.sink.push(samples), 40)
+        self.assertEqual(self.receive(40)["capture_time"].tolist(), list(range(40)))
+
+    def test_malformed_datagrams_are_counted(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as connection:
+            connection.sendto(b"fish", (self.source.socket.getsockname()))
+        self.sink.push(create_sample(1., 1, .5, .5))
+        self.assertEqual(len(self.receive(1)), 1)
+        self.assertEqual(self.source.malformed, 1)
+
+    def test_receives_at_most_limit_datagrams(self):
+        self.assertEqual(len(self.source.receive()), 0)
+        for i in range(3):
+            self.sink.push(create_sample(float(i), 1, .5, .5))
+        batches = list()
+        deadline = time.monotonic() + 5
+        while sum(len(samples) for samples in batches) < 3 and time.monotonic() < deadline:
+            batches.append(self.source.receive(limit=1))
+        self.assertEqual(max(len(samples) for samples in batches), 1)
+        self.assertEqual(np.concatenate(batches)["capture_time"].tolist(), [0., 1., 2.])
+
+    def test_port_in_use_is_reported(self):
+        with self.assertRaises(OSError):
+            UdpTrackerSource(port=self.source.port)
+
+    def test_refused_samples_are_not_accepted(self):
+        self.source.close()
+        self.assertIn(0, [self.sink.push(create_sample(1., 1, .5, .5)) for _ in range(3)])
+
+
+class TrackerFeedTestCase(TestCase):
+    def setUp(self):
+        self.feed = TrackerFeed(2, max_age=.1)
+
+    def test_keeps_newest_sample_per_arena(self):
+        samples = create_samples([1., 1.01, 1.02, 1.], [1, 1, 1, 2], [(.1, .5), (.2, .5), (.3, .5), (.7, .7)], 0.)
+        self.assertEqual(self.feed.update(samples, 1.05), 2)
+        self.assertEqual(self.feed.positions.tolist(), [[.3, .5], [.7, .7]])
+        self.assertEqual(self.feed.superseded, 2)
+        self.assertAlmostEqual(self.feed.velocities[0][0], 5.)
+
+    def test_drops_stale_late_and_invalid_samples(self):
+        self.feed.update(create_sample(1., 1, .5, .5), 1.)
+        samples = create_samples([.5, .9, 1., 1.], [1, 1, 3, 2], [(.1, .1), (.2, .2), (.3, .3), (np.nan, 0.)], 0.)
+        self.assertEqual(self.feed.update(samples, 1.), 0)
+        self.assertEqual((self.feed.stale, self.feed.superseded, self.feed.invalid), (1, 1, 2))
+        self.assertEqual(self.feed.positions[0].tolist(), [.5, .5])
+        self.assertEqual(self.feed.get_dropped(), 4)
+
+    def test_velocity_resets_after_gap(self):
+        self.feed.update(create_sample(1., 1, .5, .5), 1.)
+        self.feed.update(create_sample(1.5, 1, .6, .5), 1.5)
+        self.assertEqual(self.feed.velocities[0].tolist(), [0., 0.])
+
+    def test_heading_follows_motion_unless_reported(self):
+        self.feed.update(create_samples([1., 1.01], 1, [(.5, .5), (.5, .6)], np.nan), 1.01)
+        self.assertAlmostEqual(self.feed.headings[0], pi / 2)
+        self.feed.update(create_sample(1.02, 1, .5, .7, 1.), 1.02)
+        self.assertEqual(self.feed.headings[0], 1.)
+
+    def test_prediction_is_limited(self):
+        self.feed.update(create_samples([1., 1.01], 1, [(.5, .5), (.51, .5)], 0.), 1.01)
+        self.assertAlmostEqual(self.feed.predict(1.03)[0][0], .52)
+        self.assertAlmostEqual(self.feed.predict(2.)[0][0], .51 + .5 * MAX_PREDICTION)
+        self.assertEqual(self.feed.get_fresh(1.05).tolist(), [True, False])
+        self.assertEqual(self.feed.get_fresh(1.2).tolist(), [False, False])
+
+
+class ClosedLoopTestCase(TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=10.)
+        self.ring = SharedTrackerRing()
+        self.closed_loop = ClosedLoop([self.ring], 2, self.clock.monotonic)
+        self.predator_array = PredatorArray(2)
+        predator_factory = PredatorFactory()
+        predator_factory.target_diameter = .2
+        predator_factory.scaling_velocity = .1
+        for i in range(2):
+            self.predator_array.assign(i, predator_factory.create())
+
+    def tearDown(self):
+        self.closed_loop.close()
+
+    def test_places_stimulus_at_egocentric_angle(self):
+        self.closed_loop.follow(0, 90, .2)
+        self.ring.push(create_samples(10., [1, 2], [(.5, .5), (.3, .3)], 0.))
+        self.assertEqual(self.closed_loop.place(self.predator_array).tolist(), [True, False])
+        _, positions = self.predator_array.evaluate(0)
+        np.testing.assert_allclose(positions, [[.5, .7], [0., 0.]], atol=1e-9)
+        self.assertTrue(self.predator_array.following[0])
+
+    def test_unfollowed_and_lost_fish_release_the_stimulus(self):
+        self.closed_loop.follow(0, 0, .1)
+        self.ring.push(create_sample(10., 1, .5, .5))
+        self.closed_loop.place(self.predator_array)
+        self.closed_loop.unfollow(0)
+        self.assertFalse(self.closed_loop.place(self.predator_array).any())
+        self.closed_loop.follow(0, 0, .1)
+        self.clock.advance(1.)
+        self.assertFalse(self.closed_loop.place(self.predator_array).any())
+        self.assertFalse(self.predator_array.tracked.any())
+
+    def test_positions_stay_inside_the_arena(self):
+        self.closed_loop.follow(0, 180, .3)
+        self.ring.push(create_sample(10., 1, .1, .5, 0.))
+        self.closed_loop.place(self.predator_array)
+        self.assertEqual(self.predator_array.tracked_positions[0].tolist(), [0., .5])
+
+    def test_latency_is_measured_once_per_sample(self):
+        self.closed_loop.follow(0, 0, 0)
+        self.closed_loop.display_lag = .01
+        self.ring.push(create_sample(9.99, 1, .5, .5))
+        self.closed_loop.place(self.predator_array)
+        self.clock.advance(.005)
+        np.testing.assert_allclose(self.closed_loop.present(), [.025])
+        self.assertAlmostEqual(self.closed_loop.render_delay, .0005)
+        self.closed_loop.place(self.predator_array)
+        self.assertEqual(len(self.closed_loop.present()), 0)
+        self.assertEqual(len(self.closed_loop.present()), 0)
+        self.assertAlmostEqual(self.closed_loop.render_delay, .0005 * .9)
+
+    def test_prediction_compensates_measured_delay(self):
+        self.closed_loop.follow(0, 0, 0)
+        self.closed_loop.render_delay = .02
+        self.ring.push(create_samples([9.99, 10.], 1, [(.5, .5), (.51, .5)], 0.))
+        self.closed_loop.place(self.predator_array)
+        self.assertAlmostEqual(self.predator_array.tracked_positions[0][0], .51 + .5 * 1. * .02)
+
+
+class SyntheticTrackerTestCase(TestCase):
+    def test_fish_swim_along_their_heading(self):
+        tracker = SyntheticTracker(4, angular_speed=1.)
+        samples = tracker.get_samples(0.)
+        self.assertEqual(samples["arena"].tolist(), [1, 2, 3, 4])
+        np.testing.assert_allclose(samples[["x", "y"]].tolist()[0], (.75, .5))
+        self.assertAlmostEqual(samples["heading"][0], pi / 2)
+
+    def test_run_paces_samples(self):
+        clock = VirtualClock()
+        ring = SharedTrackerRing(capacity=16)
+        tracker = SyntheticTracker(2, rate=100., clock=clock.monotonic, latency=.01)
+        try:
+            tracker.run(ring, .095, sleep=clock.advance)
+            self.assertEqual((tracker.sent, tracker.accepted), (20, 16))
+            self.assertEqual(ring.get_rejected(), 4)
+            self.assertAlmostEqual(ring.receive()["capture_time"][0], -.01)
+        finally:
+            ring.close()
+
+    def test_run_skips_missed_deadlines(self):
+        clock = VirtualClock()
+        ring = SharedTrackerRing(capacity=16)
+        tracker = SyntheticTracker(1, rate=100., clock=clock.monotonic)
+        try:
+            tracker.run(ring, .05, sleep=lambda seconds: clock.advance(.025))
+            np.testing.assert_allclose(ring.receive()["capture_time"], [0., .025])
+        finally:
+            ring.close()
+
+
+class TrackerCommandTestCase(TestCase):
+    def test_needs_exactly_one_transport(self):
+        self.assertEqual(CliRunner().invoke(main, []).exit_code, 2)
+        self.assertEqual(CliRunner().invoke(main, ["--udp-port", "1", "--ring", "fish"]).exit_code, 2)
+
+    def test_writes_into_ring(self):
+        ring = SharedTrackerRing()
+        try:
+            result = CliRunner().invoke(main, ["--ring", ring.name, "--arenas", "2", "--duration", ".001"])
+            self.assertEqual(result.exit_code, 0)
+            self.assertEqual(result.output, "Sent 2 samples, 2 accepted\n")
+            self.assertEqual(ring.receive()["arena"].tolist(), [1, 2])
+        finally:
+            ring.close()
+
+    def test_reports_missing_ring(self):
+        result = CliRunner().invoke(main, ["--ring", "piscis-missing-ring", "--duration", "0"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("No tracker ring", result.output)
+
+    def test_sends_datagrams_until_interrupted(self):
+        source = UdpTrackerSource()
+        try:
+            with patch.object(SyntheticTracker, "run", side_effect=KeyboardInterrupt):
+                result = CliRunner().invoke(main, ["--udp-port", str(source.port)])
+            self.assertEqual((result.exit_code, result.output), (0, "Sent 0 samples, 0 accepted\n"))
+            result = CliRunner().invoke(main, ["--udp-port", str(source.port), "--arenas", "3", "--duration", ".001"])
+            self.assertEqual(result.output, "Sent 3 samples, 3 accepted\n")
+        finally:
+            source.close()
+
+
+class ClosedLoopWindowTestCase(TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=100.)
+        self.configuration = Configuration()
+        self.configuration.follow = 90., .1
+        self.window = create_headless_window(self.configuration, master=FakeWidget(self.clock.monotonic),
+                                             clock=self.clock)
+        self.ring = SharedTrackerRing()
+        self.window.attach_closed_loop(ClosedLoop([self.ring], 4, self.clock.monotonic))
+        self.tracker = SyntheticTracker(4, angular_speed=0., clock=self.clock.monotonic, latency=.004)
+
+    def tearDown(self):
+        self.window.closed_loop.close()
+
+    def render(self, index):
+        return self.window.render(Frame(index, index * .025, self.window.get_epoch(), index * .025, 0))
+
+    def test_running_stimuli_follow_their_fish(self):
+        tab = self.window.tabs[0]
+        tab.target_diameter, tab.scaling_velocity = .2, 0.
+        tab.on_generate()
+        tab.on_start()
+        self.tracker.send(self.ring)
+        self.assertTrue(self.render(1))
+        np.testing.assert_allclose(self.window.predator_array.positions[0], (.65, .5), atol=1e-9)
+        self.assertEqual(self.window.frame_statistics.input_latencies.count, 1)
+        self.assertIn("input_latency", self.window.frame_statistics.get_summary())
+
+    def test_control_api_switches_following(self):
+        dispatcher = ControlDispatcher(self.window)
+        self.assertTrue(dispatcher({"command": "query", "arena": 2})["following"])
+        response = dispatcher({"command": "unfollow", "arena": 2})
+        self.assertFalse(response["following"])
+        self.assertFalse(dispatcher({"command": "follow", "arena": 2, "distance": -1})["ok"])
+        self.assertTrue(dispatcher({"command": "follow", "arena": 2, "angle": 45, "distance": .1})["following"])
+
+    def test_tracked_positions_reach_display_process(self):
+        shared_state = SharedArenaState(4)
+        try:
+            self.window.predator_array.track(np.array([True, False, False, False]), np.full((4, 2), .3))
+            shared_state.publish_tracking(self.window.predator_array)
+            display_array = DisplayPredatorArray(4)
+            display_array.load(shared_state.read()[1]["arenas"])
+            self.assertEqual(display_array.tracked.tolist(), [True, False, False, False])
+            self.assertEqual(display_array.get_current_positions(0.)[0].tolist(), [.3, .3])
+        finally:
+            shared_state.close()
@@ -0,0 +1,101 @@
+from unittest import TestCase
+import numpy as np
+from piscis.trajectory import Trajectory, TrajectoryCompiler, TrajectoryError, compile_trajectory, \
+    create_arc_length_table, sample_spline, HOLD, LOOP, BOUNCE, TRAJECTORY_SAMPLES
+
+
+class ArcLengthTableTestCase(TestCase):
+    def test_samples_are_evenly_spaced_along_the_path(self):
+        table, length = create_arc_length_table([(0, 0), (.3, 0), (.3, .1)], 5)
+        self.assertAlmostEqual(length, .4)
+        np.testing.assert_allclose(np.hypot(*np.diff(table, axis=0).T), [.1] * 4)
+        np.testing.assert_allclose(table[-1], (.3, .1))
+
+    def test_skips_repeated_points(self):
+        table, length = create_arc_length_table([(0, 0), (0, 0), (.2, 0)], 3)
+        self.assertAlmostEqual(length, .2)
+        np.testing.assert_allclose(table[1], (.1, 0))
+
+    def test_spline_passes_through_its_points(self):
+        points = [(0., 0.), (.5, .5), (1., 0.)]
+        samples = sample_spline(points, 4)
+        np.testing.assert_allclose(samples[[0, 4, -1]], points)
+
+    def test_spline_through_two_points_is_straight(self):
+        np.testing.assert_allclose(sample_spline([(0., 0.), (1., 0.)], 4), [(0., 0.), (1., 0.)])
+
+
+class TrajectoryTestCase(TestCase):
+    def create(self, repeat):
+        table, length = create_arc_length_table([(0, 0), (1, 0)], 11)
+        return Trajectory(table, length, .5, repeat)
+
+    def test_interpolates_between_samples(self):
+        np.testing.assert_allclose(self.create(HOLD).get_positions(.25), (.125, 0))
+
+    def test_hold_stops_at_the_end(self):
+        trajectory = self.create(HOLD)
+        np.testing.assert_allclose(trajectory.get_positions(5.), (1, 0))
+        self.assertTrue(trajectory.is_moving(1.))
+        self.assertFalse(trajectory.is_moving(2.))
+
+    def test_loop_restarts(self):
+        trajectory = self.create(LOOP)
+        np.testing.assert_allclose(trajectory.get_positions(2.5), (.25, 0))
+        self.assertTrue(trajectory.is_moving(100.))
+
+    def test_bounce_returns(self):
+        np.testing.assert_allclose(self.create(BOUNCE).get_positions(np.array([1., 2.5, 4.])),
+                                   [(.5, 0), (.75, 0), (0, 0)], atol=1e-12)
+
+    def test_empty_paths_stay_in_place(self):
+        trajectory = Trajectory(np.array([(.5, .5), (.5, .5)]), 0., 1.)
+        np.testing.assert_allclose(trajectory.get_positions(3.), (.5, .5))
+        self.assertFalse(trajectory.is_moving(0.))
+
+
+class CompileTrajectoryTestCase(TestCase):
+    def test_straight(self):
+        trajectory = compile_trajectory({"kind": "straight", "to": [.9, .5], "speed": .2}, (.1, .5))
+        self.assertEqual(trajectory.table.shape, (TRAJECTORY_SAMPLES, 2))
+        self.assertAlmostEqual(trajectory.length, .8)
+        np.testing.assert_allclose(trajectory.get_positions(2.), (.5, .5))
+
+    def test_circular_loops_around_the_center(self):
+        trajectory = compile_trajectory({"kind": "circular", "center": [.5, .5], "speed": .1}, (.5, .3))
+        self.assertEqual(trajectory.repeat, LOOP)
+        self.assertAlmostEqual(trajectory.length, 2 * np.pi * .2, places=4)
+        quarter = trajectory.length / 4 / .1
+        np.testing.assert_allclose(trajectory.get_positions(quarter), (.7, .5), atol=1e-4)
+        clockwise = compile_trajectory({"kind": "circular", "center": [.5, .5], "speed": .1, "clockwise": True},
+                                       (.5, .3))
+        np.testing.assert_allclose(clockwise.get_positions(quarter), (.3, .5), atol=1e-4)
+
+    def test_polyline_and_spline_start_at_the_stimulus(self):
+        for kind in ("polyline", "spline"):
+            trajectory = compile_trajectory({"kind": kind, "points": [[.9, .1], [.9, .9]], "speed": .1}, (.1, .1))
+            np.testing.assert_allclose(trajectory.get_positions(0.), (.1, .1))
+            np.testing.assert_allclose(trajectory.table[-1], (.9, .9))
+
+    def test_rejects_invalid_paths(self):
+        invalid = [
+            "straight",
+            {"kind": "zigzag", "speed": 1},
+            {"kind": "straight", "to": [1, 1]},
+            {"kind": "straight", "to": [1, 1], "speed": -1},
+            {"kind": "straight", "to": [1], "speed": 1},
+            {"kind": "straight", "to": [1, 1], "speed": 1, "repeat": "forever"},
+            {"kind": "circular", "speed": 1},
+            {"kind": "polyline", "points": [], "speed": 1},
+            {"kind": "spline", "points": [[0, "a"]], "speed": 1},
+            {"kind": "straight", "to": [1, 1], "speed": 1, "angle": 3},
+        ]
+        for path in invalid:
+            with self.assertRaises(TrajectoryError, msg=str(path)):
+                compile_trajectory(path, (.5, .5))
+
+    def test_compiler_reuses_tables(self):
+        compiler = TrajectoryCompiler()
+        path = {"kind": "straight", "to": [.9, .5], "speed": .2}
+        self.assertIs(compiler.compile(path, (.1, .5)), compiler.compile(dict(path), (.1, .5)))
+        self.assertIsNot(compiler.compile(path, (.1, .5)), compiler.compile(path, (.2, .5)))
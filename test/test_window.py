@@ -0,0 +1,625 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+import numpy as np
+from piscis.config import Configuration
+from piscis.intervals import RUN, PAUSE
+from piscis.layout import ArenaLayout
+from piscis.model import EXPONENTIAL, LINEAR, PredatorFactory, PredatorArray
+from piscis.protocol import load_protocol
+from piscis.scheduler import Frame
+from piscis.tracker import SharedTrackerRing, create_samples
+from piscis.ui.display_process import DisplayProcess
+from piscis.ui.headless import FakeCanvas, FakeEvent, create_headless_window
+from piscis.ui.scene import SceneItem
+from piscis.ui.window import PredatorDrawer, ArenaCanvas, draw_outlines, get_tab_name, BACKGROUND_COLOR, \
+    PREDATOR_COLOR, PISCIS_VERSION
+
+
+def create_frame(window, index, offset_ms):
+    return Frame(index, index * .025, window.get_epoch() + offset_ms, index * .025, 0)
+
+
+def generate(tab, diameter=.5, velocity=.1, position=(.5, .5)):
+    tab.target_diameter = diameter
+    tab.scaling_velocity = velocity
+    tab.starting_position = position
+    tab.on_generate()
+
+
+class PredatorDrawerTestCase(TestCase):
+    def setUp(self):
+        predator_factory = PredatorFactory()
+        predator_factory.starting_position = .5, .5
+        self.drawer = PredatorDrawer(predator_factory.create())
+
+    def test_calculate_coordinates_centers_disc(self):
+        self.assertEqual(self.drawer.calculate_coordinates(200, 100, .1), (90, 40, 110, 60))
+
+    def test_render_predator_updates_scene_item(self):
+        canvas = FakeCanvas()
+        scene_item = SceneItem(canvas)
+        self.drawer.render_predator(scene_item, np.array([1., 2., 3., 4.]))
+        self.assertEqual(canvas.coords(scene_item.item), [1., 2., 3., 4.])
+        self.assertEqual(canvas.items[scene_item.item]["options"]["fill"], self.drawer.predator.color)
+
+    def test_stop_and_start_restore_target_diameter(self):
+        self.drawer.predator.set_target_diameter(.4)
+        self.drawer.stop()
+        self.assertEqual(self.drawer.predator.get_target_diameter(), 0)
+        self.drawer.start()
+        self.assertEqual(self.drawer.predator.get_target_diameter(), .4)
+        self.assertFalse(self.drawer.is_stopped)
+
+
+class ArenaCanvasTestCase(TestCase):
+    def setUp(self):
+        self.canvas = FakeCanvas(410, 210)
+        self.arena_canvas = ArenaCanvas(self.canvas, ArenaLayout(4, 2, 2, spacing=10), show_names=True)
+
+    def test_creates_cell_backgrounds_and_names(self):
+        self.assertEqual(len(self.canvas.find_kind("rectangle")), 4)
+        self.assertEqual(len(self.canvas.find_kind("text")), 4)
+        self.assertEqual(self.canvas.coords(self.arena_canvas.backgrounds[3]), [210, 110, 400, 200])
+
+    def test_change_background(self):
+        self.arena_canvas.change_background("#123456", 1)
+        self.assertEqual(self.canvas.items[self.arena_canvas.backgrounds[1]]["options"]["fill"], "#123456")
+        self.assertEqual(self.canvas.items[self.arena_canvas.backgrounds[0]]["options"]["fill"], BACKGROUND_COLOR)
+
+    def test_bounding_boxes_are_offset_into_cells(self):
+        predator_array = PredatorArray(4)
+        predator_array.positions[:] = .5
+        predator_array.diameters[:] = .1
+        boxes = self.arena_canvas.bounding_boxes(predator_array)
+        self.assertEqual(tuple(boxes[0]), tuple(predator_array.bounding_boxes(190, 90)[0] + [10, 10, 10, 10]))
+        self.assertEqual(tuple(boxes[3]), tuple(predator_array.bounding_boxes(190, 90)[3] + [210, 110, 210, 110]))
+
+    def test_draw_outlines_stay_inside_cell(self):
+        self.arena_canvas.draw_outlines(3)
+        lines = [self.canvas.coords(item) for item in self.canvas.find_kind("line")]
+        self.assertEqual(len(lines), 4)
+        for line in lines:
+            self.assertTrue(all(210 <= x <= 400 for x in line[0::2]))
+            self.assertTrue(all(110 <= y <= 200 for y in line[1::2]))
+
+    def test_resize_moves_cells_and_redraws_outlines(self):
+        self.arena_canvas.draw_outlines(3)
+        self.canvas.configure(width=810, height=410)
+        self.assertEqual(self.canvas.coords(self.arena_canvas.backgrounds[3]), [410, 210, 800, 400])
+        self.assertEqual(self.canvas.coords(self.arena_canvas.names[3]), [412, 212])
+        lines = [self.canvas.coords(item) for item in self.canvas.find_kind("line")]
+        self.assertEqual(len(lines), 4)
+        for line in lines:
+            self.assertTrue(all(410 <= x <= 800 for x in line[0::2]))
+
+
+class OutlineTestCase(TestCase):
+    def test_draws_four_borders_on_canvas(self):
+        canvas = FakeCanvas(700, 450)
+        draw_outlines(canvas)
+        self.assertEqual(len(canvas.find_kind("line")), 4)
+
+    def test_tab_names_shorten_for_many_arenas(self):
+        self.assertEqual(get_tab_name(0, 4), "Screen 1")
+        self.assertEqual(get_tab_name(23, 24), "24")
+
+
+class MainWindowTestCase(TestCase):
+    def setUp(self):
+        self.window = create_headless_window()
+
+    def test_creates_tab_per_arena(self):
+        configuration = Configuration()
+        configuration.arena_count = 24
+        window = create_headless_window(configuration)
+        self.assertEqual(len(window.tabs), 24)
+        self.assertEqual(len(window.secondary_window.predator_draw_object), 24)
+        self.assertEqual(len(window.all_tab.canvas.find_kind("line")), 24 * 4)
+
+    def test_render_draws_started_arenas_on_copy_canvases(self):
+        generate(self.window.tabs[1])
+        self.window.tabs[1].on_start()
+        self.assertTrue(self.window.render(create_frame(self.window, 1, 1000)))
+
+        scene_item = self.window.secondary_window.predator_draw_object[1]
+        self.assertIsNotNone(scene_item.item)
+        self.assertIsNone(self.window.secondary_window.predator_draw_object[0].item)
+        self.assertEqual(self.window.frame_statistics.frames, 1)
+        self.assertEqual(self.window.frame_statistics.draw_durations[1].count, 1)
+
+    def test_unchanged_frames_do_not_touch_canvases(self):
+        generate(self.window.tabs[0], velocity=0)
+        self.window.tabs[0].on_start()
+        self.assertFalse(self.window.render(create_frame(self.window, 1, 0)))
+        calls = self.window.secondary_window.canvas.calls.copy()
+        self.window.render(create_frame(self.window, 2, 25))
+        self.assertEqual(self.window.secondary_window.canvas.calls, calls)
+
+    def test_only_visible_tab_is_drawn(self):
+        for tab in self.window.tabs[:2]:
+            generate(tab)
+            tab.on_start()
+        self.window.render(create_frame(self.window, 1, 1000))
+        self.assertFalse(self.window.tabs[1].is_built)
+
+        self.window.notebook.index = lambda tab: 2
+        self.window.on_tab_changed()
+        self.assertEqual(self.window.visible_tab, 1)
+        self.assertTrue(self.window.tabs[1].is_built)
+        self.assertEqual(len(self.window.tabs[1].canvas.find_kind("oval")), 1)
+        self.window.render(create_frame(self.window, 2, 1025))
+        preview = self.window.tabs[1].predator_draw_object
+        self.assertEqual(self.window.tabs[1].canvas.coords(preview.item),
+                         list(self.window.drawer.calculate_all_coordinates(
+                             self.window.predator_array, self.window.tabs[1], self.window.all_tab,
+                             self.window.secondary_window)[0][1]))
+
+    def test_stop_shrinks_stimulus(self):
+        generate(self.window.tabs[0])
+        self.window.tabs[0].on_start()
+        self.window.render(create_frame(self.window, 1, 1000))
+        self.window.tabs[0].on_stop()
+        self.window.render(create_frame(self.window, 2, 1025))
+        self.assertFalse(self.window.is_running(0))
+        scene_item = self.window.all_tab.predator_draw_object[0]
+        begin_x, _, end_x, _ = self.window.all_tab.canvas.coords(scene_item.item)
+        self.assertEqual(begin_x, end_x)
+
+    def test_run_resumes_after_pause(self):
+        tab = self.window.tabs[0]
+        tab.run_seconds, tab.pause_seconds = 5, 3
+        generate(tab)
+        tab.on_start()
+        tab.on_run_end(0)
+        self.assertEqual(self.window.interval_engine.get_phase(0).name, PAUSE)
+        self.assertFalse(self.window.is_running(0))
+        tab.on_pause_end(0)
+        self.assertEqual(self.window.interval_engine.get_phase(0).name, RUN)
+        self.assertEqual(tab.remaining_secs_pause, 3)
+        self.assertTrue(self.window.is_running(0))
+
+    def test_background_color_reaches_copy_canvases(self):
+        self.window.tabs[2].change_background_color("#00FF00")
+        for screen in (self.window.all_tab, self.window.secondary_window):
+            background = screen.arena_canvas.backgrounds[2]
+            self.assertEqual(screen.canvas.items[background]["options"]["fill"], "#00FF00")
+
+    def test_tabs_are_built_when_first_shown(self):
+        tab = self.window.tabs[3]
+        tab.change_background_color("#00FF00")
+        tab.on_stop()
+        self.assertEqual(tab.remaining_secs_run, 0)
+        self.assertFalse(any(tab.is_built for tab in self.window.tabs))
+        self.window.notebook.index = lambda tab: 4
+        self.window.on_tab_changed()
+        self.assertEqual(tab.canvas.cget("background"), "#00FF00")
+        self.assertEqual(len(tab.canvas.find_kind("line")), 4)
+        tab.build()
+        self.assertEqual(len(tab.canvas.find_kind("line")), 4)
+
+    def test_stimuli_follow_their_path(self):
+        tab = self.window.tabs[0]
+        tab.path = {"kind": "straight", "to": [.9, .5], "speed": .2}
+        generate(tab, position=(.1, .5))
+        tab.on_start()
+        self.window.render(create_frame(self.window, 1, 2000))
+        self.assertAlmostEqual(self.window.predator_array.positions[0][0], .5, places=1)
+        self.window.show_tab(0)
+        self.assertEqual(len(tab.canvas.find_kind("line")), 5)
+
+    def test_render_uses_cached_geometry(self):
+        tab = self.window.tabs[0]
+        self.window.show_tab(0)
+        generate(tab)
+        tab.on_start()
+        for canvas in (tab.canvas, self.window.all_tab.canvas, self.window.secondary_window.canvas):
+            canvas.winfo_width = canvas.winfo_height = None
+        self.window.render(create_frame(self.window, 1, 1000))
+        self.assertIsNotNone(tab.predator_draw_object.item)
+
+    def test_resized_displays_redraw_stimuli(self):
+        generate(self.window.tabs[1])
+        self.window.tabs[1].on_start()
+        self.window.render(create_frame(self.window, 1, 1000))
+        scene_item = self.window.secondary_window.predator_draw_object[1]
+        before = self.window.secondary_window.canvas.coords(scene_item.item)
+        master = self.window.secondary_window.master
+        master.winfo_screenwidth, master.winfo_screenheight = lambda: 1280, lambda: 720
+        self.window.on_fullscreen()
+        self.assertEqual(self.window.secondary_window.arena_canvas.geometry.width, 1280)
+        self.assertTrue(self.window.predator_array.dirty[1])
+        self.window.render(create_frame(self.window, 2, 1000))
+        after = self.window.secondary_window.canvas.coords(scene_item.item)
+        self.assertLess(after[2] - after[0], before[2] - before[0])
+
+    def test_resized_tab_redraws_outlines_and_preview(self):
+        tab = self.window.tabs[0]
+        self.window.show_tab(0)
+        generate(tab, diameter=.2, position=(.5, .5))
+        tab.canvas.configure(width=1000, height=500)
+        self.assertEqual(len(tab.canvas.find_kind("line")), 4)
+        self.assertEqual(max(max(tab.canvas.coords(item)[0::2]) for item in tab.canvas.find_kind("line")), 986)
+        self.assertEqual(tab.canvas.coords(tab.predator_draw_object.item), [400, 150, 600, 350])
+        tab.set_starting_position(FakeEvent(x=250, y=250))
+        self.assertEqual(tab.predator.get_starting_position(), (.25, .5))
+
+    def test_statistics_summary_without_tracker(self):
+        self.assertEqual(self.window.get_statistics_summary(), self.window.frame_statistics.get_summary())
+
+    def test_startup_report(self):
+        report = self.window.get_startup_report()
+        for phase in ("arena tabs", "outlines", "other", "forms:"):
+            self.assertIn(phase, report)
+
+
+class OperatorControlsTestCase(TestCase):
+    def setUp(self):
+        self.window = create_headless_window()
+        self.window.show_tab(0)
+        self.tab = self.window.tabs[0]
+
+    def test_about_shows_version(self):
+        with patch("piscis.ui.window.showinfo") as showinfo:
+            self.window.on_about()
+        self.assertIn(PISCIS_VERSION, showinfo.call_args[0][1])
+
+    def test_display_background_dialog(self):
+        with patch("piscis.ui.window.askcolor", return_value=(None, None)):
+            self.window.on_change_fullscreen()
+        self.assertEqual(self.window.secondary_window.current_background_color, BACKGROUND_COLOR)
+        with patch("piscis.ui.window.askcolor", return_value=((0, 0, 255), "#0000FF")):
+            self.window.on_change_fullscreen()
+        self.assertEqual(self.window.display_background_color, "#0000FF")
+        self.assertEqual(self.window.secondary_window.canvas.cget("background"), "#0000FF")
+
+    def test_tab_color_dialogs(self):
+        with patch("piscis.ui.window.askcolor", return_value=(None, None)):
+            self.tab.on_background()
+            self.tab.on_stimuli_color()
+        self.assertEqual((self.tab.current_background_color, self.tab.color), (BACKGROUND_COLOR, PREDATOR_COLOR))
+        with patch("piscis.ui.window.askcolor", return_value=((0, 255, 0), "#00FF00")) as askcolor:
+            self.tab.on_background()
+            self.tab.on_stimuli_color()
+        self.assertEqual(askcolor.call_args[1]["color"], self.window.get_predator_color())
+        self.assertEqual(self.tab.canvas.cget("background"), "#00FF00")
+        self.assertEqual(self.tab.color, "#00FF00")
+        self.tab.apply_profile(EXPONENTIAL, .5)
+        self.assertIsNone(self.tab.predator)
+
+    def test_exports_frame_statistics(self):
+        with TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "statistics.csv")
+            with patch("piscis.ui.window.asksaveasfilename", return_value=""):
+                self.window.on_export_frame_statistics()
+            self.assertEqual(os.listdir(directory), [])
+            with patch("piscis.ui.window.asksaveasfilename", return_value=file_path):
+                self.window.on_export_frame_statistics()
+            self.assertTrue(os.path.exists(file_path))
+
+    def test_run_protocol_dialog(self):
+        with TemporaryDirectory() as directory:
+            protocol_path = os.path.join(directory, "protocol.json")
+            with open(protocol_path, "w") as protocol_file:
+                protocol_file.write('{"arenas": [{"arena": 9}]}')
+            with patch("piscis.ui.window.askopenfilename", return_value=""):
+                self.window.on_run_protocol()
+            with patch("piscis.ui.window.askopenfilename", return_value=protocol_path), \
+                    patch("piscis.ui.window.showerror") as showerror:
+                self.window.on_run_protocol()
+            self.assertEqual(showerror.call_args[0][0], "Invalid Protocol")
+            self.assertIsNone(self.window.protocol)
+
+            with open(protocol_path, "w") as protocol_file:
+                json.dump({"arenas": [{"arena": 2, "run_seconds": 5}]}, protocol_file)
+            with patch("piscis.ui.window.askopenfilename", return_value=protocol_path):
+                self.window.on_run_protocol()
+        self.assertEqual(self.window.protocol_path, protocol_path)
+        self.assertTrue(self.window.is_running(1))
+
+    def test_start_without_stimulus_asks_for_one(self):
+        with patch("piscis.ui.window.showinfo") as showinfo:
+            self.tab.on_start()
+        showinfo.assert_called_once_with("No Predator found", "Please place a stimuli first!")
+        self.assertFalse(self.window.is_running(0))
+        self.assertIsNone(self.window.interval_engine.get_phase(0))
+
+    def test_interval_spinboxes_set_remaining_seconds(self):
+        self.tab.interval_minutes_run.set("1")
+        self.tab.interval_seconds_run.set("5")
+        self.tab.on_run_minutes_changed()
+        self.tab.interval_seconds_pause.set("30")
+        self.tab.on_pause_seconds_changed()
+        self.assertEqual((self.tab.remaining_secs_run, self.tab.remaining_secs_pause), (65, 30))
+        self.assertEqual(self.tab.remaining_secs_label_pause.cget("text"), 30)
+        self.tab.interval_seconds_run.set("0")
+        self.tab.on_run_seconds_changed()
+        self.tab.interval_minutes_pause.set("2")
+        self.tab.on_pause_minutes_changed()
+        self.assertEqual((self.tab.remaining_secs_run, self.tab.remaining_secs_pause), (60, 150))
+        self.assertEqual(self.tab.remaining_secs_label_run.cget("text"), 60)
+
+    def test_selecting_the_overview_hides_arena_tabs(self):
+        self.window.on_tab_changed()
+        self.assertIsNone(self.window.visible_tab)
+        self.assertIsNone(self.window.get_visible_tab())
+
+    def test_resizing_an_empty_tab_only_redraws_outlines(self):
+        self.tab.canvas.configure(width=1000, height=500)
+        self.assertEqual(len(self.tab.canvas.find_kind("line")), 4)
+        self.assertIsNone(self.tab.predator_draw_object.item)
+
+    def test_preview_path_is_replaced(self):
+        self.tab.draw_preview_path([0, 0, 10, 10])
+        first = self.tab.path_item
+        self.tab.draw_preview_path([0, 0, 20, 20])
+        self.assertNotIn(first, self.tab.canvas.items)
+        self.assertEqual(self.tab.canvas.coords(self.tab.path_item), [0, 0, 20, 20])
+
+    def test_regenerated_stimulus_waits_for_start(self):
+        generate(self.tab)
+        self.tab.on_start()
+        self.window.render(create_frame(self.window, 1, 1000))
+        running = self.window.predator[0]
+        coordinates = self.window.all_tab.canvas.coords(self.window.all_tab.predator_draw_object[0].item)
+        generate(self.tab, diameter=.2)
+        self.tab.set_stimulus_color("#FF0000")
+        self.window.render(create_frame(self.window, 2, 1500))
+        self.assertIn(0, self.window.predator_array.get_changed_indices())
+        self.assertEqual(running.color, PREDATOR_COLOR)
+        self.assertEqual(self.window.all_tab.canvas.coords(self.window.all_tab.predator_draw_object[0].item),
+                         coordinates)
+
+
+class LiveParameterTestCase(TestCase):
+    def setUp(self):
+        self.window = create_headless_window()
+        self.window.show_tab(0)
+        self.tab = self.window.tabs[0]
+        generate(self.tab, diameter=.1)
+        self.tab.on_start()
+        self.window.render(create_frame(self.window, 1, 900))
+
+    def get_stimulus(self):
+        canvas = self.window.all_tab.canvas
+        item = self.window.all_tab.predator_draw_object[0].item
+        begin_x, _, end_x, _ = canvas.coords(item)
+        return end_x - begin_x, canvas.items[item]["options"]["fill"]
+
+    def test_color_change_recolors_running_stimulus(self):
+        width, _ = self.get_stimulus()
+        self.tab.set_stimulus_color("#FF0000")
+        self.window.render(create_frame(self.window, 2, 900))
+        self.assertAlmostEqual(self.get_stimulus()[0], width, delta=.5)
+        self.assertEqual(self.get_stimulus()[1], "#FF0000")
+        self.assertTrue(self.window.is_running(0))
+
+    def test_raised_target_diameter_keeps_stimulus_growing(self):
+        width, _ = self.get_stimulus()
+        self.tab.set_target_diameter(.5)
+        self.window.render(create_frame(self.window, 2, 1500))
+        self.assertAlmostEqual(self.get_stimulus()[0], width * 1.5 / .9, delta=.5)
+
+    def test_faster_scaling_velocity_redraws_larger_stimulus(self):
+        self.tab.set_target_diameter(.5)
+        width, _ = self.get_stimulus()
+        self.tab.set_scaling_velocity(.2)
+        self.window.render(create_frame(self.window, 2, 900))
+        self.assertAlmostEqual(self.get_stimulus()[0], width * 2, delta=.5)
+
+    def test_profile_change_reshapes_running_loom(self):
+        self.tab.set_target_diameter(.5)
+        self.window.render(create_frame(self.window, 2, 1500))
+        width, _ = self.get_stimulus()
+        self.tab.profile_combobox.set(EXPONENTIAL)
+        self.tab.spin_profile_parameter.set(".5")
+        self.tab.on_profile_selected()
+        self.window.render(create_frame(self.window, 3, 1500))
+        self.assertEqual(self.window.predator_array.profile_indices, [0])
+        self.assertAlmostEqual(self.get_stimulus()[0], width * .5 * np.exp(.5 * (1.5 - 5.)) / .15, delta=.5)
+
+        self.tab.profile_combobox.set(LINEAR)
+        self.tab.on_profile_parameter_changed()
+        self.window.render(create_frame(self.window, 4, 1500))
+        self.assertEqual(self.window.predator_array.profile_indices, [])
+        self.assertAlmostEqual(self.get_stimulus()[0], width, delta=.5)
+
+
+class StartupWiringTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.configuration = Configuration()
+        self.configuration.statistics_directory = self.directory.name
+        self.configuration.event_log_path = self.get_path("events.bin")
+        self.configuration.telemetry_path = self.get_path("telemetry.npz")
+        self.configuration.telemetry_frames = 16
+        self.configuration.session_trace_path = self.get_path("session.jsonl")
+        self.configuration.tracker_udp_port = 0
+        self.configuration.tracker_ring = "piscis-window-test-%d" % os.getpid()
+        self.configuration.follow = 90., .1
+        self.configuration.display_process = True
+        with patch.object(DisplayProcess, "start"):
+            self.window = create_headless_window(self.configuration)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_configured_services_start_and_stop_with_the_window(self):
+        self.assertIsNone(self.window.secondary_window)
+        self.assertEqual(len(self.window.closed_loop.sources), 2)
+        self.assertTrue(self.window.closed_loop.following.all())
+        tracker = SharedTrackerRing(self.configuration.tracker_ring, create=False)
+        tracker.push(create_samples(self.window.clock.monotonic(), 1, [(.5, .5)], 0.))
+        tracker.close()
+        tab = self.window.tabs[0]
+        generate(tab)
+        tab.on_start()
+        self.window.frame_statistics.expect_frame(0, self.window.clock.monotonic())
+        self.window.render(create_frame(self.window, 1, 1000))
+        self.assertEqual(self.window.frame_statistics.command_latencies.count, 1)
+        self.assertTrue(self.window.display_process.shared_state.read()[1]["arenas"]["tracked"][0])
+        self.assertIn("Tracker samples: 1 received", self.window.get_statistics_summary())
+
+        self.window.on_exit()
+        self.assertEqual(self.window.closed_loop.sources[0].socket.fileno(), -1)
+        names = os.listdir(self.directory.name)
+        self.assertTrue(any(name.startswith("frame_statistics_") for name in names))
+        for name in ("events.bin", "session.jsonl", "telemetry.npz"):
+            self.assertIn(name, names)
+        with np.load(self.configuration.telemetry_path) as telemetry:
+            self.assertEqual(len(telemetry["frame"]), 1)
+
+    def test_frame_statistics_window_refreshes_until_closed(self):
+        self.window.on_frame_statistics()
+        statistics_window = self.window.frame_statistics_window
+        self.window.on_frame_statistics()
+        self.assertIs(self.window.frame_statistics_window, statistics_window)
+        self.assertIn("Tracker samples", statistics_window.statistics_label.cget("text"))
+        self.window.frame_statistics.frames = 3
+        _, callback, _, _ = statistics_window.master.scheduled.pop(statistics_window.after_id)
+        callback()
+        self.assertIn("Frames: 3", statistics_window.statistics_label.cget("text"))
+        statistics_window.on_close()
+        self.assertFalse(statistics_window.is_open())
+        self.window.on_frame_statistics()
+        self.assertIsNot(self.window.frame_statistics_window, statistics_window)
+        self.window.on_exit()
+
+
+class SessionResumeTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.configuration = Configuration()
+        self.configuration.snapshot_path = os.path.join(self.directory.name, "session.snapshot")
+        self.window = create_headless_window(self.configuration)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def resume(self):
+        self.configuration.resume = True
+        return create_headless_window(self.configuration)
+
+    def test_resumes_running_interval(self):
+        tab = self.window.tabs[1]
+        tab.run_seconds, tab.pause_seconds = 10, 4
+        tab.remaining_secs_run, tab.remaining_secs_pause = 10, 4
+        tab.change_background_color("#00FF00")
+        generate(tab, diameter=.3)
+        tab.on_start()
+        tab.on_run_tick(6, 0)
+
+        window = self.resume()
+        tab = window.tabs[1]
+        self.assertTrue(window.is_running(1))
+        self.assertEqual(window.predator_array.target_diameters[1], .3)
+        self.assertEqual(tab.current_background_color, "#00FF00")
+        phase = window.interval_engine.get_phase(1)
+        self.assertEqual((phase.name, phase.duration), (RUN, 6))
+        self.assertEqual((tab.run_seconds, tab.pause_seconds), (10, 4))
+        self.assertFalse(window.is_running(0))
+
+    def test_exit_closes_snapshot(self):
+        generate(self.window.tabs[0], diameter=.3)
+        self.window.on_exit()
+        self.assertIsNone(self.window.snapshot)
+        self.assertEqual(self.resume().tabs[0].target_diameter, .3)
+
+    def test_resumes_pause(self):
+        tab = self.window.tabs[0]
+        tab.remaining_secs_run, tab.remaining_secs_pause = 5, 5
+        generate(tab)
+        tab.on_start()
+        tab.on_run_end(0)
+        tab.on_pause_tick(2, 0)
+
+        window = self.resume()
+        self.assertFalse(window.is_running(0))
+        phase = window.interval_engine.get_phase(0)
+        self.assertEqual((phase.name, phase.duration), (PAUSE, 2))
+        self.assertIsNotNone(window.tabs[0].predator)
+
+    def test_resumes_protocol_at_current_trial(self):
+        protocol_path = os.path.join(self.directory.name, "protocol.json")
+        with open(protocol_path, "w") as protocol_file:
+            json.dump({"arenas": [{"arena": 3, "run_seconds": 5, "sweep": {"diameter": [.2, .4, .6]}}]},
+                      protocol_file)
+        self.window.run_protocol(load_protocol(protocol_path, 4), protocol_path)
+        self.window.tabs[2].on_run_end(0)
+        self.window.tabs[2].on_pause_end(0)
+
+        window = self.resume()
+        tab = window.tabs[2]
+        self.assertEqual(tab.trial.number, 1)
+        self.assertEqual(tab.target_diameter, .4)
+        self.assertEqual(next(tab.trials).number, 2)
+        self.assertTrue(window.is_running(2))
+
+    def write_randomized_protocol(self, seed=None):
+        protocol_path = os.path.join(self.directory.name, "protocol.json")
+        data = {"randomize": True, "arenas": [{"arena": 3, "run_seconds": 5,
+                                               "sweep": {"diameter": [.1, .2, .3, .4, .5, .6, .7, .8]}}]}
+        if seed is not None:
+            data["seed"] = seed
+        with open(protocol_path, "w") as protocol_file:
+            json.dump(data, protocol_file)
+        return protocol_path
+
+    def test_resumes_unseeded_randomized_protocol_in_the_same_order(self):
+        protocol_path = self.write_randomized_protocol()
+        self.window.run_protocol(load_protocol(protocol_path, 4), protocol_path)
+        diameters = [trial.stimulus["diameter"] for trial in self.window.protocol.expand(2)]
+        self.window.tabs[2].on_run_end(0)
+        self.window.tabs[2].on_pause_end(0)
+
+        window = self.resume()
+        self.assertEqual(window.protocol.seed, self.window.protocol.seed)
+        self.assertEqual(window.tabs[2].target_diameter, diameters[1])
+        self.assertEqual([trial.stimulus["diameter"] for trial in window.tabs[2].trials], diameters[2:])
+
+    def test_keeps_the_seed_of_the_protocol_file(self):
+        protocol_path = self.write_randomized_protocol(seed=7)
+        self.window.run_protocol(load_protocol(protocol_path, 4), protocol_path)
+        self.assertIsNone(self.window.snapshot.get_protocol_seed())
+        self.assertEqual(self.resume().protocol.seed, 7)
+
+    def test_resume_refuses_randomized_trials_without_a_seed(self):
+        protocol_path = self.write_randomized_protocol(seed=7)
+        self.window.run_protocol(load_protocol(protocol_path, 4), protocol_path)
+        self.write_randomized_protocol()
+
+        window = self.resume()
+        self.assertIsNotNone(window.protocol)
+        self.assertIsNone(window.tabs[2].trial)
+        self.assertIsNone(window.tabs[2].trials)
+
+    def test_resume_skips_torn_arenas_and_missing_protocols(self):
+        protocol_path = os.path.join(self.directory.name, "protocol.json")
+        with open(protocol_path, "w") as protocol_file:
+            json.dump({"arenas": [{"arena": 1, "run_seconds": 5}, {"arena": 2, "run_seconds": 5}]}, protocol_file)
+        self.window.run_protocol(load_protocol(protocol_path, 4), protocol_path)
+        self.window.snapshot.begin(0)
+        os.remove(protocol_path)
+
+        window = self.resume()
+        self.assertIsNone(window.protocol)
+        self.assertFalse(window.is_running(0))
+        self.assertIsNone(window.tabs[0].predator)
+        self.assertTrue(window.is_running(1))
+        self.assertIsNone(window.tabs[1].trials)
+
+    def test_resumed_trials_keep_their_path(self):
+        protocol_path = os.path.join(self.directory.name, "protocol.json")
+        path = {"kind": "circular", "center": [.5, .5], "speed": .1}
+        with open(protocol_path, "w") as protocol_file:
+            json.dump({"arenas": [{"arena": 2, "run_seconds": 5, "stimulus": {"path": path}}]}, protocol_file)
+        self.window.run_protocol(load_protocol(protocol_path, 4), protocol_path)
+
+        tab = self.resume().tabs[1]
+        self.assertEqual(tab.path, path)
+        self.assertIsNotNone(tab.predator.movement_vector.trajectory)